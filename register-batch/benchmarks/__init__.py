@@ -0,0 +1,2 @@
+# Offline benchmarks for register-batch. Run from the register-batch directory,
+# e.g. `python -m benchmarks.bench_register_service`.
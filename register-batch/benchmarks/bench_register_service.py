@@ -0,0 +1,143 @@
+"""
+RegisterService のオフラインベンチマーク。
+
+ローカルの偽 niconico サイト (tests/fakes) に NICO_URL / MYLIST_URL を向けて、
+実際の headless Chrome で login / remove_all_mylist / create_mylist /
+add_videos_to_mylist を実行する。--min-videos-per-sec や --max-p95-ms の
+しきい値を下回った場合は終了コード 1 を返すので、性能変更の回帰チェックに使える。
+
+    python -m benchmarks.bench_register_service --videos 10 100 1000 --json result.json
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import sys
+import time
+
+from helpers import selector_registry, selenium_helper
+from services import register_service
+from services.register_service import RegisterService
+from tests.fakes.fake_niconico_server import FakeNiconicoServer, FakeNiconicoState
+
+EMAIL = "test@example.com"
+PASSWORD = "password"
+
+
+def point_at(server: FakeNiconicoServer) -> None:
+    """RegisterService が参照する niconico の URL を偽サーバーに向ける"""
+    register_service.NICO_URL = server.base_url
+    register_service.MYLIST_URL = f"{server.base_url}/my/mylist"
+    register_service.NVAPI_URL = server.base_url
+
+
+def percentile(values, ratio):
+    ordered = sorted(values)
+    return ordered[max(0, int(len(ordered) * ratio) - 1)]
+
+
+def measure_driver_startup(samples: int, preset: str) -> dict:
+    """指定したプリセットで Chrome を起動してから最初のコマンドが返るまでの時間を計測する"""
+    timings = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        driver = selenium_helper.create_chrome_driver(preset)
+        driver.execute_script("return 1")
+        timings.append(time.perf_counter() - start)
+        driver.quit()
+        shutil.rmtree(driver.user_data_dir, ignore_errors=True)
+    return {"samples": samples, "p50_ms": statistics.median(timings) * 1000, "max_ms": max(timings) * 1000}
+
+
+def bench(server: FakeNiconicoServer, video_count: int, mylist_count: int) -> dict:
+    for i in range(mylist_count):
+        server.state.create_mylist(f"old{i}")
+
+    start = time.perf_counter()
+    service = RegisterService()
+    startup_seconds = time.perf_counter() - start
+
+    latencies = []
+    failed_count = 0
+    with service:
+        start = time.perf_counter()
+        service.login(EMAIL, PASSWORD)
+        service.remove_all_mylist()
+        service.create_mylist("Benchmark")
+        setup_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for i in range(1, video_count + 1):
+            item_start = time.perf_counter()
+            failed_count += len(service.add_videos_to_mylist([f"sm{i}"]))
+            latencies.append(time.perf_counter() - item_start)
+        total_seconds = time.perf_counter() - start
+
+    return {
+        "videos": video_count,
+        "failed": failed_count,
+        "driver_startup_ms": startup_seconds * 1000,
+        "setup_seconds": setup_seconds,
+        "videos_per_sec": video_count / total_seconds,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark RegisterService offline")
+    parser.add_argument("--videos", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--mylists", type=int, default=20, help="mylists to delete before each run")
+    parser.add_argument("--startup-samples", type=int, default=3)
+    parser.add_argument("--presets", nargs="+", default=["fast", "safe"],
+                        choices=sorted(selenium_helper.LAUNCH_PRESETS), help="launch presets to time")
+    parser.add_argument("--pipeline-tabs", type=int, default=1,
+                        help="tabs to load watch pages in while videos are added (REGIST_PIPELINE_TABS)")
+    parser.add_argument("--latency-ms", type=int, default=0, help="artificial delay per fake server response")
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--min-videos-per-sec", type=float, help="fail if any run is slower")
+    parser.add_argument("--max-p95-ms", type=float, help="fail if any run's p95 latency is higher")
+    args = parser.parse_args()
+    os.environ["REGIST_PIPELINE_TABS"] = str(args.pipeline_tabs)
+
+    startup = {}
+    for preset in args.presets:
+        startup[preset] = measure_driver_startup(args.startup_samples, preset)
+        print(f"driver startup ({preset}): p50 {startup[preset]['p50_ms']:.0f} ms, "
+              f"max {startup[preset]['max_ms']:.0f} ms")
+
+    runs = []
+    with FakeNiconicoServer(FakeNiconicoState(latency_ms=args.latency_ms)) as server:
+        point_at(server)
+        print(f"{'videos':>8} {'failed':>7} {'startup ms':>11} {'setup s':>8} {'videos/s':>9} {'p50 ms':>8} {'p95 ms':>8}")
+        for count in args.videos:
+            run = bench(server, count, args.mylists)
+            runs.append(run)
+            print(f"{run['videos']:>8} {run['failed']:>7} {run['driver_startup_ms']:>11.0f} "
+                  f"{run['setup_seconds']:>8.2f} {run['videos_per_sec']:>9.2f} "
+                  f"{run['p50_ms']:>8.0f} {run['p95_ms']:>8.0f}")
+
+    selectors = selector_registry.stats()
+    print(selector_registry.format_stats(selectors))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"driver_startup": startup, "runs": runs, "selectors": selectors}, f, indent=2)
+
+    failures = []
+    for run in runs:
+        if run["failed"]:
+            failures.append(f"{run['failed']} of {run['videos']} videos failed")
+        if args.min_videos_per_sec and run["videos_per_sec"] < args.min_videos_per_sec:
+            failures.append(f"{run['videos']} videos: {run['videos_per_sec']:.2f} videos/s "
+                            f"< {args.min_videos_per_sec}")
+        if args.max_p95_ms and run["p95_ms"] > args.max_p95_ms:
+            failures.append(f"{run['videos']} videos: p95 {run['p95_ms']:.0f} ms > {args.max_p95_ms}")
+    for failure in failures:
+        print(f"REGRESSION: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+NVAPI_URL = "https://nvapi.nicovideo.jp"
+ACCOUNT_URL = "https://account.nicovideo.jp"
+LOGIN_PATH = "/login/redirector?site=niconico&next_url=%2F"
+SESSION_COOKIE_NAME = "user_session"
+NVAPI_HEADERS = {
+    "X-Frontend-Id": "6",
+    "X-Frontend-Version": "0",
+    "X-Niconico-Language": "ja-jp",
+    "X-Request-With": "https://www.nicovideo.jp",
+}
+
+
+def diff_mylist(current_items: Dict[str, int], id_list: List[str]) -> Tuple[List[str], List[int]]:
+    """
+    マイリストの現在の中身 (動画 ID → itemId) と登録したい動画を比較し、
+    (追加する動画 ID (id_list の順), 削除する itemId) を返す。
+    """
+    requested = set(id_list)
+    ids_to_add = [video_id for video_id in id_list if video_id not in current_items]
+    item_ids_to_remove = [item_id for video_id, item_id in current_items.items() if video_id not in requested]
+    return ids_to_add, item_ids_to_remove
+
+
+class NicoApiError(Exception):
+    """Raised when a niconico API request fails"""
+
+    def __init__(self, message: str, status_code: int = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class HttpEngine:
+    """
+    RegisterService から利用する、niconico の JSON API を直接呼び出す登録エンジン。
+    全リクエストを 1 つのプール済み requests.Session で送るため、
+    動画 1 件あたりのコストはページ遷移ではなく HTTP 1 往復になる。
+    """
+
+    def __init__(self, nvapi_url: str = None, account_url: str = None,
+                 pool_size: int = 10, timeout: int = 30):
+        self.nvapi_url = (nvapi_url or os.environ.get("NVAPI_URL", NVAPI_URL)).rstrip("/")
+        self.account_url = (account_url or os.environ.get("ACCOUNT_URL", ACCOUNT_URL)).rstrip("/")
+        self.timeout = timeout
+        self.pool_size = pool_size
+
+        self.session = requests.Session()
+        retry = Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 502, 503, 504],
+                      allowed_methods=["GET", "DELETE"])
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update(NVAPI_HEADERS)
+
+    def _request(self, method: str, path: str, **kwargs) -> dict:
+        response = self.session.request(method, f"{self.nvapi_url}{path}", timeout=self.timeout, **kwargs)
+        if response.status_code >= 400:
+            raise NicoApiError(
+                f"{method} {path} failed: {response.status_code} - {response.text[:200]}",
+                response.status_code
+            )
+        if not response.content:
+            return {}
+        return response.json()
+
+    def login(self, email: str, password: str) -> None:
+        response = self.session.post(
+            f"{self.account_url}{LOGIN_PATH}",
+            data={"mail_tel": email, "password": password},
+            timeout=self.timeout
+        )
+        if not self.session.cookies.get(SESSION_COOKIE_NAME):
+            raise NicoApiError("Login failed: session cookie was not issued", response.status_code)
+
+    def list_mylist_ids(self) -> List[int]:
+        """Return the IDs of the logged-in user's mylists"""
+        data = self._request("GET", "/v1/users/me/mylists")
+        return [mylist["id"] for mylist in data.get("data", {}).get("mylists", [])]
+
+    def delete_mylist(self, mylist_id: int) -> None:
+        self._request("DELETE", f"/v1/users/me/mylists/{mylist_id}")
+
+    def remove_all_mylist(self) -> None:
+        """
+        Delete every mylist with concurrent requests, then verify none remain.
+        """
+        mylist_ids = self.list_mylist_ids()
+        if mylist_ids:
+            with ThreadPoolExecutor(max_workers=self.pool_size) as executor:
+                list(executor.map(self.delete_mylist, mylist_ids))
+
+        remaining = self.list_mylist_ids()
+        if remaining:
+            raise NicoApiError(f"{len(remaining)} mylists remain after deletion")
+
+    def list_mylist_items(self, mylist_id: int) -> Dict[str, int]:
+        """
+        マイリスト内の動画を全ページ取得し、動画 ID (watchId) → itemId の dict を返す。
+        """
+        items = {}
+        page = 1
+        while True:
+            data = self._request("GET", f"/v1/users/me/mylists/{mylist_id}",
+                                 params={"pageSize": 100, "page": page})["data"]["mylist"]
+            for item in data["items"]:
+                items[item["watchId"]] = item["itemId"]
+            if not data.get("hasNext"):
+                return items
+            page += 1
+
+    def remove_mylist_items(self, mylist_id: int, item_ids: List[int]) -> None:
+        for start in range(0, len(item_ids), 100):
+            chunk = item_ids[start:start + 100]
+            self._request("DELETE", f"/v1/users/me/mylists/{mylist_id}/items",
+                          params={"itemIds": ",".join(str(item_id) for item_id in chunk)})
+
+    def sync_mylist(self, id_list: List[str], title: Optional[str] = None) -> List[str]:
+        """
+        先頭のマイリストを作り直さずに id_list と一致させる。
+        不要な動画を削除し、まだ登録されていない動画 ID を返す。
+        マイリストが無ければ作成する。
+        """
+        mylist_ids = self.list_mylist_ids()
+        if not mylist_ids:
+            self.create_mylist(title)
+            return list(id_list)
+
+        ids_to_add, item_ids_to_remove = diff_mylist(self.list_mylist_items(mylist_ids[0]), id_list)
+        if item_ids_to_remove:
+            self.remove_mylist_items(mylist_ids[0], item_ids_to_remove)
+        return ids_to_add
+
+    def create_mylist(self, title: Optional[str] = None) -> str:
+        if title is None or title == "":
+            current_time = datetime.now().strftime("%Y%m%d_%H%M%S")
+            title = f"MyList_{current_time}"
+        self._request("POST", "/v1/users/me/mylists", params={
+            "name": title,
+            "description": "",
+            "isPublic": "false",
+            "defaultSortKey": "addedAt",
+            "defaultSortOrder": "desc",
+        })
+        return title
+
+    def add_video(self, mylist_id: int, video_id: str) -> None:
+        self._request("POST", f"/v1/users/me/mylists/{mylist_id}/items",
+                      params={"itemId": video_id, "description": ""})
+
+    def add_videos_to_mylist(self, id_list: List[str], mylist_id: int = None, on_result=None) -> List[str]:
+        """
+        Add videos to a mylist (the first mylist when mylist_id is omitted,
+        matching the mylist the Selenium flow selects).
+
+        on_result(video_id, ok) is called after each video, so a caller that
+        falls back mid-batch knows which videos are already done.
+        """
+        if mylist_id is None:
+            mylist_ids = self.list_mylist_ids()
+            if not mylist_ids:
+                raise NicoApiError("No mylist to add videos to")
+            mylist_id = mylist_ids[0]
+
+        failed_id_list = []
+        for video_id in id_list:
+            try:
+                self.add_video(mylist_id, video_id)
+            except NicoApiError as e:
+                # An expired session fails every request; let the caller fall back
+                if e.status_code == 401:
+                    raise
+                print(f"Failed to add {video_id}: {e}")
+                failed_id_list.append(video_id)
+                if on_result:
+                    on_result(video_id, False)
+                continue
+            if on_result:
+                on_result(video_id, True)
+        return failed_id_list
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self) -> None:
+        self.session.close()
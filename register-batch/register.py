@@ -1,6 +1,8 @@
 import os
 from services.register_service import RegisterService
+from utils.availability_util import AvailabilityUtil
 from utils.notification_util import NotificationUtil
+from utils.video_id_util import VideoIdUtil
 
 
 def main():
@@ -8,19 +10,34 @@ def main():
 
     email = os.getenv("NICONICO_EMAIL")
     password = os.getenv("NICONICO_PASSWORD")
-    id_list = os.getenv("NICONICO_ID_LIST", "").split(",")
+    # 空・重複・形式不正の ID はブラウザを使う前に除外し、不正な ID は失敗として扱う
+    id_list, invalid_ids = VideoIdUtil.normalize(os.getenv("NICONICO_ID_LIST", "").split(","))
+    for video_id, reason in invalid_ids.items():
+        print(f"Skipping invalid video ID {video_id!r}: {reason}")
     push_subscription = os.getenv("PUSH_SUBSCRIPTION")
+    # 既存のマイリストを残し、差分だけ追加・削除する
+    sync_mode = os.getenv("NICONICO_SYNC_MODE", "").lower() in ("1", "true")
 
     with RegisterService() as service:
         try:
             print("Logging in...")
             service.login(email, password)
-            print("Removing all mylist items...")
-            service.remove_all_mylist()
-            print("Creating new mylist...")
-            service.create_mylist()
+            if sync_mode:
+                print("Syncing mylist with the requested videos...")
+                id_list = service.sync_mylist(id_list)
+            else:
+                print("Removing all mylist items...")
+                service.remove_all_mylist()
+                print("Creating new mylist...")
+                service.create_mylist()
+            # 削除・非公開の動画は追加の前に失敗として扱う (AVAILABILITY_CHECK=1 のときのみ)。
+            # 同期の差分を取った後に確認するので、一時的な確認失敗で登録済みの動画を削除することはない
+            unavailable_ids = AvailabilityUtil.find_unavailable(id_list)
+            for video_id, reason in unavailable_ids.items():
+                print(f"Skipping unavailable video {video_id}: {reason}")
+            id_list = [video_id for video_id in id_list if video_id not in unavailable_ids]
             print("Adding videos to mylist...")
-            failed_ids = service.add_videos_to_mylist(id_list)
+            failed_ids = list(invalid_ids) + list(unavailable_ids) + service.add_videos_to_mylist(id_list)
         except Exception as e:
             print("An error occurred:", e)
             screenshot_key = service.save_screenshot()
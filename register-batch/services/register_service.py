@@ -1,25 +1,82 @@
-import time
+import os
 from datetime import datetime
 from typing import List, Optional
 
-from helpers import selenium_helper
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.support.ui import WebDriverWait
+
+from helpers import profiler, selector_registry, selenium_helper
+from helpers.http_engine import HttpEngine, NVAPI_URL, NVAPI_HEADERS, diff_mylist
 
 NICO_URL = "https://www.nicovideo.jp"
 MYLIST_URL = "https://www.nicovideo.jp/my/mylist"
-LOGIN_BUTTON_XPATH = '//*[@id="CommonHeader"]/div/div/div/div[2]/a'
-MAIL_INPUT_XPATH = '//*[@id="input__mailtel"]'
-PASS_INPUT_XPATH = '//*[@id="input__password"]'
-LOGIN_SUBMIT_XPATH = '//*[@id="login__submit"]'
-MYLIST_COUNT_XPATH = '//*[@id="UserPage-app"]/section/section/main/div/div/div[1]/div[2]/div/div/div/ul[1]/div/header/div/span/span[1]'
-MYLIST_REMOVE1_XPATH = '//*[@id="UserPage-app"]/section/section/main/div/section/div/div[3]/div[1]/div/a'
-MYLIST_REMOVE2_XPATH = '//*[@id="UserPage-app"]/section/section/main/div/section/div/header/div/div[2]/button'
-MYLIST_REMOVE3_XPATH = '//*[@id="UserPage-app"]/section/section/main/div/section/div/header/div/div[2]/div/button[3]'
-MYLIST_CREATE_BUTTON_XPATH = '//*[@id="UserPage-app"]/section/section/main/div/div/div[1]/div[2]/div/div/div/ul[1]/div/div/button[1]'
-MYLIST_TITLE_INPUT_XPATH = '//*[@id="undefined-title"]'
-MYLIST_CREATE_CONFIRM_XPATH = '/html/body/div[13]/div/div/article/footer/button'
-VIDEO_MENU_BUTTON_XPATH = '/html/body/div/div[1]/main/div[2]/div[1]/section/div[1]/div/div[2]/div[3]/div/button[5]'
-VIDEO_ADD_TO_MYLIST_XPATH = '/html/body/div[2]/div/div/div[2]/button'
-VIDEO_MYLIST_SELECT_XPATH = '//*[@id="root"]/div[1]/main/div[2]/div[1]/section/div[3]/div[2]/section/div/ul/li[2]/button'
+# マイリスト一覧を 1 回取得し、全マイリストを並列に DELETE した後、残数を再取得して検証する
+BULK_DELETE_MYLISTS_SCRIPT = """
+const [nvapiUrl, headers, done] = arguments;
+const listMylistIds = async () => {
+    const response = await fetch(`${nvapiUrl}/v1/users/me/mylists`, {credentials: "include", headers});
+    if (!response.ok) throw new Error(`list mylists failed: ${response.status}`);
+    return (await response.json()).data.mylists.map(mylist => mylist.id);
+};
+(async () => {
+    const ids = await listMylistIds();
+    const statuses = await Promise.all(ids.map(id =>
+        fetch(`${nvapiUrl}/v1/users/me/mylists/${id}`, {method: "DELETE", credentials: "include", headers})
+            .then(response => response.status)
+    ));
+    const remaining = await listMylistIds();
+    done({deleted: ids.length, statuses, remaining: remaining.length});
+})().catch(error => done({error: String(error)}));
+"""
+# 先頭のマイリストの中身 (watchId → itemId) を全ページ取得する。マイリストが無ければ mylistId は null
+READ_MYLIST_ITEMS_SCRIPT = """
+const [nvapiUrl, headers, done] = arguments;
+(async () => {
+    const listResponse = await fetch(`${nvapiUrl}/v1/users/me/mylists`, {credentials: "include", headers});
+    if (!listResponse.ok) throw new Error(`list mylists failed: ${listResponse.status}`);
+    const mylists = (await listResponse.json()).data.mylists;
+    if (mylists.length === 0) return done({mylistId: null, items: {}});
+    const mylistId = mylists[0].id;
+    const items = {};
+    for (let page = 1; ; page++) {
+        const response = await fetch(`${nvapiUrl}/v1/users/me/mylists/${mylistId}?pageSize=100&page=${page}`,
+                                     {credentials: "include", headers});
+        if (!response.ok) throw new Error(`list items failed: ${response.status}`);
+        const mylist = (await response.json()).data.mylist;
+        mylist.items.forEach(item => { items[item.watchId] = item.itemId; });
+        if (!mylist.hasNext) break;
+    }
+    done({mylistId, items});
+})().catch(error => done({error: String(error)}));
+"""
+# 指定した itemId を 100 件ずつまとめて削除する
+REMOVE_MYLIST_ITEMS_SCRIPT = """
+const [nvapiUrl, headers, mylistId, itemIds, done] = arguments;
+(async () => {
+    const statuses = [];
+    for (let start = 0; start < itemIds.length; start += 100) {
+        const query = itemIds.slice(start, start + 100).join(",");
+        const response = await fetch(`${nvapiUrl}/v1/users/me/mylists/${mylistId}/items?itemIds=${query}`,
+                                     {method: "DELETE", credentials: "include", headers});
+        statuses.push(response.status);
+    }
+    done({statuses});
+})().catch(error => done({error: String(error)}));
+"""
+ENGINE_SELENIUM = "selenium"
+ENGINE_HTTP = "http"
+# UI 操作の完了を確認するための nvapi リクエスト
+MYLIST_ITEMS_API_PATTERN = r"/v1/users/me/mylists/\d+/items"
+MYLIST_CREATE_API_PATTERN = r"/v1/users/me/mylists(\?|$)"
+MYLIST_DELETE_API_PATTERN = r"/v1/users/me/mylists/\d+(\?|$)"
+# 動画をマイリストに追加するクリック順 (1 回のスクリプトでまとめて実行する)
+VIDEO_ADD_TARGETS = ["video_menu_button", "video_add_to_mylist", "video_mylist_select"]
+# スクリプトでは失敗しクリックごとの操作で成功した回数がこれに達したら、スクリプトを使わない
+SCRIPTED_ADD_MAX_FAILURES = 3
+# スクリプトを止めた後、クリックごとの操作でこの回数追加したら、スクリプトを 1 回だけ試し直す
+SCRIPTED_ADD_RETRY_AFTER = 20
+# 裏のタブで読み込んだ視聴ページが操作できる状態か (eager の driver.get が返るのと同じ時点)
+WATCH_PAGE_READY_SCRIPT = 'return location.pathname.endsWith("/watch/" + arguments[0]) && document.readyState !== "loading";'
 
 
 class RegisterService:
@@ -27,19 +84,57 @@ class RegisterService:
     Nicovideo のマイリスト登録処理をまとめたサービスクラス。
     デフォルトでは project 内の helpers.selenium_helper を使用するが、
     テスト時などは selenium_helper_module を差し替えて利用可能。
+
+    engine に "http" を指定する (または環境変数 REGIST_ENGINE=http) と、
+    ブラウザを使わず HttpEngine で JSON API を直接呼び出す。
+    HTTP での操作に失敗した場合 (ログイン失敗、セッション切れ、API の変更、
+    通信エラーなど) は Selenium でログインし直し、残りの処理を続ける。
     """
 
-    def __init__(self, selenium_helper_module=selenium_helper, window_size: tuple = (1920, 1080)):
+    def __init__(self, selenium_helper_module=selenium_helper, window_size: tuple = (1920, 1080),
+                 engine: Optional[str] = None):
         self.selenium: selenium_helper = selenium_helper_module
         self.window_size = window_size
-        # create the webdriver immediately in constructor
+        self.driver = None
+        self.http_engine: Optional[HttpEngine] = None
+        # HTTP からフォールバックした後に Selenium でログインし直すために保持する
+        self.credentials: Optional[tuple] = None
+        self.scripted_add_failures = 0
+        self.scripted_add_skipped = 0
+
+        engine = (engine or os.getenv("REGIST_ENGINE", ENGINE_SELENIUM)).lower()
+        if engine == ENGINE_HTTP:
+            self.http_engine = HttpEngine()
+        else:
+            # create the webdriver immediately in constructor
+            self._create_driver()
+
+    def _create_driver(self) -> None:
         self.driver = self.selenium.create_chrome_driver()
         self.driver.set_window_size(*self.window_size)
 
+    def _fallback_to_selenium(self, reason: Exception) -> None:
+        """
+        HttpEngine を破棄して Selenium での処理に切り替え、保持している認証情報でログインする。
+        """
+        print(f"HTTP engine failed ({reason}), falling back to Selenium")
+        if self.http_engine:
+            self.http_engine.close()
+            self.http_engine = None
+        if self.driver is None:
+            self._create_driver()
+        if self.credentials:
+            self._login_with_selenium(*self.credentials)
+
     def __enter__(self):
         return self
 
     def __exit__(self, exc_type, exc, tb):
+        # SELENIUM_PROFILE=1 のときだけ WebDriver コマンドの集計を出力する
+        profiler.report("register_service")
+        if self.http_engine:
+            self.http_engine.close()
+            self.http_engine = None
         if self.driver:
             try:
                 self.driver.quit()
@@ -55,64 +150,244 @@ class RegisterService:
             except Exception:
                 pass
 
+    @profiler.profiled()
     def login(self, email: str, password: str) -> None:
         """
         サイトへ遷移してログインする。
         """
+        self.credentials = (email, password)
+        if self.http_engine:
+            try:
+                self.http_engine.login(email, password)
+            except Exception as e:
+                self._fallback_to_selenium(e)
+            return
+        self._login_with_selenium(email, password)
+
+    def _login_with_selenium(self, email: str, password: str) -> None:
         driver = self.driver
         driver.get(NICO_URL)
-        self.selenium.wait_and_click(driver, LOGIN_BUTTON_XPATH)
-        self.selenium.wait_and_send_keys(driver, MAIL_INPUT_XPATH, email)
-        self.selenium.wait_and_send_keys(driver, PASS_INPUT_XPATH, password)
-        self.selenium.wait_and_click(driver, LOGIN_SUBMIT_XPATH)
+        selector_registry.click(driver, "login_button")
+        selector_registry.send_keys(driver, "mail_input", email)
+        selector_registry.send_keys(driver, "password_input", password)
+        selector_registry.click(driver, "login_submit")
 
+    @profiler.profiled()
     def remove_all_mylist(self) -> None:
         """
-        全てのマイリストを削除する（UI 操作）。
+        全てのマイリストを削除する。
+        ページ内の nvapi で一括削除し、失敗した場合のみ UI 操作で 1 件ずつ削除する。
+        """
+        if self.http_engine:
+            try:
+                self.http_engine.remove_all_mylist()
+                return
+            except Exception as e:
+                self._fallback_to_selenium(e)
+
+        driver = self.driver
+        driver.get(MYLIST_URL)
+        if self.bulk_remove_all_mylist():
+            # 一括削除後の状態を画面に反映させるため 1 回だけ再読み込みする
+            driver.get(MYLIST_URL)
+            return
+        self.remove_all_mylist_by_ui()
+
+    def bulk_remove_all_mylist(self) -> bool:
+        """
+        ログイン済みのページ上から nvapi を呼び出し、全マイリストを 1 パスで削除する。
+        検証のための再取得で残数が 0 なら True を返す。
+        """
+        try:
+            result = self.selenium.run_async_script(
+                self.driver, BULK_DELETE_MYLISTS_SCRIPT, NVAPI_URL, NVAPI_HEADERS)
+        except Exception as e:
+            print("Bulk mylist deletion failed:", e)
+            return False
+
+        if not result or result.get("error"):
+            print("Bulk mylist deletion failed:", result.get("error") if result else "no result")
+            return False
+
+        print(f"Bulk deleted {result['deleted']} mylists (statuses: {result['statuses']})")
+        return result["remaining"] == 0
+
+    def remove_all_mylist_by_ui(self) -> None:
+        """
+        全てのマイリストを UI 操作で 1 件ずつ削除する（フォールバック用）。
         """
         driver = self.driver
         driver.get(MYLIST_URL)
         while True:
-            count_element = self.selenium.wait_and_find_element(driver, MYLIST_COUNT_XPATH, timeout=30)
+            count_element = selector_registry.find(driver, "mylist_count", timeout=30)
             count_text = count_element.text
             if count_text == "0":
                 break
-            self.selenium.wait_and_click(driver, MYLIST_REMOVE1_XPATH)
-            self.selenium.wait_and_click(driver, MYLIST_REMOVE2_XPATH)
-            self.selenium.wait_and_click(driver, MYLIST_REMOVE3_XPATH)
+            selector_registry.click(driver, "mylist_first")
+            selector_registry.click(driver, "mylist_menu")
+            selector_registry.click(driver, "mylist_delete")
+            self.selenium.drain_network_log(driver)
             self.selenium.wait_and_accept_alert(driver)
-            time.sleep(1)
+            self.selenium.wait_for_network_response(driver, MYLIST_DELETE_API_PATTERN, "DELETE")
             driver.get(MYLIST_URL)
 
+    @profiler.profiled()
+    def sync_mylist(self, id_list: List[str], title: Optional[str] = None) -> List[str]:
+        """
+        全削除・再作成の代わりに、先頭のマイリストを id_list と一致させる。
+        マイリストを 1 回だけ読み取り、不要な動画を削除して、まだ登録されていない
+        動画 ID を返す。マイリストが無ければ作成する。
+        """
+        if self.http_engine:
+            try:
+                return self.http_engine.sync_mylist(id_list, title)
+            except Exception as e:
+                # 読み取りからやり直すので、途中まで同期していても結果は同じになる
+                self._fallback_to_selenium(e)
+
+        driver = self.driver
+        driver.get(MYLIST_URL)
+        current = self.selenium.run_async_script(driver, READ_MYLIST_ITEMS_SCRIPT, NVAPI_URL, NVAPI_HEADERS)
+        if not current or current.get("error"):
+            raise Exception(f"Failed to read mylist items: {current.get('error') if current else 'no result'}")
+
+        if current["mylistId"] is None:
+            self.create_mylist(title)
+            return list(id_list)
+
+        ids_to_add, item_ids_to_remove = diff_mylist(current["items"], id_list)
+        if item_ids_to_remove:
+            result = self.selenium.run_async_script(
+                driver, REMOVE_MYLIST_ITEMS_SCRIPT, NVAPI_URL, NVAPI_HEADERS,
+                current["mylistId"], item_ids_to_remove)
+            if not result or result.get("error") or any(status >= 400 for status in result["statuses"]):
+                raise Exception(f"Failed to remove mylist items: {result}")
+        print(f"Sync: {len(ids_to_add)} videos to add, {len(item_ids_to_remove)} removed, "
+              f"{len(id_list) - len(ids_to_add)} already registered")
+        return ids_to_add
+
+    @profiler.profiled()
     def create_mylist(self, title: Optional[str] = None) -> str:
         """
         新規マイリストを作成して、そのタイトルを返す。
         """
+        if self.http_engine:
+            try:
+                return self.http_engine.create_mylist(title)
+            except Exception as e:
+                self._fallback_to_selenium(e)
+
         driver = self.driver
-        self.selenium.wait_and_click(driver, MYLIST_CREATE_BUTTON_XPATH)
+        selector_registry.click(driver, "mylist_create_button")
         if title is None or title == "":
             current_time = datetime.now().strftime("%Y%m%d_%H%M%S")
             title = f"MyList_{current_time}"
-        self.selenium.wait_and_send_keys(
-            driver, MYLIST_TITLE_INPUT_XPATH, title)
-        self.selenium.wait_and_click(driver, MYLIST_CREATE_CONFIRM_XPATH)
-        time.sleep(1)
+        selector_registry.send_keys(driver, "mylist_title_input", title)
+        self.selenium.drain_network_log(driver)
+        selector_registry.click(driver, "mylist_create_confirm")
+        self.selenium.wait_for_network_response(driver, MYLIST_CREATE_API_PATTERN, "POST")
         return title
 
+    def _scripted_add_enabled(self) -> bool:
+        """
+        次の追加をスクリプトで行うか。失敗が続いて止めた後も、
+        クリックごとの操作で SCRIPTED_ADD_RETRY_AFTER 回追加するたびに 1 回試し直す。
+        """
+        if os.getenv("REGIST_SCRIPTED_ADD", "1").lower() not in ("1", "true"):
+            return False
+        if self.scripted_add_failures < SCRIPTED_ADD_MAX_FAILURES:
+            return True
+        if self.scripted_add_skipped < SCRIPTED_ADD_RETRY_AFTER:
+            self.scripted_add_skipped += 1
+            return False
+        self.scripted_add_skipped = 0
+        return True
+
+    def _add_video_to_mylist(self, driver, video_id: str) -> None:
+        driver.get(f"{NICO_URL}/watch/{video_id}")
+        self._click_add_to_mylist(driver)
+
+    def _click_add_to_mylist(self, driver) -> None:
+        """
+        メニュー → マイリストに追加 → マイリスト選択を 1 回のスクリプトで実行する。
+        スクリプトが途中で止まった場合は、残りをクリックごとの操作で続ける。
+        """
+        self.selenium.drain_network_log(driver)
+        scripted = self._scripted_add_enabled()
+        clicked = selector_registry.click_sequence(driver, VIDEO_ADD_TARGETS) if scripted else 0
+        for step, target in enumerate(VIDEO_ADD_TARGETS[clicked:], start=clicked):
+            # スクリプトが止まったステップは既に待っているので短く待つ
+            timeout = 2 if scripted and step == clicked else 10
+            selector_registry.click(driver, target, timeout)
+        if scripted:
+            if clicked == len(VIDEO_ADD_TARGETS):
+                if self.scripted_add_failures >= SCRIPTED_ADD_MAX_FAILURES:
+                    print("Scripted add works again, switching back from per-click actions")
+                self.scripted_add_failures = 0
+            else:
+                self.scripted_add_failures += 1
+                if self.scripted_add_failures == SCRIPTED_ADD_MAX_FAILURES:
+                    print("Scripted add keeps failing where clicks succeed, switching to per-click actions")
+        self.selenium.wait_for_network_response(driver, MYLIST_ITEMS_API_PATTERN, "POST")
+
+    @staticmethod
+    def pipeline_tabs() -> int:
+        """
+        視聴ページを並行して読み込むタブ数 (環境変数 REGIST_PIPELINE_TABS、1 なら逐次)。
+        """
+        try:
+            return max(1, int(os.getenv("REGIST_PIPELINE_TABS") or 1))
+        except ValueError:
+            return 1
+
+    @profiler.profiled()
     def add_videos_to_mylist(self, id_list: List[str]) -> List[str]:
         """
         指定した video id リストをマイリストに追加する。
         失敗した id のリストを返す。
+        REGIST_PIPELINE_TABS=K (K >= 2) の場合は、次の視聴ページを裏のタブで読み込みながら処理する。
+        """
+        if self.http_engine:
+            return self._add_videos_with_http(id_list)
+
+        tabs = min(self.pipeline_tabs(), len(id_list))
+        if tabs > 1:
+            return self._add_videos_pipelined(id_list, tabs)
+        return [video_id for video_id in id_list if not self._try_add_video(video_id)]
+
+    def _add_videos_with_http(self, id_list: List[str]) -> List[str]:
+        """
+        HttpEngine で動画を追加する。途中で失敗した場合は、まだ処理していない
+        動画だけを Selenium で追加する (追加済みの動画を二重に追加しない)。
+        """
+        results = {}
+        try:
+            return self.http_engine.add_videos_to_mylist(
+                id_list, on_result=lambda video_id, ok: results.__setitem__(video_id, ok))
+        except Exception as e:
+            self._fallback_to_selenium(e)
+
+        pending_ids = [video_id for video_id in id_list if video_id not in results]
+        print(f"Adding the remaining {len(pending_ids)} videos with Selenium")
+        failed_set = {video_id for video_id, ok in results.items() if not ok}
+        if pending_ids:
+            failed_set.update(self.add_videos_to_mylist(pending_ids))
+        return [video_id for video_id in id_list if video_id in failed_set]
+
+    def _try_add_video(self, video_id: str, navigate: bool = True) -> bool:
+        """
+        動画を 1 件追加する。失敗した場合は False を返す (driver が死んでいる場合は例外を投げる)。
         """
         driver = self.driver
-        failed_id_list: List[str] = []
-        for video_id in id_list:
+        with profiler.section(f"video:{video_id}"):
             try:
-                driver.get(f"{NICO_URL}/watch/{video_id}")
-                self.selenium.wait_and_click(driver, VIDEO_MENU_BUTTON_XPATH)
-                self.selenium.wait_and_click(driver, VIDEO_ADD_TO_MYLIST_XPATH)
-                self.selenium.wait_and_click(driver, VIDEO_MYLIST_SELECT_XPATH)
-                time.sleep(1)
+                if navigate:
+                    self._add_video_to_mylist(driver, video_id)
+                else:
+                    self._wait_for_watch_page(driver, video_id)
+                    self._click_add_to_mylist(driver)
+                self.selenium.report_page_weight(driver, video_id)
+                return True
             except Exception as exeption:
                 # self.selenium.save_screenshot_to_s3(driver)  # 必要なら有効化
                 # driver が死んでいる場合は外側へ例外を投げる
@@ -121,14 +396,69 @@ class RegisterService:
                 except Exception:
                     raise
                 print("Exception:", exeption)
-                failed_id_list.append(video_id)
+                return False
+
+    def _add_videos_pipelined(self, id_list: List[str], tabs: int) -> List[str]:
+        """
+        同じログイン済みブラウザの複数タブで動画を追加する。
+        i 番目の動画はタブ i % tabs で処理し、終わったらそのタブで i + tabs 番目の
+        読み込みを始めるので、ページの読み込みと他のタブでのクリックが重なる。
+        """
+        driver = self.driver
+        main_handle = driver.current_window_handle
+        handles = [main_handle]
+
+        def start_loading(index: int) -> None:
+            driver.switch_to.window(handles[index % tabs])
+            # driver.get() と違い、location への代入はすぐに返る
+            driver.execute_script("window.location.href = arguments[0];", f"{NICO_URL}/watch/{id_list[index]}")
+
+        failed_id_list: List[str] = []
+        try:
+            for _ in range(tabs - 1):
+                driver.switch_to.new_window("tab")
+                # リクエストのブロックはタブごとに設定する
+                self.selenium.apply_network_filters(driver)
+                handles.append(driver.current_window_handle)
+            for index in range(tabs):
+                start_loading(index)
+
+            for index, video_id in enumerate(id_list):
+                driver.switch_to.window(handles[index % tabs])
+                if not self._try_add_video(video_id, navigate=False):
+                    failed_id_list.append(video_id)
+                if index + tabs < len(id_list):
+                    start_loading(index + tabs)
+        finally:
+            for handle in handles[1:]:
+                try:
+                    driver.switch_to.window(handle)
+                    driver.close()
+                except Exception:
+                    pass
+            try:
+                driver.switch_to.window(main_handle)
+            except Exception:
+                pass
         return failed_id_list
 
+    @staticmethod
+    def _wait_for_watch_page(driver, video_id: str, timeout: int = 10) -> None:
+        """
+        現在のタブが前のページを離れ、video_id の視聴ページを読み込むまで待つ。
+        """
+        WebDriverWait(driver, timeout, poll_frequency=0.05, ignored_exceptions=(WebDriverException,)).until(
+            lambda d: d.execute_script(WATCH_PAGE_READY_SCRIPT, video_id),
+            f"Watch page of {video_id} did not load within {timeout}s"
+        )
+
     def save_screenshot(self) -> str | None:
         """
         Takes a screenshot using the current Selenium driver and uploads it to S3.
         Returns the S3 key of the uploaded screenshot, or None if failed.
         """
+        if self.driver is None:
+            return None
         return self.selenium.save_screenshot_to_s3(self.driver)
 
     def regist(self, email: str, password: str, id_list: List[str], max_retries: int = 3) -> List[str]:
@@ -142,7 +472,7 @@ class RegisterService:
             driver = self.driver
             try:
                 # ensure driver exists (constructor creates it, but recreate if cleared)
-                if driver is None:
+                if driver is None and self.http_engine is None:
                     self.driver = self.selenium.create_chrome_driver()
                     self.driver.set_window_size(*self.window_size)
                     driver = self.driver
@@ -159,9 +489,10 @@ class RegisterService:
 
             except Exception as e:
                 # ドライバを破棄して次のループで再作成する
-                if driver:
+                # (ログイン中に HTTP からフォールバックした場合も self.driver を破棄する)
+                if self.driver:
                     try:
-                        driver.quit()
+                        self.driver.quit()
                     except Exception:
                         pass
                     finally:
@@ -0,0 +1,277 @@
+import json
+import os
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+SESSION_COOKIE_NAME = "user_session"
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+def render_fixture(name, **values):
+    """Render an HTML fixture, replacing {{KEY}} placeholders with values"""
+    with open(os.path.join(FIXTURES_DIR, name), encoding="utf-8") as f:
+        html = f.read()
+    for key, value in values.items():
+        html = html.replace("{{" + key + "}}", str(value))
+    return html
+
+
+class FakeNiconicoState:
+    """In-memory account and mylist state shared by the fake server's handlers"""
+
+    def __init__(self, accounts=None, unavailable_ids=None, latency_ms=0):
+        self.accounts = accounts or {"test@example.com": "password"}
+        self.unavailable_ids = set(unavailable_ids or [])
+        # Artificial delay added to every response, to mimic network round trips
+        self.latency_ms = latency_ms
+        self.sessions = {}
+        self.mylists = {}
+        self.next_mylist_id = 1
+        self.next_item_id = 1
+        self.request_count = 0
+        self.lock = threading.Lock()
+
+    def create_session(self, email):
+        session_id = uuid.uuid4().hex
+        self.sessions[session_id] = email
+        return session_id
+
+    def create_mylist(self, name):
+        with self.lock:
+            mylist_id = self.next_mylist_id
+            self.next_mylist_id += 1
+            self.mylists[mylist_id] = {"name": name, "items": [], "item_ids": {}}
+        return mylist_id
+
+    def add_item(self, mylist_id, video_id):
+        """Add a video to a mylist; returns False when it is already there"""
+        with self.lock:
+            mylist = self.mylists[mylist_id]
+            if video_id in mylist["items"]:
+                return False
+            mylist["items"].append(video_id)
+            mylist["item_ids"][video_id] = self.next_item_id
+            self.next_item_id += 1
+            return True
+
+    def mylist_ids(self):
+        # niconico lists the newest mylist first
+        with self.lock:
+            return sorted(self.mylists, reverse=True)
+
+
+class FakeNiconicoHandler(BaseHTTPRequestHandler):
+    """
+    Handler that mimics the account login and nvapi mylist endpoints, and
+    serves HTML fixtures reproducing the DOM targeted by the Selenium selectors
+    (top page, login form, mylist page and watch page), plus getthumbinfo.
+    """
+
+    state: FakeNiconicoState = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, body=None, headers=None):
+        payload = json.dumps(body).encode("utf-8") if body is not None else b""
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _send_html(self, status, html, headers=None):
+        payload = html.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _send_xml(self, status, xml):
+        payload = xml.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "text/xml; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _send_thumbinfo(self, video_id):
+        # Mirrors ext.nicovideo.jp/api/getthumbinfo, used for availability checks
+        if video_id in self.state.unavailable_ids:
+            return self._send_xml(200, '<?xml version="1.0" encoding="UTF-8"?>\n'
+                                       '<nicovideo_thumb_response status="fail">'
+                                       '<error><code>DELETED</code><description>deleted</description></error>'
+                                       '</nicovideo_thumb_response>')
+        return self._send_xml(200, '<?xml version="1.0" encoding="UTF-8"?>\n'
+                                   '<nicovideo_thumb_response status="ok">'
+                                   f'<thumb><video_id>{video_id}</video_id></thumb>'
+                                   '</nicovideo_thumb_response>')
+
+    def _mylist_values(self):
+        mylist_ids = self.state.mylist_ids()
+        first_id = mylist_ids[0] if mylist_ids else 0
+        first_name = self.state.mylists.get(first_id, {}).get("name", "")
+        return {"MYLIST_COUNT": len(mylist_ids), "FIRST_MYLIST_ID": first_id, "FIRST_MYLIST_NAME": first_name}
+
+    def _route_page(self, parts):
+        if not parts:
+            return self._send_html(200, render_fixture("top.html"))
+        if parts == ["login"]:
+            return self._send_html(200, render_fixture("login.html"))
+        if parts == ["my", "mylist"]:
+            if self._session_email() is None:
+                self.send_response(302)
+                self.send_header("Location", "/login")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            return self._send_html(200, render_fixture("mylist.html", **self._mylist_values()))
+        if len(parts) == 2 and parts[0] == "watch":
+            video_id = parts[1]
+            if video_id in self.state.unavailable_ids:
+                return self._send_html(404, render_fixture("not_found.html"))
+            values = self._mylist_values()
+            player = render_fixture("player.html", **values)
+            return self._send_html(200, render_fixture("watch.html", PLAYER=player, VIDEO_ID=video_id, **values))
+        if len(parts) == 3 and parts[:2] == ["api", "getthumbinfo"]:
+            return self._send_thumbinfo(parts[2])
+        return self._send_html(404, render_fixture("not_found.html"))
+
+    def _session_email(self):
+        for part in self.headers.get("Cookie", "").split(";"):
+            name, _, value = part.strip().partition("=")
+            if name == SESSION_COOKIE_NAME:
+                return self.state.sessions.get(value)
+        return None
+
+    def _route(self, method):
+        self.state.request_count += 1
+        if self.state.latency_ms:
+            time.sleep(self.state.latency_ms / 1000)
+        parsed = urlparse(self.path)
+        params = {k: v[0] for k, v in parse_qs(parsed.query).items()}
+        parts = [p for p in parsed.path.split("/") if p]
+
+        if method == "GET" and parts[:1] != ["v1"]:
+            return self._route_page(parts)
+
+        if method == "POST" and parsed.path == "/login/redirector":
+            length = int(self.headers.get("Content-Length", 0))
+            form = {k: v[0] for k, v in parse_qs(self.rfile.read(length).decode("utf-8")).items()}
+            email = form.get("mail_tel")
+            if email in self.state.accounts and self.state.accounts[email] == form.get("password"):
+                session_id = self.state.create_session(email)
+                return self._send_json(200, {"status": "ok"}, {
+                    "Set-Cookie": f"{SESSION_COOKIE_NAME}={session_id}; Path=/"
+                })
+            return self._send_json(200, {"status": "login_failed"})
+
+        if parts[:4] != ["v1", "users", "me", "mylists"]:
+            return self._send_json(404, {"meta": {"status": 404, "errorCode": "NOT_FOUND"}})
+        if self._session_email() is None:
+            return self._send_json(401, {"meta": {"status": 401, "errorCode": "UNAUTHORIZED"}})
+
+        mylists = self.state.mylists
+        if len(parts) == 4:
+            if method == "GET":
+                return self._send_json(200, {"meta": {"status": 200}, "data": {"mylists": [
+                    {"id": mylist_id, "name": mylists[mylist_id]["name"],
+                     "itemsCount": len(mylists[mylist_id]["items"])}
+                    for mylist_id in self.state.mylist_ids()
+                ]}})
+            if method == "POST":
+                mylist_id = self.state.create_mylist(params.get("name", ""))
+                return self._send_json(200, {"meta": {"status": 200}, "data": {"mylistId": mylist_id}})
+
+        mylist_id = int(parts[4]) if len(parts) > 4 and parts[4].isdigit() else None
+        if mylist_id not in mylists:
+            return self._send_json(404, {"meta": {"status": 404, "errorCode": "NOT_FOUND"}})
+
+        if len(parts) == 5 and method == "GET":
+            mylist = mylists[mylist_id]
+            page_size = int(params.get("pageSize", 100))
+            page = int(params.get("page", 1))
+            video_ids = mylist["items"][(page - 1) * page_size:page * page_size]
+            return self._send_json(200, {"meta": {"status": 200}, "data": {"mylist": {
+                "id": mylist_id,
+                "items": [{"itemId": mylist["item_ids"][video_id], "watchId": video_id} for video_id in video_ids],
+                "totalItemCount": len(mylist["items"]),
+                "hasNext": page * page_size < len(mylist["items"]),
+            }}})
+
+        if len(parts) == 6 and parts[5] == "items" and method == "DELETE":
+            item_ids = {int(item_id) for item_id in params.get("itemIds", "").split(",") if item_id}
+            with self.state.lock:
+                mylist = mylists[mylist_id]
+                removed = [video_id for video_id in mylist["items"] if mylist["item_ids"][video_id] in item_ids]
+                for video_id in removed:
+                    mylist["items"].remove(video_id)
+                    del mylist["item_ids"][video_id]
+            return self._send_json(200, {"meta": {"status": 200}})
+
+        if len(parts) == 5 and method == "DELETE":
+            with self.state.lock:
+                mylists.pop(mylist_id, None)
+            return self._send_json(200, {"meta": {"status": 200}})
+
+        if len(parts) == 6 and parts[5] == "items" and method == "POST":
+            video_id = params.get("itemId", "")
+            if video_id in self.state.unavailable_ids:
+                return self._send_json(404, {"meta": {"status": 404, "errorCode": "NOT_FOUND"}})
+            if not self.state.add_item(mylist_id, video_id):
+                return self._send_json(200, {"meta": {"status": 200}})
+            return self._send_json(201, {"meta": {"status": 201}})
+
+        return self._send_json(404, {"meta": {"status": 404, "errorCode": "NOT_FOUND"}})
+
+    def do_GET(self):
+        self._route("GET")
+
+    def do_POST(self):
+        self._route("POST")
+
+    def do_DELETE(self):
+        self._route("DELETE")
+
+
+class FakeNiconicoServer:
+    """
+    Local HTTP server standing in for niconico.
+
+    Usage:
+        with FakeNiconicoServer() as server:
+            engine = HttpEngine(nvapi_url=server.base_url, account_url=server.base_url)
+    """
+
+    def __init__(self, state: FakeNiconicoState = None, handler_class=FakeNiconicoHandler):
+        self.state = state or FakeNiconicoState()
+        handler = type("BoundFakeNiconicoHandler", (handler_class,), {"state": self.state})
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self.thread = threading.Thread(target=self.httpd.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
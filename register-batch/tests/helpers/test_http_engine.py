@@ -0,0 +1,110 @@
+import pytest
+from helpers.http_engine import HttpEngine, NicoApiError
+from services.register_service import RegisterService
+from tests.fakes.fake_niconico_server import FakeNiconicoServer, FakeNiconicoState
+
+
+@pytest.fixture
+def server():
+    with FakeNiconicoServer(FakeNiconicoState(unavailable_ids=["sm404"])) as server:
+        yield server
+
+
+def test_http_engine_registration(server):
+    server.state.create_mylist("old")
+
+    with HttpEngine(nvapi_url=server.base_url, account_url=server.base_url) as engine:
+        engine.login("test@example.com", "password")
+        engine.remove_all_mylist()
+        engine.create_mylist("New List")
+        failed_ids = engine.add_videos_to_mylist(["sm1", "sm404", "sm2"])
+
+    assert failed_ids == ["sm404"]
+    mylists = list(server.state.mylists.values())
+    assert [m["name"] for m in mylists] == ["New List"]
+    assert mylists[0]["items"] == ["sm1", "sm2"]
+
+
+def test_http_engine_login_failure(server):
+    with HttpEngine(nvapi_url=server.base_url, account_url=server.base_url) as engine:
+        with pytest.raises(NicoApiError):
+            engine.login("test@example.com", "wrong")
+
+
+def test_register_service_with_http_engine(server, monkeypatch):
+    monkeypatch.setenv("NVAPI_URL", server.base_url)
+    monkeypatch.setenv("ACCOUNT_URL", server.base_url)
+
+    class NoBrowser:
+        @staticmethod
+        def create_chrome_driver():
+            raise AssertionError("Selenium should not be used")
+
+    with RegisterService(selenium_helper_module=NoBrowser, engine="http") as service:
+        service.login("test@example.com", "password")
+        service.remove_all_mylist()
+        service.create_mylist("Batch")
+        failed_ids = service.add_videos_to_mylist(["sm1", "sm404"])
+
+    assert failed_ids == ["sm404"]
+
+
+def test_register_service_sync_mylist(server, monkeypatch):
+    monkeypatch.setenv("NVAPI_URL", server.base_url)
+    monkeypatch.setenv("ACCOUNT_URL", server.base_url)
+    mylist_id = server.state.create_mylist("Existing")
+    for video_id in ["sm1", "sm2"]:
+        server.state.add_item(mylist_id, video_id)
+
+    with RegisterService(engine="http") as service:
+        service.login("test@example.com", "password")
+        ids_to_add = service.sync_mylist(["sm2", "sm3"])
+        assert ids_to_add == ["sm3"]
+        assert service.add_videos_to_mylist(ids_to_add) == []
+        # 同じリストを再送しても何も変わらない
+        assert service.sync_mylist(["sm2", "sm3"]) == []
+
+    assert list(server.state.mylists) == [mylist_id]
+    assert server.state.mylists[mylist_id]["items"] == ["sm2", "sm3"]
+
+
+def test_register_service_falls_back_to_selenium_mid_batch(monkeypatch):
+    class ExpiringState(FakeNiconicoState):
+        """1 件目を追加した後にセッションが切れる"""
+
+        def add_item(self, mylist_id, video_id):
+            added = super().add_item(mylist_id, video_id)
+            self.sessions.clear()
+            return added
+
+    class FakeBrowser:
+        @staticmethod
+        def create_chrome_driver():
+            return FakeDriver()
+
+    class FakeDriver:
+        def set_window_size(self, width, height):
+            pass
+
+        def quit(self):
+            pass
+
+    with FakeNiconicoServer(ExpiringState()) as server:
+        monkeypatch.setenv("NVAPI_URL", server.base_url)
+        monkeypatch.setenv("ACCOUNT_URL", server.base_url)
+        monkeypatch.setenv("REGIST_PIPELINE_TABS", "1")
+        server.state.create_mylist("Batch")
+        logins, added = [], []
+
+        with RegisterService(selenium_helper_module=FakeBrowser, engine="http") as service:
+            monkeypatch.setattr(service, "_login_with_selenium", lambda email, password: logins.append(email))
+            monkeypatch.setattr(service, "_try_add_video", lambda video_id: added.append(video_id) or True)
+            service.login("test@example.com", "password")
+            failed_ids = service.add_videos_to_mylist(["sm1", "sm2", "sm3"])
+
+    assert failed_ids == []
+    # sm1 は HTTP で追加済みなので、Selenium には残りだけを渡す
+    assert server.state.mylists[1]["items"] == ["sm1"]
+    assert logins == ["test@example.com"]
+    assert added == ["sm2", "sm3"]
+    assert service.http_engine is None
@@ -1,3 +1,5 @@
+import os
+import shutil
 import pytest
 from helpers import selenium_helper
 
@@ -8,3 +10,68 @@ def test_create_chrome_driver():
     assert driver is not None
 
     driver.quit()
+
+
+class CdpDriver:
+    def __init__(self):
+        self.cdp_commands = []
+
+    def execute_cdp_cmd(self, cmd, params):
+        self.cdp_commands.append((cmd, params))
+
+
+def test_apply_network_filters_blocks_through_cdp(monkeypatch):
+    monkeypatch.setenv("CHROME_BLOCKED_URLS", "default, *.woff2*")
+    driver = CdpDriver()
+    selenium_helper.apply_network_filters(driver)
+
+    assert driver.cdp_commands == [
+        ("Network.enable", {}),
+        ("Network.setBlockedURLs", {"urls": selenium_helper.DEFAULT_BLOCKED_URL_PATTERNS + ["*.woff2*"]}),
+    ]
+
+
+class LaunchedChrome(CdpDriver):
+    def __init__(self, options=None, service=None):
+        super().__init__()
+        self.options = options
+        user_data_dir = next(arg.split("=", 1)[1] for arg in options.arguments if arg.startswith("--user-data-dir="))
+        self.seeded = os.path.exists(os.path.join(user_data_dir, "Preferences"))
+        os.makedirs(user_data_dir, exist_ok=True)
+        for name in ("Preferences", "SingletonLock"):
+            with open(os.path.join(user_data_dir, name), "w") as f:
+                f.write("{}")
+
+    def set_page_load_timeout(self, seconds):
+        pass
+
+    def implicitly_wait(self, seconds):
+        pass
+
+
+def test_launch_preset_from_env(monkeypatch):
+    monkeypatch.setenv("CHROME_LAUNCH_PRESET", "debug")
+    assert selenium_helper.launch_preset() == "debug"
+
+    monkeypatch.setenv("CHROME_LAUNCH_PRESET", "turbo")
+    assert selenium_helper.launch_preset() == "safe"
+
+
+def test_fast_preset_merges_disabled_features():
+    arguments = selenium_helper.LAUNCH_PRESETS["fast"]["arguments"]
+    disabled = [argument for argument in arguments if argument.startswith("--disable-features=")]
+
+    assert disabled == ["--disable-features=TranslateUI,MediaRouter,OptimizationHints,Translate"]
+
+
+def test_fast_preset_launches_from_profile_template(monkeypatch, tmp_path):
+    monkeypatch.setattr(selenium_helper.webdriver, "Chrome", LaunchedChrome)
+    monkeypatch.setenv("CHROME_PROFILE_TEMPLATE_DIR", str(tmp_path / "template"))
+
+    first = selenium_helper.create_chrome_driver("fast")
+    second = selenium_helper.create_chrome_driver("fast")
+    for driver in (first, second):
+        shutil.rmtree(driver.user_data_dir, ignore_errors=True)
+
+    assert (first.seeded, second.seeded) == (False, True)
+    assert not (tmp_path / "template" / "SingletonLock").exists()
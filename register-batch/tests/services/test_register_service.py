@@ -14,3 +14,68 @@ def test_regist_success():
         service.create_mylist()
         failed_ids = service.add_videos_to_mylist(id_list)
         print(f"Failed IDs: {failed_ids}")
+
+
+class TabDriver:
+    """location に最後に代入された URL をタブごとに保持する偽の driver"""
+
+    def __init__(self):
+        self.urls = {"tab0": "about:blank"}
+        self.current_window_handle = "tab0"
+        self.closed = []
+        self.title = "watch"
+        self.switch_to = self
+
+    def set_window_size(self, width, height):
+        pass
+
+    def window(self, handle):
+        self.current_window_handle = handle
+
+    def new_window(self, type_hint):
+        self.current_window_handle = f"tab{len(self.urls)}"
+        self.urls[self.current_window_handle] = "about:blank"
+
+    def execute_script(self, script, *args):
+        if script.startswith("window.location.href"):
+            self.urls[self.current_window_handle] = args[0]
+            return None
+        return self.urls[self.current_window_handle].endswith(f"/watch/{args[0]}")
+
+    def close(self):
+        self.closed.append(self.current_window_handle)
+
+
+class FakeSeleniumHelper:
+    def __init__(self):
+        self.driver = TabDriver()
+
+    def create_chrome_driver(self):
+        return self.driver
+
+    def apply_network_filters(self, driver):
+        pass
+
+    def report_page_weight(self, driver, label):
+        pass
+
+
+def test_add_videos_pipelines_pages_across_tabs(monkeypatch):
+    monkeypatch.setenv("REGIST_PIPELINE_TABS", "2")
+    service = RegisterService(selenium_helper_module=FakeSeleniumHelper(), engine="selenium")
+    driver = service.driver
+    clicked = []
+
+    def click_add(driver):
+        url = driver.urls[driver.current_window_handle]
+        if url.endswith("sm3"):
+            raise Exception("menu not found")
+        clicked.append((driver.current_window_handle, url.rsplit("/", 1)[-1]))
+
+    monkeypatch.setattr(service, "_click_add_to_mylist", click_add)
+
+    assert service.add_videos_to_mylist(["sm1", "sm2", "sm3", "sm4"]) == ["sm3"]
+    # 各動画は読み込んでいたタブで処理される
+    assert clicked == [("tab0", "sm1"), ("tab1", "sm2"), ("tab1", "sm4")]
+    assert driver.closed == ["tab1"]
+    assert driver.current_window_handle == "tab0"
@@ -0,0 +1,29 @@
+import pytest
+from tests.fakes.fake_niconico_server import FakeNiconicoServer, FakeNiconicoState
+from utils.availability_util import AvailabilityUtil, LocalFileAvailabilityStore
+
+
+@pytest.fixture
+def server(monkeypatch):
+    with FakeNiconicoServer(FakeNiconicoState(unavailable_ids=["sm404"])) as server:
+        monkeypatch.setenv("AVAILABILITY_CHECK", "1")
+        monkeypatch.setenv("THUMBINFO_URL", f"{server.base_url}/api/getthumbinfo")
+        AvailabilityUtil.set_store(None)
+        AvailabilityUtil.clear_memory()
+        yield server
+        AvailabilityUtil.set_store(None)
+        AvailabilityUtil.clear_memory()
+
+
+def test_find_unavailable_reports_reason(server):
+    assert AvailabilityUtil.find_unavailable(["sm1", "sm404"]) == {"sm404": "DELETED"}
+
+
+def test_persistent_store_avoids_refetch(server, tmp_path):
+    AvailabilityUtil.set_store(LocalFileAvailabilityStore(str(tmp_path / "availability.json")))
+    AvailabilityUtil.find_unavailable(["sm1", "sm404"])
+    requests_after_first = server.state.request_count
+
+    AvailabilityUtil.clear_memory()
+    assert AvailabilityUtil.find_unavailable(["sm1", "sm404"]) == {"sm404": "DELETED"}
+    assert server.state.request_count == requests_after_first
@@ -0,0 +1,14 @@
+from utils.video_id_util import VideoIdUtil
+
+
+def test_normalize_strips_dedupes_and_validates():
+    valid_ids, invalid_ids = VideoIdUtil.normalize(
+        ["", " sm9 ", "sm9", "so123", "https://www.nicovideo.jp/watch/nm456?ref=top", "abc", "sm"]
+    )
+
+    assert valid_ids == ["sm9", "so123", "nm456"]
+    assert invalid_ids == {"abc": "invalid_format", "sm": "invalid_format"}
+
+
+def test_normalize_empty_env_value():
+    assert VideoIdUtil.normalize("".split(",")) == ([], {})
@@ -0,0 +1,8 @@
+import os
+
+from .http_engine import HttpEngine, NicoApiError, diff_mylist
+
+
+def use_http_engine() -> bool:
+    """Return True when REGIST_ENGINE=http selects the HTTP engine (Selenium is the default)"""
+    return os.environ.get("REGIST_ENGINE", "").lower() == HttpEngine.name
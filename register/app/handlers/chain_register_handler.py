@@ -1,20 +1,30 @@
 import json
-import os
-import requests
+import time
 from typing import Dict, Any, List
 from .base_handler import BaseHandler
-from app import regist
+from app.services.batch_budget_service import BatchBudgetService
+from app.services.chain_dispatch_service import ChainDispatchService
+from app.services.checkpoint_service import CheckpointService
+from app.services.failure_service import FailureService
 from app.services.notification_service import NotificationService
+from app.services.video_id_service import VideoIdService
 
 
 class ChainRegisterHandler(BaseHandler):
     """Handler for chain-based video registration operations"""
+
+    # Retries per video from the retry queue, waiting RETRY_BACKOFF_SECONDS * 2 ** attempt before each
+    MAX_RETRY_ATTEMPTS = 2
+    RETRY_BACKOFF_SECONDS = 2.0
     
     @staticmethod
     def handle(email: str, encrypted_password: str, id_list: List[str], 
                subscription_json: str = None, title: str = "", 
                remaining_ids: List[str] = None, failed_ids: List[str] = None,
-               is_first_request: bool = True, is_delete_and_create_request: bool = False) -> Dict[str, Any]:
+               is_first_request: bool = True, is_delete_and_create_request: bool = False,
+               context: Any = None, per_video_ms: float = None,
+               chain_id: str = None, offset: int = None, sync_mode: bool = False,
+               retry_queue: Dict[str, int] = None, failure_reasons: Dict[str, str] = None) -> Dict[str, Any]:
         """
         Handle chain-based video registration requests.
         
@@ -28,6 +38,16 @@ class ChainRegisterHandler(BaseHandler):
             failed_ids: IDs that have failed so far (for chain requests)
             is_first_request: Whether this is the first request in the chain
             is_delete_and_create_request: Whether this request should perform delete and create operations
+            context: Lambda context, used to size the batch from the remaining execution time
+            per_video_ms: Per-video latency estimate carried over from the previous hop
+            chain_id: Identifier of the chain's checkpoints (None when checkpointing is disabled)
+            offset: Cursor into the chain's stored ID list. When set, the credentials,
+                IDs and failures are loaded from the chain's store instead of the payload
+            sync_mode: Keep the existing mylist and only add/remove the difference
+                instead of deleting and recreating it
+            retry_queue: Videos that failed for a retryable reason, mapped to the
+                number of retries so far; drained once every video was tried
+            failure_reasons: Reason of each permanently failed video so far
             
         Returns:
             Lambda response dictionary
@@ -35,77 +55,361 @@ class ChainRegisterHandler(BaseHandler):
         try:
             # Handle first request from Manager - return immediately and chain to delete/create
             if is_first_request:
+                # Invalid IDs fail immediately instead of costing a page load each
+                id_list, invalid_ids = VideoIdService.normalize(id_list)
+                if not id_list:
+                    return ChainRegisterHandler.create_bad_request_response(
+                        "No valid video IDs in 'id_list'", json.dumps(invalid_ids)
+                    )
+
+                if CheckpointService.is_enabled():
+                    # Store the list once; hops then only carry the chain ID and an offset
+                    chain_id = CheckpointService.new_chain_id()
+                    state = {
+                        "email": email,
+                        "password": encrypted_password,
+                        "subscription": subscription_json,
+                        "title": title,
+                        "invalid_ids": invalid_ids,
+                        "sync_mode": sync_mode,
+                        "mylist_ready": False
+                    }
+                    state.update(CheckpointService.save_ids(chain_id, id_list or []))
+                    CheckpointService.save_state(chain_id, state)
+
                 # Chain to delete and create request immediately
-                ChainRegisterHandler._invoke_delete_and_create_chain(
-                    email, encrypted_password, id_list, subscription_json, title
-                )
+                if not ChainRegisterHandler._invoke_delete_and_create_chain(
+                    email, encrypted_password, id_list, subscription_json, title,
+                    chain_id=chain_id, failed_ids=list(invalid_ids), sync_mode=sync_mode,
+                    failure_reasons=invalid_ids
+                ):
+                    return ChainRegisterHandler.create_server_error_response(
+                        "Failed to start the registration process"
+                    )
                 
                 # Return immediately to Manager
                 return ChainRegisterHandler.create_success_response(
                     "Registration process started",
                     {
                         "user_message": "登録処理を開始しました。完了時に通知をお送りします。",
-                        "total_videos": len(id_list) if id_list else 0
+                        "total_videos": len(id_list),
+                        "invalid_ids": invalid_ids,
+                        "chain_id": chain_id
                     }
                 )
             
+            if offset is not None:
+                # Cursor hops are internal and the first hop validated them: boot Chrome while the state loads
+                from app.helpers import driver_pool
+                driver_pool.prewarm_if_enabled()
+            state = CheckpointService.load_state(chain_id)
+            if offset is not None:
+                if not state:
+                    return ChainRegisterHandler.create_error_response(404, f"No state for chain {chain_id}")
+                email = state["email"]
+                encrypted_password = state["password"]
+                subscription_json = state.get("subscription")
+                title = state.get("title", "")
+                remaining_ids = CheckpointService.cursor(chain_id, state, offset)
+                failed_ids = []
+                retry_queue = state.get("retry_queue")
+                failure_reasons = state.get("failure_reasons", state.get("invalid_ids"))
+            retry_queue = dict(retry_queue or {})
+            failure_reasons = dict(failure_reasons or {})
+            
             # Decrypt password only when needed for actual operations
             from app.services.auth_service import AuthService
             password = AuthService.decrypt_password(encrypted_password)
+            # Chrome boots while the mylist is prepared (no-op when the cursor hop already started it)
+            from app.helpers import driver_pool
+            driver_pool.prewarm_if_enabled()
+            # Selenium is only loaded by hops that register (the first hop just hands off)
+            from app import regist
             
             # Handle delete and create request
             if is_delete_and_create_request:
-                # Step 1: Delete and create mylist
-                regist.delete_and_create_mylist(email, password, title)
-                
                 # Initialize tracking variables for video registration
-                remaining_ids = id_list.copy() if id_list else []
-                failed_ids = []
+                if offset is None:
+                    remaining_ids = id_list.copy() if id_list else []
+                    failed_ids = list(failed_ids or [])
+                if state:
+                    sync_mode = state.get("sync_mode", sync_mode)
+                
+                # Step 1: Prepare the mylist (skipped when a redelivered step already did it)
+                if not (state and state.get("mylist_ready")):
+                    if sync_mode:
+                        # Only the videos missing from the existing mylist are registered
+                        remaining_ids = regist.prepare_sync_mylist(email, password, list(remaining_ids), title)
+                        if offset is not None:
+                            # The delta gets pages of its own; the original list stays intact
+                            # until the state write below switches the chain over to the delta
+                            state.update(CheckpointService.save_ids(chain_id, remaining_ids,
+                                                                    state["generation"] + 1))
+                            remaining_ids = CheckpointService.cursor(chain_id, state, 0)
+                    else:
+                        regist.delete_and_create_mylist(email, password, title)
+                    if state:
+                        state["mylist_ready"] = True
+                        # Later hops read the list this state points at, so a failed write fails the step
+                        CheckpointService.save_state(chain_id, state, raise_errors=sync_mode)
             
-            # Process up to 30 videos from remaining_ids
-            BATCH_SIZE = 30
-            current_batch = remaining_ids[:BATCH_SIZE]
-            remaining_ids = remaining_ids[BATCH_SIZE:]
+            failures = {}
+            current_batch, remaining_ids, batch_failed_ids = ChainRegisterHandler._process_batches(
+                email, password, remaining_ids, context, per_video_ms, chain_id, failures
+            )
+            if offset is not None:
+                # The store is the failure accumulator; record failures the
+                # per-video callback did not see (e.g. IDs no worker reached)
+                for video_id in batch_failed_ids:
+                    CheckpointService.record(chain_id, video_id, False)
+
+            # Retryable failures wait in the retry queue; the rest are final
+            retry_ids, permanent = FailureService.split(batch_failed_ids, failures)
+            for video_id in retry_ids:
+                retry_queue.setdefault(video_id, 0)
+            permanent = {video_id: reason for video_id, reason in permanent.items() if video_id not in retry_queue}
+
+            if not remaining_ids and retry_queue:
+                # Every video was tried once: drain the retry queue
+                retried, retry_queue, retry_permanent = ChainRegisterHandler._drain_retry_queue(
+                    email, password, retry_queue, context, chain_id
+                )
+                current_batch = list(current_batch) + retried
+                permanent.update(retry_permanent)
+
+            ChainRegisterHandler._report_failures(permanent)
+            for video_id, reason in permanent.items():
+                failure_reasons.setdefault(video_id, reason)
+                if video_id not in failed_ids:
+                    failed_ids.append(video_id)
             
-            # Register current batch
-            if current_batch:
-                batch_failed_ids = regist.regist(email, password, current_batch)
-                failed_ids.extend(batch_failed_ids)
+            if offset is not None:
+                if not remaining_ids and not retry_queue:
+                    failed_ids = ChainRegisterHandler._collect_failures(chain_id, state)
+                elif permanent or retry_queue != state.get("retry_queue", {}):
+                    state["retry_queue"] = retry_queue
+                    state["failure_reasons"] = failure_reasons
+                    CheckpointService.save_state(chain_id, state)
             
             # Check if more processing needed
-            if remaining_ids:
+            handed_off = True
+            if remaining_ids or retry_queue:
                 # Chain to next request
-                ChainRegisterHandler._invoke_next_chain(
+                handed_off = ChainRegisterHandler._invoke_next_chain(
                     email, encrypted_password, subscription_json, title,
-                    remaining_ids, failed_ids
+                    remaining_ids, failed_ids,
+                    per_video_ms=BatchBudgetService.per_video_ms(),
+                    chain_id=chain_id,
+                    offset=remaining_ids.offset if offset is not None else None,
+                    retry_queue=retry_queue,
+                    failure_reasons=failure_reasons
                 )
             else:
+                CheckpointService.clear(chain_id)
                 # Final request - send notification
                 if subscription_json:
                     try:
-                        NotificationService.send_push_notification(subscription_json, failed_ids)
+                        NotificationService.send_push_notification(
+                            subscription_json, failed_ids,
+                            failure_reasons={video_id: failure_reasons.get(video_id) for video_id in failed_ids}
+                        )
                     except Exception as e:
                         print(f"Failed to send push notification: {e}")
                         # Notification failure doesn't fail the entire process
+
+            if not handed_off:
+                # The chain stops here unless it is resumed (resume_chain with the chain ID)
+                return ChainRegisterHandler.create_server_error_response(
+                    f"Chain step completed but the next step could not be handed off "
+                    f"({len(remaining_ids)} remaining, chain {chain_id})"
+                )
             
             return ChainRegisterHandler.create_success_response(
                 "Chain registration step completed",
                 {
                     "processed_count": len(current_batch),
                     "remaining_count": len(remaining_ids),
+                    "retry_count": len(retry_queue),
                     "failed_count": len(failed_ids),
-                    "is_complete": len(remaining_ids) == 0
+                    "failure_reasons": permanent,
+                    "is_complete": len(remaining_ids) == 0 and not retry_queue,
+                    "per_video_ms": round(BatchBudgetService.per_video_ms())
                 }
             )
             
         except Exception as e:
             return ChainRegisterHandler.create_server_error_response(str(e))
     
+    @staticmethod
+    def resume(chain_id: str, context: Any = None) -> Dict[str, Any]:
+        """
+        Resume a chain whose step died without invoking the next one.
+
+        The video list and credentials come from the chain's saved state, and
+        every video with a checkpointed result is skipped.
+        
+        Args:
+            chain_id: Identifier of the chain to resume
+            context: Lambda context
+            
+        Returns:
+            Lambda response dictionary
+        """
+        # Resumes are internal like cursor hops: boot Chrome while the state loads
+        from app.helpers import driver_pool
+        driver_pool.prewarm_if_enabled()
+        try:
+            state = CheckpointService.load_state(chain_id)
+        except Exception as e:
+            return ChainRegisterHandler.create_server_error_response(str(e))
+        if not state:
+            return ChainRegisterHandler.create_error_response(404, f"No checkpoint for chain {chain_id}")
+        
+        print(f"Resuming chain {chain_id}")
+        return ChainRegisterHandler.handle(
+            None, None, None, is_first_request=False,
+            is_delete_and_create_request=not state.get("mylist_ready"),
+            context=context, chain_id=chain_id, offset=0
+        )
+
+    @staticmethod
+    def _collect_failures(chain_id: str, state: Dict[str, Any]) -> List[str]:
+        """Return every failed ID recorded for a cursor-based chain, in list order"""
+        results = CheckpointService.load_results(chain_id)
+        return list(state.get("invalid_ids", {})) + [
+            video_id for video_id in CheckpointService.cursor(chain_id, state)
+            if results.get(video_id) is False
+        ]
+
+    @staticmethod
+    def _report_failures(permanent: Dict[str, str]) -> None:
+        """Log permanent failures as soon as they are known"""
+        for video_id, reason in permanent.items():
+            print(f"Giving up on {video_id}: {reason}")
+
+    @staticmethod
+    def _drain_retry_queue(email: str, password: str, retry_queue: Dict[str, int],
+                           context: Any = None, chain_id: str = None):
+        """
+        Retry the queued videos with exponential backoff while the time budget allows.
+
+        Videos failing again for a retryable reason are requeued until they
+        have been retried MAX_RETRY_ATTEMPTS times. Without a usable Lambda
+        context a single pass is made per invocation.
+
+        Returns:
+            Tuple of (retried IDs, queue left for the next hop,
+            mapping of permanently failed ID to reason)
+        """
+        retry_queue = dict(retry_queue)
+        retried = []
+        permanent = {}
+        from app import regist
+        workers = regist.resolve_worker_count()
+        while retry_queue:
+            delay = ChainRegisterHandler.RETRY_BACKOFF_SECONDS * (2 ** min(retry_queue.values()))
+            remaining_ms = BatchBudgetService.remaining_time_ms(context)
+            if retried and (remaining_ms is None or BatchBudgetService.next_batch_size(
+                    remaining_ms - delay * 1000, len(retry_queue), workers) == 0):
+                break
+            print(f"Retrying {len(retry_queue)} videos in {delay:.1f}s...")
+            time.sleep(delay)
+
+            failures = {}
+            processed, left, failed_ids = ChainRegisterHandler._process_batches(
+                email, password, list(retry_queue), context, None, chain_id, failures, retrying=True
+            )
+            retryable, failed_permanently = FailureService.split(failed_ids, failures)
+            for video_id in processed:
+                attempts = retry_queue.pop(video_id) + 1
+                if video_id in retryable and attempts < ChainRegisterHandler.MAX_RETRY_ATTEMPTS:
+                    retry_queue[video_id] = attempts
+                elif video_id in retryable:
+                    permanent[video_id] = failures[video_id]
+                elif video_id in failed_permanently:
+                    permanent[video_id] = failed_permanently[video_id]
+            retried.extend(processed)
+            if left:
+                break
+        return retried, retry_queue, permanent
+
+    @staticmethod
+    def _process_batches(email: str, password: str, remaining_ids: List[str],
+                         context: Any = None, per_video_ms: float = None,
+                         chain_id: str = None, failures: Dict[str, str] = None,
+                         retrying: bool = False):
+        """
+        Register as many videos as fit into this invocation.
+        Videos that already have a checkpointed result are skipped (their
+        recorded failures are returned as failures again), except when
+        retrying. The reason of each new failure is stored in failures.
+
+        Without a usable Lambda context a fixed batch of 30 videos per worker is
+        processed. Otherwise videos are pulled in sub-batches sized from the
+        remaining time (minus a safety margin) and a running per-video latency
+        estimate, until the budget is used up.
+        
+        Returns:
+            Tuple of (processed IDs, IDs left for the next hop, failed IDs)
+        """
+        from app import regist
+        BATCH_SIZE = 30
+        workers = regist.resolve_worker_count()
+        BatchBudgetService.seed(per_video_ms)
+
+        # Checkpoint every video as it finishes, so a crash only loses the one in flight
+        kwargs = {"failures": {} if failures is None else failures}
+        done = {}
+        if chain_id and CheckpointService.is_enabled():
+            kwargs["on_result"] = lambda video_id, ok: CheckpointService.record(chain_id, video_id, ok)
+            if not retrying:
+                done = CheckpointService.load_results(chain_id)
+
+        def run(batch):
+            pending = [video_id for video_id in batch if video_id not in done]
+            failed = [video_id for video_id in batch if done.get(video_id) is False]
+            if pending:
+                failed.extend(regist.regist(email, password, pending, **kwargs))
+            return pending, failed
+
+        remaining_ms = BatchBudgetService.remaining_time_ms(context)
+        if remaining_ms is None:
+            current_batch = remaining_ids[:BATCH_SIZE * workers]
+            _, failed_ids = run(current_batch)
+            return current_batch, remaining_ids[BATCH_SIZE * workers:], failed_ids
+
+        processed = []
+        failed_ids = []
+        while remaining_ids:
+            batch_size = BatchBudgetService.next_batch_size(
+                BatchBudgetService.remaining_time_ms(context), len(remaining_ids), workers
+            )
+            if batch_size == 0:
+                if processed:
+                    break
+                # Always make progress, otherwise the chain would loop forever
+                batch_size = 1
+            # Cap sub-batches so the estimate is refreshed regularly
+            batch_size = min(batch_size, BATCH_SIZE * workers)
+
+            batch = remaining_ids[:batch_size]
+            remaining_ids = remaining_ids[batch_size:]
+            start = time.monotonic()
+            pending, failed = run(batch)
+            failed_ids.extend(failed)
+            if pending:
+                BatchBudgetService.record(len(pending), (time.monotonic() - start) * 1000)
+            processed.extend(batch)
+
+        return processed, remaining_ids, failed_ids
+
     @staticmethod
     def _invoke_delete_and_create_chain(email: str, encrypted_password: str, id_list: List[str],
-                                       subscription_json: str, title: str) -> None:
+                                       subscription_json: str, title: str, chain_id: str = None,
+                                       failed_ids: List[str] = None, sync_mode: bool = False,
+                                       failure_reasons: Dict[str, str] = None) -> bool:
         """
-        Invoke the delete and create chain request (fire-and-forget).
+        Invoke the delete and create chain request (asynchronous hand-off).
         
         Args:
             email: User email
@@ -113,46 +417,58 @@ class ChainRegisterHandler(BaseHandler):
             id_list: List of video IDs to register
             subscription_json: Push notification subscription data
             title: Title for the mylist
+            chain_id: Identifier of the chain's checkpoints; when set, only the
+                chain ID and offset 0 are sent
+            failed_ids: IDs already failed before registration (rejected by pre-flight checks)
+            sync_mode: Whether to sync the existing mylist instead of recreating it
+            failure_reasons: Reasons of the IDs in failed_ids
+
+        Returns:
+            True when the request was handed off
         """
-        try:
-            # Get Lambda endpoint from environment
-            lambda_endpoint = os.environ.get("REGISTER_LAMBDA_ENDPOINT")
-            
-            if not lambda_endpoint:
-                print("Missing REGISTER_LAMBDA_ENDPOINT, cannot chain request")
-                return
-            
-            # Invoke delete and create request
+        if chain_id:
+            # The chain's state and ID list are in the checkpoint store
             payload = {
                 "action": "chain_register",
-                "email": email,
-                "password": encrypted_password,
-                "id_list": id_list,
-                "subscription": subscription_json,
-                "title": title,
+                "chain_id": chain_id,
+                "offset": 0,
                 "is_first_request": False,
                 "is_delete_and_create_request": True
             }
-            
-            # Fire-and-forget invocation with timeout
-            requests.post(
-                lambda_endpoint,
-                json=payload,
-                headers={"Content-Type": "application/json"},
-                timeout=60
-            )
-            
-            print(f"Invoked delete and create chain request with {len(id_list)} videos")
-                
-        except Exception as e:
-            print(f"Failed to invoke delete and create chain request: {e}")
-            # Don't raise exception - this shouldn't fail the current processing
+            if not ChainDispatchService.dispatch(payload):
+                return False
+            print(f"Invoked delete and create chain request for chain {chain_id}")
+            return True
+        
+        # Invoke delete and create request
+        payload = {
+            "action": "chain_register",
+            "email": email,
+            "password": encrypted_password,
+            "id_list": id_list,
+            "subscription": subscription_json,
+            "title": title,
+            "failed_ids": failed_ids or [],
+            "failure_reasons": failure_reasons or {},
+            "sync_mode": sync_mode,
+            "is_first_request": False,
+            "is_delete_and_create_request": True,
+            "chain_id": chain_id
+        }
+        
+        # Hand off asynchronously; the caller reports a failed hand-off
+        if not ChainDispatchService.dispatch(payload):
+            return False
+        print(f"Invoked delete and create chain request with {len(id_list)} videos")
+        return True
 
     @staticmethod
     def _invoke_next_chain(email: str, encrypted_password: str, subscription_json: str,
-                          title: str, remaining_ids: List[str], failed_ids: List[str]) -> None:
+                          title: str, remaining_ids: List[str], failed_ids: List[str],
+                          per_video_ms: float = None, chain_id: str = None, offset: int = None,
+                          retry_queue: Dict[str, int] = None, failure_reasons: Dict[str, str] = None) -> bool:
         """
-        Invoke the next chain request to continue processing (fire-and-forget).
+        Invoke the next chain request to continue processing (asynchronous hand-off).
         
         Args:
             email: User email
@@ -161,37 +477,47 @@ class ChainRegisterHandler(BaseHandler):
             title: Title for the mylist
             remaining_ids: IDs still to be processed
             failed_ids: IDs that have failed so far
+            per_video_ms: Per-video latency estimate for sizing the next batch
+            chain_id: Identifier of the chain's checkpoints
+            offset: Cursor into the chain's stored ID list; when set, only the
+                chain ID and the offset are sent (the retry queue is in the chain's state)
+            retry_queue: Videos waiting to be retried, mapped to their retry count
+            failure_reasons: Reasons of the IDs in failed_ids
+
+        Returns:
+            True when the request was handed off
         """
-        try:
-            # Get Lambda endpoint from environment
-            lambda_endpoint = os.environ.get("REGISTER_LAMBDA_ENDPOINT")
-            
-            if not lambda_endpoint:
-                print("Missing REGISTER_LAMBDA_ENDPOINT, cannot chain request")
-                return
-            
-            # Use the original encrypted password (no need to re-encrypt)
+        if offset is not None:
             payload = {
                 "action": "chain_register",
-                "email": email,
-                "password": encrypted_password,
-                "subscription": subscription_json,
-                "title": title,
-                "remaining_ids": remaining_ids,
-                "failed_ids": failed_ids,
-                "is_first_request": False
+                "chain_id": chain_id,
+                "offset": offset,
+                "is_first_request": False,
+                "per_video_ms": per_video_ms
             }
-            
-            # Fire-and-forget invocation with timeout
-            requests.post(
-                lambda_endpoint,
-                json=payload,
-                headers={"Content-Type": "application/json"},
-                timeout=60
-            )
-            
-            print(f"Invoked next chain request with {len(remaining_ids)} remaining IDs")
-                
-        except Exception as e:
-            print(f"Failed to invoke next chain request: {e}")
-            # Don't raise exception - this shouldn't fail the current processing
+            if not ChainDispatchService.dispatch(payload):
+                return False
+            print(f"Invoked next chain request at offset {offset} ({len(remaining_ids)} remaining IDs)")
+            return True
+        
+        # Use the original encrypted password (no need to re-encrypt)
+        payload = {
+            "action": "chain_register",
+            "email": email,
+            "password": encrypted_password,
+            "subscription": subscription_json,
+            "title": title,
+            "remaining_ids": remaining_ids,
+            "failed_ids": failed_ids,
+            "retry_queue": retry_queue or {},
+            "failure_reasons": failure_reasons or {},
+            "is_first_request": False,
+            "per_video_ms": per_video_ms,
+            "chain_id": chain_id
+        }
+        
+        # Hand off asynchronously; the caller reports a failed hand-off
+        if not ChainDispatchService.dispatch(payload):
+            return False
+        print(f"Invoked next chain request with {len(remaining_ids)} remaining IDs")
+        return True
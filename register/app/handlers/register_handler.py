@@ -1,17 +1,25 @@
+import time
 from typing import Dict, Any, List
 from .base_handler import BaseHandler
 from app import regist
-from app.services.file_tracking_service import FileTrackingService
+from app.services.completion_tracker_service import CompletionTrackerService
+from app.services.failure_service import FailureService
 from app.services.notification_service import NotificationService
+from app.services.video_id_service import VideoIdService
 
 
 class RegisterHandler(BaseHandler):
     """Handler for video registration operations"""
+
+    # Retries of the videos that failed for a retryable reason, waiting
+    # RETRY_BACKOFF_SECONDS * 2 ** attempt before each
+    MAX_RETRY_ATTEMPTS = 2
+    RETRY_BACKOFF_SECONDS = 2.0
     
     @staticmethod
     def handle(email: str, password: str, id_list: List[str], 
                subscription_json: str = None, uuid: str = "", 
-               chunk_index: str = "") -> Dict[str, Any]:
+               chunk_index: str = "", chunk_count: int = None) -> Dict[str, Any]:
         """
         Handle video registration requests.
         
@@ -22,33 +30,74 @@ class RegisterHandler(BaseHandler):
             subscription_json: Push notification subscription data
             uuid: Unique identifier for batch processing
             chunk_index: Index of current chunk
+            chunk_count: Total number of chunks in the batch, when the caller knows it
             
         Returns:
             Lambda response dictionary
         """
         try:
-            # Create tracking file to indicate processing is in progress
-            tmp_file_path = FileTrackingService.create_tracking_file(uuid, chunk_index)
+            # Count this chunk in as processing
+            CompletionTrackerService.start(uuid, chunk_count)
             
-            # Register videos to mylist
-            failed_id_list = regist.regist(email, password, id_list)
+            # Invalid IDs fail immediately instead of costing a page load each
+            valid_ids, invalid_ids = VideoIdService.normalize(id_list)
             
-            # Remove tracking file when processing is complete
-            FileTrackingService.remove_tracking_file(tmp_file_path)
+            # Register videos to mylist
+            regist_error = None
+            try:
+                failed_id_list = list(invalid_ids)
+                if valid_ids:
+                    failed_id_list.extend(RegisterHandler._regist_with_retries(email, password, valid_ids))
+            except Exception as e:
+                # Count the chunk out anyway (all failed) so the batch still completes
+                regist_error = e
+                failed_id_list = list(invalid_ids) + valid_ids
             
-            # Check if all chunks are complete and send notification if needed
-            if FileTrackingService.is_all_chunks_complete(uuid):
+            # Only the last chunk to finish gets the failures of the whole batch
+            batch_failed_ids = CompletionTrackerService.finish(uuid, failed_id_list, chunk_count)
+            if batch_failed_ids is not None:
                 if subscription_json:
                     try:
-                        NotificationService.send_push_notification(subscription_json, failed_id_list)
+                        NotificationService.send_push_notification(subscription_json, batch_failed_ids)
                     except Exception as e:
                         print(f"Failed to send push notification: {e}")
                         # Notification failure doesn't fail the entire process
             
+            if regist_error:
+                raise regist_error
+            
             return RegisterHandler.create_success_response(
                 "Registration completed",
-                {"failed_id_list": failed_id_list}
+                {"failed_id_list": failed_id_list, "invalid_ids": invalid_ids}
             )
             
         except Exception as e:
-            return RegisterHandler.create_server_error_response(str(e))
\ No newline at end of file
+            return RegisterHandler.create_server_error_response(str(e))
+
+    @staticmethod
+    def _regist_with_retries(email: str, password: str, id_list: List[str]) -> List[str]:
+        """
+        Register videos, then retry the ones that failed for a retryable reason
+        (timeouts, a signed-out driver, rate limits) up to MAX_RETRY_ATTEMPTS times.
+
+        Returns:
+            List of video IDs that still failed
+        """
+        failures = {}
+        failed_ids = regist.regist(email, password, id_list, failures=failures)
+        for attempt in range(RegisterHandler.MAX_RETRY_ATTEMPTS):
+            retry_ids, _ = FailureService.split(failed_ids, failures)
+            if not retry_ids:
+                break
+            delay = RegisterHandler.RETRY_BACKOFF_SECONDS * (2 ** attempt)
+            print(f"Retrying {len(retry_ids)} videos in {delay:.0f}s "
+                  f"(attempt {attempt + 1}/{RegisterHandler.MAX_RETRY_ATTEMPTS})")
+            time.sleep(delay)
+            retry_failures = {}
+            still_failed = set(regist.regist(email, password, retry_ids, failures=retry_failures))
+            for video_id in retry_ids:
+                failures.pop(video_id, None)
+            failures.update(retry_failures)
+            failed_ids = [video_id for video_id in failed_ids
+                          if video_id not in retry_ids or video_id in still_failed]
+        return failed_ids
@@ -0,0 +1,70 @@
+import time
+from typing import Dict, Any
+from .base_handler import BaseHandler
+
+
+class WarmupHandler(BaseHandler):
+    """Handler for warming a container up before a large registration"""
+
+    @staticmethod
+    def handle(email: str, encrypted_password: str, context: Any = None) -> Dict[str, Any]:
+        """
+        Decrypt the credentials, then launch a pooled driver, log in and cache the session.
+
+        The driver is handed back to the pool, so the next hop in this container
+        gets a live browser that already holds the account's session. Chrome is
+        only started once the password decrypted, like for the register actions.
+
+        Nothing in this repo sends the warmup action yet: a client sends it (with
+        the same email and encrypted password as the registration) right before a
+        large chain_register, or a scheduled rule sends it to keep a container warm.
+        See test.rest for the request.
+
+        Args:
+            email: User email
+            encrypted_password: Encrypted password for the account
+            context: Lambda context (optional)
+
+        Returns:
+            Lambda response dictionary with the milliseconds spent per stage
+        """
+        from app.services.auth_service import AuthService
+
+        stages = {}
+        start = time.perf_counter()
+        try:
+            password = AuthService.decrypt_password(encrypted_password)
+        except Exception as e:
+            return WarmupHandler.create_bad_request_response("Failed to decrypt password", str(e))
+        stages["decrypt"] = (time.perf_counter() - start) * 1000
+
+        from app import regist
+        from app.helpers import driver_pool
+        from app.services.session_cache_service import SessionCacheService
+
+        stage = "driver"
+        driver = None
+        healthy = False
+        reused = driver_pool.idle_count() > 0
+        try:
+            start = time.perf_counter()
+            driver = driver_pool.acquire(SessionCacheService.account_key(email, password))
+            stages[stage] = (time.perf_counter() - start) * 1000
+
+            stage = "login"
+            start = time.perf_counter()
+            regist.login(driver, email, password)
+            stages[stage] = (time.perf_counter() - start) * 1000
+            healthy = True
+        except Exception as e:
+            print(f"Warmup failed during {stage}: {e}")
+            return WarmupHandler.create_server_error_response(f"Warmup failed during {stage}: {e}")
+        finally:
+            if driver is not None:
+                driver_pool.release(driver, healthy)
+
+        return WarmupHandler.create_success_response("Container is warm", {
+            "stages_ms": {name: round(ms, 1) for name, ms in stages.items()},
+            "driver_reused": reused,
+            "remaining_time_ms": context.get_remaining_time_in_millis() if context else None
+        })
@@ -0,0 +1,187 @@
+import os
+import threading
+from typing import List, Optional
+
+# 各ドライバを使い回す最大回数。超えたら破棄して作り直す
+DEFAULT_MAX_USES = 20
+# 待機状態で保持しておくドライバの最大数
+DEFAULT_POOL_SIZE = 3
+WINDOW_SIZE = (1366, 768)
+
+
+class _PooledDriver:
+    def __init__(self, driver):
+        self.driver = driver
+        self.uses = 0
+        self.account: Optional[str] = None
+
+
+# Module-level state survives between invocations in a warm Lambda container
+_idle: List[_PooledDriver] = []
+_in_use = {}
+_lock = threading.Lock()
+# Background launch started by prewarm_async(), joined by the next acquire()
+_prewarm_thread: Optional[threading.Thread] = None
+
+
+def _max_uses() -> int:
+    return int(os.environ.get("DRIVER_POOL_MAX_USES", DEFAULT_MAX_USES))
+
+
+def _pool_size() -> int:
+    return int(os.environ.get("DRIVER_POOL_SIZE", DEFAULT_POOL_SIZE))
+
+
+def _launch():
+    # Imported here so a prewarm loads selenium in its own thread, not in the handler's
+    from app.helpers import selenium_helper
+
+    driver = selenium_helper.create_chrome_driver()
+    driver.set_window_size(*WINDOW_SIZE)
+    return driver
+
+
+def _prewarm() -> None:
+    try:
+        driver = _launch()
+    except Exception as e:
+        print(f"Failed to prewarm a driver: {e}")
+        return
+    with _lock:
+        _idle.append(_PooledDriver(driver))
+
+
+def prewarm_async() -> Optional[threading.Thread]:
+    """
+    Start launching a driver in the background so Chrome boot overlaps other work.
+
+    Does nothing when a driver is already idle or being prewarmed. The
+    driver joins the idle pool; acquire() waits for a launch in progress
+    instead of starting a second Chrome.
+
+    Returns:
+        The launching thread, or None if nothing was started
+    """
+    global _prewarm_thread
+    with _lock:
+        if _idle or (_prewarm_thread is not None and _prewarm_thread.is_alive()):
+            return None
+        _prewarm_thread = threading.Thread(target=_prewarm, name="driver-prewarm", daemon=True)
+        _prewarm_thread.start()
+        return _prewarm_thread
+
+
+def prewarm_if_enabled() -> None:
+    """
+    Prewarm for a request that has passed validation and will use the browser.
+
+    Skipped with DRIVER_PREWARM=0 and with the HTTP engine, which only falls
+    back to Chrome.
+    """
+    if os.environ.get("DRIVER_PREWARM", "1").lower() not in ("1", "true"):
+        return
+    from app import engines
+    if engines.use_http_engine():
+        return
+    prewarm_async()
+
+
+def _wait_for_prewarm() -> None:
+    thread = _prewarm_thread
+    if thread is not None and thread is not threading.current_thread():
+        thread.join()
+
+
+def _take_idle(account: Optional[str]) -> Optional[_PooledDriver]:
+    with _lock:
+        if not _idle:
+            return None
+        # Prefer a driver that already holds the session of these credentials
+        for index, entry in enumerate(_idle):
+            if entry.account == account:
+                return _idle.pop(index)
+        return _idle.pop()
+
+
+def acquire(account: Optional[str] = None):
+    """
+    Get a healthy driver from the pool, creating one if none is idle.
+
+    Idle drivers are validated with a liveness probe; dead ones are discarded.
+    A driver last used with other credentials has its cookies and tabs reset,
+    so its session only goes to a request that knows the same password.
+
+    Args:
+        account: Credentials key (SessionCacheService.account_key) the driver will be used for
+
+    Returns:
+        WebDriver instance; hand it back with release()
+    """
+    from app.helpers import selenium_helper
+
+    _wait_for_prewarm()
+    while True:
+        entry = _take_idle(account)
+        if entry is None:
+            entry = _PooledDriver(_launch())
+            break
+
+        if not selenium_helper.is_driver_alive(entry.driver):
+            selenium_helper.quit_driver(entry.driver)
+            continue
+
+        # A prewarmed driver has never been handed out, so it holds no session yet
+        if entry.uses and entry.account != account:
+            try:
+                selenium_helper.reset_driver_state(entry.driver)
+            except Exception as e:
+                print(f"Failed to reset pooled driver ({e}), discarding it")
+                selenium_helper.quit_driver(entry.driver)
+                continue
+        break
+
+    entry.account = account
+    with _lock:
+        _in_use[id(entry.driver)] = entry
+    return entry.driver
+
+
+def release(driver, healthy: bool = True) -> None:
+    """
+    Return a driver to the pool.
+
+    The driver is quit instead when it is unhealthy, has reached its use
+    limit, or the pool already holds enough idle drivers.
+
+    Args:
+        driver: Driver obtained from acquire()
+        healthy: False if the driver failed and must not be reused
+    """
+    from app.helpers import selenium_helper
+
+    with _lock:
+        entry = _in_use.pop(id(driver), None)
+        if entry is not None:
+            entry.uses += 1
+            if healthy and entry.uses < _max_uses() and len(_idle) < _pool_size():
+                _idle.append(entry)
+                return
+    selenium_helper.quit_driver(driver)
+
+
+def close_all() -> None:
+    """Quit every idle driver held by the pool"""
+    from app.helpers import selenium_helper
+
+    _wait_for_prewarm()
+    with _lock:
+        entries = list(_idle)
+        _idle.clear()
+    for entry in entries:
+        selenium_helper.quit_driver(entry.driver)
+
+
+def idle_count() -> int:
+    """Return the number of idle drivers in the pool"""
+    with _lock:
+        return len(_idle)
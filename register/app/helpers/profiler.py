@@ -0,0 +1,188 @@
+import functools
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+
+# セクション自身の経過時間を記録するときのコマンド名
+SECTION_COMMAND = "(section)"
+
+_local = threading.local()
+_lock = threading.Lock()
+_records = defaultdict(lambda: {"count": 0, "total": 0.0, "max": 0.0})
+_pages = []
+
+
+def is_enabled() -> bool:
+    """Profiling is opt-in through SELENIUM_PROFILE=1"""
+    return os.environ.get("SELENIUM_PROFILE", "").lower() in ("1", "true")
+
+
+def _stack() -> list:
+    if not hasattr(_local, "stack"):
+        _local.stack = []
+    return _local.stack
+
+
+def current_section() -> str:
+    """Return the current section path, e.g. "regist > video:sm9 > wait_and_click" """
+    return " > ".join(_stack()) or "(top)"
+
+
+def record(section: str, command: str, seconds: float) -> None:
+    with _lock:
+        entry = _records[(section, command)]
+        entry["count"] += 1
+        entry["total"] += seconds
+        entry["max"] = max(entry["max"], seconds)
+
+
+def record_page(label: str, requests: int, transfer_bytes: int) -> None:
+    """Record the weight of a loaded page (e.g. one watch page per video)"""
+    with _lock:
+        _pages.append({"label": label, "requests": requests, "transfer_bytes": transfer_bytes})
+
+
+@contextmanager
+def section(name: str):
+    """
+    Attribute every WebDriver command issued inside the block to name.
+    Sections nest, and the section's own wall time is recorded too.
+    """
+    if not is_enabled():
+        yield
+        return
+
+    stack = _stack()
+    stack.append(name)
+    path = current_section()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(path, SECTION_COMMAND, time.perf_counter() - start)
+        stack.pop()
+
+
+def profiled(name: str = None):
+    """Decorator that runs the function inside a profiling section"""
+    def decorator(func):
+        section_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not is_enabled():
+                return func(*args, **kwargs)
+            with section(section_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def instrument(driver):
+    """
+    Wrap driver.execute so every WebDriver command (including element
+    commands, which go through the parent driver) is counted and timed.
+    Does nothing unless profiling is enabled.
+    """
+    if not is_enabled() or getattr(driver, "_profiled", False):
+        return driver
+
+    original_execute = driver.execute
+
+    def timed_execute(driver_command, params=None):
+        start = time.perf_counter()
+        try:
+            return original_execute(driver_command, params)
+        finally:
+            record(current_section(), driver_command, time.perf_counter() - start)
+
+    driver.execute = timed_execute
+    driver._profiled = True
+    return driver
+
+
+def build_report() -> dict:
+    """Return the collected statistics sorted by total time"""
+    with _lock:
+        rows = [
+            {
+                "section": section_path,
+                "command": command,
+                "count": entry["count"],
+                "total_ms": round(entry["total"] * 1000, 2),
+                "avg_ms": round(entry["total"] * 1000 / entry["count"], 2),
+                "max_ms": round(entry["max"] * 1000, 2),
+            }
+            for (section_path, command), entry in _records.items()
+        ]
+        pages = list(_pages)
+    rows.sort(key=lambda row: row["total_ms"], reverse=True)
+    commands = [row for row in rows if row["command"] != SECTION_COMMAND]
+    transfer_bytes = sum(page["transfer_bytes"] for page in pages)
+    return {
+        "command_count": sum(row["count"] for row in commands),
+        "command_total_ms": round(sum(row["total_ms"] for row in commands), 2),
+        "rows": rows,
+        "pages": {
+            "count": len(pages),
+            "requests": sum(page["requests"] for page in pages),
+            "transfer_bytes": transfer_bytes,
+            "avg_transfer_bytes": round(transfer_bytes / len(pages)) if pages else 0,
+            "items": pages,
+        },
+    }
+
+
+def format_table(report: dict, limit: int = 30) -> str:
+    lines = [f"{'total ms':>10} {'count':>6} {'avg ms':>8} {'max ms':>8}  command  [section]"]
+    for row in report["rows"][:limit]:
+        lines.append(
+            f"{row['total_ms']:>10.1f} {row['count']:>6} {row['avg_ms']:>8.1f} {row['max_ms']:>8.1f}  "
+            f"{row['command']}  [{row['section']}]"
+        )
+    lines.append(f"{report['command_count']} WebDriver commands, {report['command_total_ms']:.1f} ms")
+    pages = report.get("pages")
+    if pages and pages["count"]:
+        lines.append(f"{pages['count']} pages, {pages['requests']} requests, "
+                     f"{pages['transfer_bytes'] / 1024:.1f} KB transferred "
+                     f"({pages['avg_transfer_bytes'] / 1024:.1f} KB per page)")
+    return "\n".join(lines)
+
+
+def reset() -> None:
+    with _lock:
+        _records.clear()
+        _pages.clear()
+
+
+def report(label: str) -> str | None:
+    """
+    Print the summary table, write the JSON report and reset the statistics.
+
+    The report is written to SELENIUM_PROFILE_DIR (default /tmp).
+
+    Returns:
+        Path of the JSON report, or None when profiling is disabled
+    """
+    if not is_enabled():
+        return None
+
+    data = build_report()
+    data["label"] = label
+    reset()
+
+    print(f"WebDriver profile ({label}):\n{format_table(data)}")
+
+    directory = os.environ.get("SELENIUM_PROFILE_DIR", "/tmp")
+    path = os.path.join(directory, f"selenium_profile_{label}_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}.json")
+    try:
+        with open(path, "w") as f:
+            json.dump(data, f, indent=2)
+    except OSError as e:
+        print(f"Failed to write profile report: {e}")
+        return None
+    return path
@@ -0,0 +1,261 @@
+import threading
+import time
+from collections import defaultdict
+
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.remote.webdriver import WebDriver
+from selenium.webdriver.remote.webelement import WebElement
+
+from app.helpers import profiler, selenium_helper
+
+CSS = "css selector"
+XPATH = "xpath"
+
+# Candidates per UI target in declared preference: the known-good selector first
+# (ID lookups written as CSS, which match the same element as the original
+# //*[@id=...] XPath), then fallbacks that keep the original structure inside the
+# page, menu or dialog container and only relax the outer layout. find() always
+# tries them in this order, so a fallback is only used once the known-good one fails
+SELECTORS = {
+    "login_button": [
+        (XPATH, '//*[@id="CommonHeader"]/div/div/div/div[2]/a'),
+        (XPATH, '//*[@id="CommonHeader"]//a[normalize-space()="ログイン"]'),
+    ],
+    "mail_input": [
+        (CSS, "#input__mailtel"),
+        (CSS, 'form input[name="mail_tel"]'),
+    ],
+    "password_input": [
+        (CSS, "#input__password"),
+        (CSS, 'form input[type="password"]'),
+    ],
+    "login_submit": [
+        (CSS, "#login__submit"),
+        (XPATH, '//form//button[@type="submit" and normalize-space()="ログイン"]'),
+    ],
+    "mylist_count": [
+        (XPATH, '//*[@id="UserPage-app"]/section/section/main/div/div/div[1]/div[2]/div/div/div/ul[1]/div/header/div/span/span[1]'),
+        (XPATH, '//*[@id="UserPage-app"]//main//ul[1]/div/header/div/span/span[1]'),
+    ],
+    "mylist_first": [
+        (XPATH, '//*[@id="UserPage-app"]/section/section/main/div/section/div/div[3]/div[1]/div/a'),
+        (XPATH, '//*[@id="UserPage-app"]//main//section/div/div[3]/div[1]/div/a'),
+    ],
+    "mylist_menu": [
+        (XPATH, '//*[@id="UserPage-app"]/section/section/main/div/section/div/header/div/div[2]/button'),
+        (XPATH, '//*[@id="UserPage-app"]//main//section/div/header/div/div[2]/button'),
+    ],
+    "mylist_delete": [
+        (XPATH, '//*[@id="UserPage-app"]/section/section/main/div/section/div/header/div/div[2]/div/button[3]'),
+        (XPATH, '//*[@id="UserPage-app"]//main//section/div/header/div/div[2]/div/button[normalize-space()="削除"]'),
+    ],
+    "mylist_create_button": [
+        (XPATH, '//*[@id="UserPage-app"]/section/section/main/div/div/div[1]/div[2]/div/div/div/ul[1]/div/div/button[1]'),
+        (XPATH, '//*[@id="UserPage-app"]//main//ul[1]/div/div/button[contains(normalize-space(), "マイリストを作成")]'),
+    ],
+    "mylist_title_input": [
+        (CSS, "#undefined-title"),
+        (XPATH, '//article[footer/button]//input[@type="text"]'),
+    ],
+    "mylist_create_confirm": [
+        (XPATH, "/html/body/div[13]/div/div/article/footer/button"),
+        (XPATH, '//article[.//*[@id="undefined-title"]]/footer/button'),
+    ],
+    "video_menu_button": [
+        (XPATH, '//*[@id="root"]/div[1]/main/div[2]/section/div[1]/div/div[2]/div[3]/div//button[@aria-label="メニュー"]'),
+        (XPATH, '//*[@id="root"]/div[1]/main/div[2]//section/div[1]/div/div[2]/div[3]/div//button[@aria-label="メニュー"]'),
+    ],
+    "video_add_to_mylist": [
+        (XPATH, '//button[text()="マイリストに追加"]'),
+        (XPATH, '//*[@role="menu"]//button[normalize-space()="マイリストに追加"]'),
+    ],
+    "video_mylist_select": [
+        (XPATH, '//*[@id="root"]/div[1]/main/div[2]/section/div[3]/div[2]/section/div/ul/li[2]/button'),
+        (XPATH, '//*[@id="root"]/div[1]/main/div[2]//section/div[3]/div[2]/section/div/ul/li[2]/button'),
+    ],
+}
+
+# Tries the candidates in order inside the page (no implicit wait applies).
+# lookup() returns [index, element, lookup ms] of the first visible match
+LOOKUP_FUNCTION = """
+const visible = el => el.getClientRects().length > 0 && getComputedStyle(el).visibility !== "hidden";
+const lookup = candidates => {
+    for (let i = 0; i < candidates.length; i++) {
+        const [by, value] = candidates[i];
+        const start = performance.now();
+        let el = null;
+        try {
+            el = by === "css selector"
+                ? document.querySelector(value)
+                : document.evaluate(value, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+        } catch (e) {
+            continue;
+        }
+        if (el && visible(el)) return [i, el, performance.now() - start];
+    }
+    return null;
+};
+"""
+FIND_CANDIDATE_SCRIPT = LOOKUP_FUNCTION + "return lookup(arguments[0]);"
+# Waits for and clicks each step's element in turn, all in one round trip.
+# Passes {ok, step (first step not clicked), results: [[index, lookup ms, wait ms], ...]}
+CLICK_SEQUENCE_SCRIPT = LOOKUP_FUNCTION + """
+const [steps, timeoutMs, done] = arguments;
+const sleep = ms => new Promise(resolve => setTimeout(resolve, ms));
+(async () => {
+    const results = [];
+    for (let step = 0; step < steps.length; step++) {
+        const start = performance.now();
+        let found = lookup(steps[step]);
+        while (!found && performance.now() - start < timeoutMs) {
+            await sleep(50);
+            found = lookup(steps[step]);
+        }
+        if (!found) return done({ok: false, step, results});
+        found[1].click();
+        results.push([found[0], found[2], performance.now() - start]);
+    }
+    done({ok: true, step: steps.length, results});
+})().catch(error => done({ok: false, step: 0, results: [], error: String(error)}));
+"""
+
+_lock = threading.Lock()
+_stats = defaultdict(lambda: {"hits": 0, "misses": 0, "total": 0.0, "max": 0.0,
+                              "candidates": defaultdict(int), "lookup_ms": defaultdict(float)})
+
+
+def candidates(target: str) -> list:
+    """Return the target's candidates as [by, value] lists, in declared order"""
+    return [list(selector) for selector in SELECTORS[target]]
+
+
+def _record(target: str, index: int | None, seconds: float, lookup_ms: float = 0.0) -> None:
+    with _lock:
+        entry = _stats[target]
+        if index is None:
+            entry["misses"] += 1
+        else:
+            if index and not entry["candidates"].get(index):
+                print(f"Selector fallback: {target} resolved by candidate {index} ({SELECTORS[target][index][1]})")
+            entry["hits"] += 1
+            entry["candidates"][index] += 1
+            entry["lookup_ms"][index] += lookup_ms
+        entry["total"] += seconds
+        entry["max"] = max(entry["max"], seconds)
+
+
+@profiler.profiled()
+def find(driver: WebDriver, target: str, timeout: int = 10) -> WebElement:
+    """
+    Wait until one of the target's candidates is visible and return it.
+
+    Args:
+        driver: WebDriver instance
+        target: Key of SELECTORS
+        timeout: Seconds to wait for any candidate
+
+    Raises:
+        ElementWaitTimeout: No candidate became visible in time
+    """
+    selectors = candidates(target)
+    found = {}
+
+    def resolve(d):
+        result = d.execute_script(FIND_CANDIDATE_SCRIPT, selectors)
+        if result:
+            found["index"], found["element"], found["lookup_ms"] = result
+            return True
+        return False
+
+    start = time.perf_counter()
+    try:
+        WebDriverWait(driver, timeout, poll_frequency=0.1).until(resolve)
+    except TimeoutException as e:
+        _record(target, None, time.perf_counter() - start)
+        raise selenium_helper.ElementWaitTimeout(f"No candidate of {target} became visible within {timeout}s") from e
+    except Exception:
+        _record(target, None, time.perf_counter() - start)
+        raise
+    _record(target, found["index"], time.perf_counter() - start, found["lookup_ms"])
+    return found["element"]
+
+
+def click(driver: WebDriver, target: str, timeout: int = 10) -> None:
+    """Wait until the target is visible, then click it"""
+    find(driver, target, timeout).click()
+
+
+@profiler.profiled()
+def click_sequence(driver: WebDriver, targets: list, timeout: int = 10) -> int:
+    """
+    Click the targets in order with one injected script that waits for each
+    element inside the page, instead of several WebDriver round trips per click.
+
+    Args:
+        driver: WebDriver instance
+        targets: Keys of SELECTORS, in click order
+        timeout: Seconds to wait for each target
+
+    Returns:
+        Number of targets clicked; the rest can be clicked with click()
+    """
+    steps = [candidates(target) for target in targets]
+    try:
+        result = selenium_helper.run_async_script(
+            driver, CLICK_SEQUENCE_SCRIPT, steps, timeout * 1000, timeout=timeout * len(targets) + 5
+        )
+    except Exception as e:
+        print(f"Click sequence script failed: {e}")
+        return 0
+
+    for step, (index, lookup_ms, wait_ms) in enumerate(result["results"]):
+        _record(targets[step], index, wait_ms / 1000, lookup_ms)
+    if result.get("error"):
+        print(f"Click sequence script failed: {result['error']}")
+    return result["step"]
+
+
+def send_keys(driver: WebDriver, target: str, keys: str, timeout: int = 10) -> None:
+    """Wait until the target is visible, then replace its value with keys"""
+    element = find(driver, target, timeout)
+    element.clear()
+    element.send_keys(keys)
+
+
+def stats() -> dict:
+    """
+    Return hit/miss/latency stats per target.
+
+    "candidates" counts the resolutions per candidate index of SELECTORS;
+    hits on an index other than 0 mean the page layout has drifted.
+    "lookup_ms" is the average in-page lookup time per candidate index.
+    """
+    with _lock:
+        return {
+            target: {
+                "hits": entry["hits"],
+                "misses": entry["misses"],
+                "avg_ms": entry["total"] / max(entry["hits"] + entry["misses"], 1) * 1000,
+                "max_ms": entry["max"] * 1000,
+                "candidates": dict(entry["candidates"]),
+                "lookup_ms": {index: total / entry["candidates"][index]
+                              for index, total in entry["lookup_ms"].items()},
+            }
+            for target, entry in _stats.items()
+        }
+
+
+def format_stats(target_stats: dict) -> str:
+    """Format stats() as a text table"""
+    lines = [f"{'target':<24} {'hits':>6} {'misses':>7} {'avg ms':>8} {'max ms':>8}  candidates"]
+    for target, entry in sorted(target_stats.items()):
+        lines.append(f"{target:<24} {entry['hits']:>6} {entry['misses']:>7} {entry['avg_ms']:>8.1f} "
+                     f"{entry['max_ms']:>8.1f}  {entry['candidates']}")
+    return "\n".join(lines)
+
+
+def reset() -> None:
+    """Forget the stats"""
+    with _lock:
+        _stats.clear()
@@ -1,28 +1,248 @@
+import json
 import os
+import re
+import shutil
+import time
+import threading
 import uuid
-import boto3
 import logging
 from selenium import webdriver
+from selenium.common.exceptions import TimeoutException, WebDriverException
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.remote.webdriver import WebDriver
 from selenium.webdriver.remote.webelement import WebElement
+from app.helpers import profiler
 
-def create_chrome_driver() -> WebDriver:
-    options = webdriver.ChromeOptions()
+# Requests never needed to add a video to a mylist: video streams, comments, ads and telemetry.
+# Chrome's Network.setBlockedURLs wildcard syntax ("*" matches any characters)
+DEFAULT_BLOCKED_URL_PATTERNS = [
+    # Media
+    "*.m3u8*", "*.m4s*", "*.mp4*", "*.ts", "*.ts?*",
+    "*delivery.domand.nicovideo.jp*", "*.dmc.nico*", "*nvcomment.nicovideo.jp*",
+    # Ads
+    "*ads.nicovideo.jp*", "*googlesyndication.com*", "*doubleclick.net*", "*amazon-adsystem.com*",
+    # Telemetry
+    "*google-analytics.com*", "*googletagmanager.com*", "*log.nicovideo.jp*", "*sentry.io*",
+]
+PAGE_LOAD_STRATEGIES = ("normal", "eager", "none")
 
-    options.add_argument("--headless=new")
-    options.add_argument("--no-sandbox")
-    options.add_argument("--disable-gpu")
-    options.add_argument("--disable-dev-shm-usage")
-    options.add_argument('--no-zygote')
-    
+# Resource Timing totals of the current page (cross-origin sizes read 0 without Timing-Allow-Origin)
+PAGE_WEIGHT_SCRIPT = """
+const entries = performance.getEntriesByType("navigation").concat(performance.getEntriesByType("resource"));
+return {
+    requests: entries.length,
+    transfer_bytes: entries.reduce((sum, e) => sum + (e.transferSize || 0), 0),
+    decoded_bytes: entries.reduce((sum, e) => sum + (e.decodedBodySize || 0), 0)
+};
+"""
+
+
+def blocked_url_patterns() -> list:
+    """
+    Return the URL patterns to block.
+
+    A non-empty CHROME_BLOCKED_URLS overrides the defaults: "none" disables blocking,
+    otherwise it is a comma-separated list in which "default" stands for
+    DEFAULT_BLOCKED_URL_PATTERNS.
+    """
+    value = os.environ.get("CHROME_BLOCKED_URLS")
+    if not value:
+        return list(DEFAULT_BLOCKED_URL_PATTERNS)
+    patterns = []
+    for pattern in (p.strip() for p in value.split(",")):
+        if pattern == "default":
+            patterns.extend(DEFAULT_BLOCKED_URL_PATTERNS)
+        elif pattern and pattern != "none":
+            patterns.append(pattern)
+    return patterns
+
+
+def page_load_strategy() -> str:
+    """
+    Return the page load strategy (CHROME_PAGE_LOAD_STRATEGY, default "eager").
+
+    With "eager" driver.get returns at DOMContentLoaded; every action waits
+    for its own element anyway.
+    """
+    strategy = (os.environ.get("CHROME_PAGE_LOAD_STRATEGY") or "eager").lower()
+    return strategy if strategy in PAGE_LOAD_STRATEGIES else "eager"
+
+
+def apply_network_filters(driver: WebDriver, patterns: list = None) -> None:
+    """
+    Block requests matching patterns (blocked_url_patterns() by default) through CDP.
+    """
+    patterns = blocked_url_patterns() if patterns is None else patterns
+    if not patterns:
+        return
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patterns})
+    except Exception as e:
+        logging.warning(f"Failed to set blocked URLs: {e}")
+
+
+def report_page_weight(driver: WebDriver, label: str) -> dict | None:
+    """
+    Measure the current page's request count and bytes transferred, and
+    record them in the profile. Does nothing unless profiling is enabled.
+    """
+    if not profiler.is_enabled():
+        return None
+    try:
+        weight = driver.execute_script(PAGE_WEIGHT_SCRIPT)
+    except Exception as e:
+        logging.warning(f"Failed to measure page weight: {e}")
+        return None
+    profiler.record_page(label, weight["requests"], weight["transfer_bytes"])
+    print(f"Page weight for {label}: {weight['requests']} requests, "
+          f"{weight['transfer_bytes'] / 1024:.1f} KB transferred, {weight['decoded_bytes'] / 1024:.1f} KB decoded")
+    return weight
+
+
+# Flags shared by every preset (the flags used before presets existed)
+BASE_CHROME_ARGUMENTS = [
+    "--headless=new",
+    "--no-sandbox",
+    "--disable-gpu",
+    "--disable-dev-shm-usage",
+    "--no-zygote",
     # Performance optimizations - disable unnecessary features (keeping only stable options)
-    options.add_argument("--disable-images")
-    options.add_argument("--disable-plugins")
-    options.add_argument("--disable-extensions")
-    options.add_argument("--disable-features=TranslateUI")
-    options.add_argument("--disable-audio-output")
-    options.add_argument("--disable-default-apps")
+    "--disable-images",
+    "--disable-plugins",
+    "--disable-extensions",
+    "--disable-features=TranslateUI",
+    "--disable-audio-output",
+    "--disable-default-apps",
+]
+DISABLE_FEATURES_PREFIX = "--disable-features="
+
+
+def _with_base_arguments(extra: list) -> list:
+    """
+    Return BASE_CHROME_ARGUMENTS plus extra, merging every --disable-features
+    list into the base's flag (Chrome only honors one of them).
+    """
+    features = []
+    for argument in BASE_CHROME_ARGUMENTS + extra:
+        if argument.startswith(DISABLE_FEATURES_PREFIX):
+            features.extend(feature for feature in argument[len(DISABLE_FEATURES_PREFIX):].split(",")
+                            if feature not in features)
+    merged = [DISABLE_FEATURES_PREFIX + ",".join(features) if argument.startswith(DISABLE_FEATURES_PREFIX)
+              else argument for argument in BASE_CHROME_ARGUMENTS]
+    return merged + [argument for argument in extra if not argument.startswith(DISABLE_FEATURES_PREFIX)]
+
+# Launch presets selected with CHROME_LAUNCH_PRESET:
+#   safe  - the original launch: a fresh profile and the regular Chrome binary (default)
+#   fast  - extra startup flags, profile copied from a template, headless shell when installed;
+#           opt-in until benchmarks/bench_selenium.py shows it is worth switching the default
+#   debug - like safe, plus Chrome and chromedriver logs and a remote debugging port
+LAUNCH_PRESETS = {
+    "fast": {
+        "arguments": _with_base_arguments([
+            "--disable-features=MediaRouter,OptimizationHints,Translate",
+            "--disable-background-networking",
+            "--disable-component-update",
+            "--disable-sync",
+            "--disable-breakpad",
+            "--no-first-run",
+            "--no-default-browser-check",
+            "--mute-audio",
+        ]),
+        "profile_template": True,
+        "headless_shell": True,
+        "verbose": False,
+    },
+    "safe": {
+        "arguments": BASE_CHROME_ARGUMENTS,
+        "profile_template": False,
+        "headless_shell": False,
+        "verbose": False,
+    },
+    "debug": {
+        "arguments": BASE_CHROME_ARGUMENTS + [
+            "--enable-logging=stderr",
+            "--v=1",
+            "--remote-debugging-port=9222",
+        ],
+        "profile_template": False,
+        "headless_shell": False,
+        "verbose": True,
+    },
+}
+DEFAULT_LAUNCH_PRESET = "safe"
+DEFAULT_PROFILE_TEMPLATE_DIR = "/tmp/chrome_profile_template"
+DEFAULT_HEADLESS_SHELL_PATH = "/opt/chrome-headless-shell/chrome-headless-shell"
+# Files of a running profile that must not end up in the template
+PROFILE_TEMPLATE_IGNORE = shutil.ignore_patterns(
+    "Singleton*", "lockfile", "*Cache*", "Crashpad", "*.log", "*-journal"
+)
+
+
+def launch_preset(name: str = None) -> str:
+    """Return the launch preset to use (name, else CHROME_LAUNCH_PRESET, else safe)"""
+    name = (name or os.environ.get("CHROME_LAUNCH_PRESET") or DEFAULT_LAUNCH_PRESET).lower()
+    return name if name in LAUNCH_PRESETS else DEFAULT_LAUNCH_PRESET
+
+
+def headless_shell_path() -> str | None:
+    """Return the chrome-headless-shell binary (CHROME_HEADLESS_SHELL_PATH) if it is installed"""
+    path = os.environ.get("CHROME_HEADLESS_SHELL_PATH") or DEFAULT_HEADLESS_SHELL_PATH
+    return path if os.path.isfile(path) and os.access(path, os.X_OK) else None
+
+
+def _new_user_data_dir(use_template: bool) -> str:
+    """
+    Create the profile directory for a new driver.
+
+    With use_template the profile template is copied instead of letting
+    Chrome build a profile from scratch. It is copied rather than hard-linked
+    because Chrome rewrites its SQLite files in place.
+    """
+    user_data_dir = f"/tmp/chrome_profile_{os.getpid()}_{uuid.uuid4()}"
+    template_dir = os.environ.get("CHROME_PROFILE_TEMPLATE_DIR") or DEFAULT_PROFILE_TEMPLATE_DIR
+    if use_template and os.path.isdir(template_dir):
+        try:
+            shutil.copytree(template_dir, user_data_dir, symlinks=True)
+        except OSError as e:
+            logging.warning(f"Failed to copy the Chrome profile template: {e}")
+            shutil.rmtree(user_data_dir, ignore_errors=True)
+    return user_data_dir
+
+
+def _seed_profile_template(user_data_dir: str) -> None:
+    """Keep a freshly initialized profile as the template for later launches"""
+    template_dir = os.environ.get("CHROME_PROFILE_TEMPLATE_DIR") or DEFAULT_PROFILE_TEMPLATE_DIR
+    if os.path.isdir(template_dir):
+        return
+    staging_dir = f"{template_dir}.{uuid.uuid4().hex}"
+    try:
+        shutil.copytree(user_data_dir, staging_dir, symlinks=True, ignore=PROFILE_TEMPLATE_IGNORE)
+        # Rename is atomic, so a concurrent launch never sees a half-copied template
+        os.rename(staging_dir, template_dir)
+    except OSError as e:
+        logging.warning(f"Failed to seed the Chrome profile template: {e}")
+        shutil.rmtree(staging_dir, ignore_errors=True)
+
+
+def create_chrome_driver(preset: str = None) -> WebDriver:
+    """
+    Start Chrome with a launch preset (see LAUNCH_PRESETS).
+
+    Args:
+        preset: Preset name; CHROME_LAUNCH_PRESET (default "safe") when omitted
+    """
+    preset_name = launch_preset(preset)
+    preset = LAUNCH_PRESETS[preset_name]
+    options = webdriver.ChromeOptions()
+    options.page_load_strategy = page_load_strategy()
+
+    for argument in preset["arguments"]:
+        options.add_argument(argument)
+
+    binary = headless_shell_path() if preset["headless_shell"] else None
+    if binary:
+        options.binary_location = binary
     
     # Set preferences to disable media and other unnecessary content
     prefs = {
@@ -36,17 +256,72 @@ def create_chrome_driver() -> WebDriver:
     }
     options.add_experimental_option("prefs", prefs)
 
-    options.add_argument(f"--user-data-dir=/tmp/chrome_profile_{os.getpid()}_{uuid.uuid4()}")
+    # Record network events so actions can wait for their API response
+    options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+    options.add_experimental_option("perfLoggingPrefs", {"enableNetwork": True, "enablePage": False})
+
+    user_data_dir = _new_user_data_dir(preset["profile_template"])
+    options.add_argument(f"--user-data-dir={user_data_dir}")
+
+    service = None
+    if preset["verbose"]:
+        service = webdriver.ChromeService(service_args=["--verbose"], log_output="/tmp/chromedriver.log")
 
-    driver = webdriver.Chrome(options=options)
+    driver = profiler.instrument(webdriver.Chrome(options=options, service=service))
+    driver.user_data_dir = user_data_dir
+    driver.launch_preset = preset_name
+    if preset["profile_template"]:
+        _seed_profile_template(user_data_dir)
+    apply_network_filters(driver)
     
-    # Set conservative timeouts to prevent connection issues
-    driver.set_page_load_timeout(120)  # 2 minutes for page loading
+    # A slow page fails after CHROME_PAGE_LOAD_TIMEOUT seconds instead of stalling the batch
+    driver.set_page_load_timeout(int(os.environ.get("CHROME_PAGE_LOAD_TIMEOUT") or 30))
     driver.implicitly_wait(10)  # 10 seconds for element finding
     
     return driver
 
 
+def quit_driver(driver: WebDriver) -> None:
+    """
+    Quit the driver and remove its temporary Chrome profile directory.
+    """
+    try:
+        driver.quit()
+    except Exception:
+        pass
+    user_data_dir = getattr(driver, "user_data_dir", None)
+    if user_data_dir:
+        shutil.rmtree(user_data_dir, ignore_errors=True)
+
+
+def is_driver_alive(driver: WebDriver) -> bool:
+    """
+    Cheap liveness probe: a single script round trip to the browser.
+    """
+    try:
+        return driver.execute_script("return 1") == 1
+    except Exception:
+        return False
+
+
+def reset_driver_state(driver: WebDriver) -> None:
+    """
+    Clear cookies and close extra tabs so the driver can serve another account.
+    """
+    handles = driver.window_handles
+    for handle in handles[1:]:
+        driver.switch_to.window(handle)
+        driver.close()
+    driver.switch_to.window(handles[0])
+    try:
+        # Clears cookies for every domain, not only the current page's
+        driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+    except Exception:
+        driver.delete_all_cookies()
+    driver.get("about:blank")
+
+
+@profiler.profiled()
 def wait_and_click(driver: WebDriver, xpath: str, timeout: int = 10) -> None:
     """
     Wait until the element specified by xpath is visible, then click it.
@@ -57,6 +332,7 @@ def wait_and_click(driver: WebDriver, xpath: str, timeout: int = 10) -> None:
     driver.find_element("xpath", xpath).click()
 
 
+@profiler.profiled()
 def wait_and_click_in_element(element: WebElement, xpath: str, timeout: int = 10) -> None:
     """
     指定したelementの下でxpathの要素が表示されるまで待ち、クリックする。
@@ -67,6 +343,7 @@ def wait_and_click_in_element(element: WebElement, xpath: str, timeout: int = 10
     element.find_element("xpath", xpath).click()
 
 
+@profiler.profiled()
 def wait_and_send_keys(driver: WebDriver, xpath: str, keys: str, timeout: int = 10) -> None:
     """
     Wait until the element specified by xpath is visible, then send keys to it.
@@ -78,6 +355,7 @@ def wait_and_send_keys(driver: WebDriver, xpath: str, keys: str, timeout: int =
     driver.find_element("xpath", xpath).send_keys(keys)
 
 
+@profiler.profiled()
 def wait_and_accept_alert(driver: WebDriver, timeout: int = 10) -> None:
     """
     Wait until a JavaScript alert/confirm dialog is present, then accept (OK) it.
@@ -87,6 +365,106 @@ def wait_and_accept_alert(driver: WebDriver, timeout: int = 10) -> None:
     alert.accept()
 
 
+@profiler.profiled()
+def run_async_script(driver: WebDriver, script: str, *args, timeout: int = 30):
+    """
+    Run an asynchronous script in the page and return the value it passes to
+    its callback (the last argument).
+    """
+    driver.set_script_timeout(timeout)
+    return driver.execute_async_script(script, *args)
+
+
+class ElementWaitTimeout(TimeoutException):
+    """Raised when a wait for a UI element gives up because it never appeared"""
+
+
+class NetworkRequestError(Exception):
+    """Raised when the API request confirming a UI action returns an error status"""
+
+    def __init__(self, url: str, status_code: int):
+        super().__init__(f"Request to {url} failed with status {status_code}")
+        self.url = url
+        self.status_code = status_code
+
+
+def drain_network_log(driver: WebDriver) -> None:
+    """
+    Discard the performance log collected so far. Call it right before the
+    action whose response wait_for_network_response() waits for, so a stale
+    response (e.g. of an earlier request whose wait timed out) cannot satisfy it.
+    """
+    try:
+        driver.get_log("performance")
+    except WebDriverException:
+        pass
+
+
+@profiler.profiled()
+def wait_for_network_response(driver: WebDriver, url_pattern: str, method: str = None,
+                              timeout: int = 10, fallback_delay: float = 1) -> dict | None:
+    """
+    Wait until the browser receives a response for a request whose URL matches
+    url_pattern (and method, if given), using Chrome's performance log.
+
+    Only requests sent while waiting count, so call drain_network_log() right
+    before triggering the request.
+
+    Returns {"url": ..., "status": ...} as soon as the response arrives.
+    Raises NetworkRequestError for an error status and TimeoutException when no
+    matching response arrives in time. If the driver has no performance log,
+    sleeps fallback_delay seconds and returns None.
+    """
+    pattern = re.compile(url_pattern)
+    request_methods = {}
+    deadline = time.monotonic() + timeout
+
+    while True:
+        try:
+            entries = driver.get_log("performance")
+        except WebDriverException:
+            time.sleep(fallback_delay)
+            return None
+
+        for entry in entries:
+            message = json.loads(entry["message"])["message"]
+            params = message.get("params", {})
+            if message.get("method") == "Network.requestWillBeSent":
+                request_methods[params.get("requestId")] = params.get("request", {}).get("method")
+            elif message.get("method") == "Network.responseReceived":
+                response = params.get("response", {})
+                if not pattern.search(response.get("url", "")):
+                    continue
+                request_id = params.get("requestId")
+                # Responses to requests sent before the wait started are stale
+                if request_id not in request_methods:
+                    continue
+                if method and request_methods[request_id] != method:
+                    continue
+                status = int(response.get("status", 0))
+                if status >= 400:
+                    raise NetworkRequestError(response["url"], status)
+                return {"url": response["url"], "status": status}
+
+        if time.monotonic() >= deadline:
+            raise TimeoutException(f"No response for {method or ''} {url_pattern} within {timeout}s")
+        time.sleep(0.05)
+
+
+_s3_client = None
+_s3_client_lock = threading.Lock()
+
+
+def _get_s3_client():
+    """Return the S3 client, created (and boto3 imported) on first use"""
+    global _s3_client
+    with _s3_client_lock:
+        if _s3_client is None:
+            import boto3
+            _s3_client = boto3.client("s3")
+        return _s3_client
+
+
 def save_screenshot_to_s3(driver: WebDriver) -> str | None:
     """
     Takes a screenshot using the given Selenium driver and uploads it to S3.
@@ -99,7 +477,7 @@ def save_screenshot_to_s3(driver: WebDriver) -> str | None:
         return None
 
     try:
-        s3 = boto3.client("s3")
+        s3 = _get_s3_client()
         bucket = os.environ["S3_BUCKET_NAME"]
         key = f"screenshots/{uuid.uuid4().hex}.png"
         s3.put_object(Bucket=bucket, Key=key, Body=screenshot_bytes, ContentType="image/png")
@@ -111,6 +489,7 @@ def save_screenshot_to_s3(driver: WebDriver) -> str | None:
         return None
 
 
+@profiler.profiled()
 def wait_and_find_element(driver: WebDriver, xpath: str, timeout: int = 10) -> WebElement:
     """
     指定したxpathの要素が表示されるまで待ち、その要素を返す。
@@ -121,6 +500,7 @@ def wait_and_find_element(driver: WebDriver, xpath: str, timeout: int = 10) -> W
     return driver.find_element("xpath", xpath)
 
 
+@profiler.profiled()
 def wait_and_find_element_in_element(element: WebElement, xpath: str, timeout: int = 10) -> WebElement:
     """
     指定したelementの下でxpathの要素が表示されるまで待ち、その要素を返す。
@@ -1,133 +1,736 @@
-import time
+import os
+import queue
+import threading
 from datetime import datetime
 from concurrent.futures import ThreadPoolExecutor
-from app.helpers import selenium_helper
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.support.ui import WebDriverWait
+from app import engines
+from app.engines import diff_mylist
+from app.engines.http_engine import NVAPI_URL, NVAPI_HEADERS
+from app.helpers import driver_pool, profiler, selector_registry, selenium_helper
+from app.services import failure_service
+from app.services.availability_service import AvailabilityService
+from app.services.failure_service import FailureService
+from app.services.session_cache_service import SessionCacheService
 
 # 定数
 NICO_URL = "https://www.nicovideo.jp"
 MYLIST_URL = "https://www.nicovideo.jp/my/mylist"
-LOGIN_BUTTON_XPATH = '//*[@id="CommonHeader"]/div/div/div/div[2]/a'
-MAIL_INPUT_XPATH = '//*[@id="input__mailtel"]'
-PASS_INPUT_XPATH = '//*[@id="input__password"]'
-LOGIN_SUBMIT_XPATH = '//*[@id="login__submit"]'
-MYLIST_COUNT_XPATH = '//*[@id="UserPage-app"]/section/section/main/div/div/div[1]/div[2]/div/div/div/ul[1]/div/header/div/span/span[1]'
-MYLIST_REMOVE1_XPATH = '//*[@id="UserPage-app"]/section/section/main/div/section/div/div[3]/div[1]/div/a'
-MYLIST_REMOVE2_XPATH = '//*[@id="UserPage-app"]/section/section/main/div/section/div/header/div/div[2]/button'
-MYLIST_REMOVE3_XPATH = '//*[@id="UserPage-app"]/section/section/main/div/section/div/header/div/div[2]/div/button[3]'
-MYLIST_CREATE_BUTTON_XPATH = '//*[@id="UserPage-app"]/section/section/main/div/div/div[1]/div[2]/div/div/div/ul[1]/div/div/button[1]'
-MYLIST_TITLE_INPUT_XPATH = '//*[@id="undefined-title"]'
-MYLIST_CREATE_CONFIRM_XPATH = '/html/body/div[13]/div/div/article/footer/button'
-VIDEO_MENU_PARENT_XPATH = '//*[@id="root"]/div[1]/main/div[2]/section/div[1]/div/div[2]/div[3]/div'
-VIDEO_MENU_BUTTON_XPATH = './/button[@aria-label="メニュー"]'
-VIDEO_ADD_TO_MYLIST_XPATH = '//button[text()="マイリストに追加"]'
-VIDEO_MYLIST_SELECT_XPATH = '//*[@id="root"]/div[1]/main/div[2]/section/div[3]/div[2]/section/div/ul/li[2]/button'
+LOGIN_PAGE_HOST = "account.nicovideo.jp"
+SESSION_COOKIE_NAME = "user_session"
 MAX_THREADS = 3
+# UI 操作の完了を確認するための nvapi リクエスト
+MYLIST_ITEMS_API_PATTERN = r"/v1/users/me/mylists/\d+/items"
+MYLIST_CREATE_API_PATTERN = r"/v1/users/me/mylists(\?|$)"
+MYLIST_DELETE_API_PATTERN = r"/v1/users/me/mylists/\d+(\?|$)"
+# 動画をマイリストに追加するクリック順 (1 回のスクリプトでまとめて実行する)
+VIDEO_ADD_TARGETS = ["video_menu_button", "video_add_to_mylist", "video_mylist_select"]
+# スクリプトでは失敗しクリックごとの操作で成功した回数がこれに達したら、スクリプトを使わない
+SCRIPTED_ADD_MAX_FAILURES = 3
+# スクリプトを止めた後、クリックごとの操作でこの回数追加したら、スクリプトを 1 回だけ試し直す
+SCRIPTED_ADD_RETRY_AFTER = 20
+# 裏のタブで読み込んだ視聴ページが操作できる状態か (eager の driver.get が返るのと同じ時点)
+WATCH_PAGE_READY_SCRIPT = 'return location.pathname.endsWith("/watch/" + arguments[0]) && document.readyState !== "loading";'
+# マイリスト一覧を 1 回取得し、全マイリストを並列に DELETE した後、残数を再取得して検証する
+BULK_DELETE_MYLISTS_SCRIPT = """
+const [nvapiUrl, headers, done] = arguments;
+const listMylistIds = async () => {
+    const response = await fetch(`${nvapiUrl}/v1/users/me/mylists`, {credentials: "include", headers});
+    if (!response.ok) throw new Error(`list mylists failed: ${response.status}`);
+    return (await response.json()).data.mylists.map(mylist => mylist.id);
+};
+(async () => {
+    const ids = await listMylistIds();
+    const statuses = await Promise.all(ids.map(id =>
+        fetch(`${nvapiUrl}/v1/users/me/mylists/${id}`, {method: "DELETE", credentials: "include", headers})
+            .then(response => response.status)
+    ));
+    const remaining = await listMylistIds();
+    done({deleted: ids.length, statuses, remaining: remaining.length});
+})().catch(error => done({error: String(error)}));
+"""
+# 先頭のマイリストの中身 (watchId → itemId) を全ページ取得する。マイリストが無ければ mylistId は null
+READ_MYLIST_ITEMS_SCRIPT = """
+const [nvapiUrl, headers, done] = arguments;
+(async () => {
+    const listResponse = await fetch(`${nvapiUrl}/v1/users/me/mylists`, {credentials: "include", headers});
+    if (!listResponse.ok) throw new Error(`list mylists failed: ${listResponse.status}`);
+    const mylists = (await listResponse.json()).data.mylists;
+    if (mylists.length === 0) return done({mylistId: null, items: {}});
+    const mylistId = mylists[0].id;
+    const items = {};
+    for (let page = 1; ; page++) {
+        const response = await fetch(`${nvapiUrl}/v1/users/me/mylists/${mylistId}?pageSize=100&page=${page}`,
+                                     {credentials: "include", headers});
+        if (!response.ok) throw new Error(`list items failed: ${response.status}`);
+        const mylist = (await response.json()).data.mylist;
+        mylist.items.forEach(item => { items[item.watchId] = item.itemId; });
+        if (!mylist.hasNext) break;
+    }
+    done({mylistId, items});
+})().catch(error => done({error: String(error)}));
+"""
+# 指定した itemId を 100 件ずつまとめて削除する
+REMOVE_MYLIST_ITEMS_SCRIPT = """
+const [nvapiUrl, headers, mylistId, itemIds, done] = arguments;
+(async () => {
+    const statuses = [];
+    for (let start = 0; start < itemIds.length; start += 100) {
+        const query = itemIds.slice(start, start + 100).join(",");
+        const response = await fetch(`${nvapiUrl}/v1/users/me/mylists/${mylistId}/items?itemIds=${query}`,
+                                     {method: "DELETE", credentials: "include", headers});
+        statuses.push(response.status);
+    }
+    done({statuses});
+})().catch(error => done({error: String(error)}));
+"""
+# Chrome 1 プロセスあたりの想定メモリ使用量 (MB)。並列数の上限計算に使う
+CHROME_MEMORY_MB = 400
+# Lambda ランタイム・Python 本体用に確保しておくメモリ (MB)
+BASE_MEMORY_MB = 256
 
+@profiler.profiled()
 def login(driver, email, password):
+    """
+    Log in, reusing a cached session when possible.
+
+    The login form is only used when no cached session exists or the cached
+    one has expired. After a form login the session cookies are cached.
+    """
+    if restore_session(driver, email, password):
+        return
+    login_with_form(driver, email, password)
+    capture_session(driver, email, password)
+
+@profiler.profiled()
+def login_with_form(driver, email, password):
     driver.get(NICO_URL)
-    selenium_helper.wait_and_click(driver, LOGIN_BUTTON_XPATH)
-    selenium_helper.wait_and_send_keys(driver, MAIL_INPUT_XPATH, email)
-    selenium_helper.wait_and_send_keys(driver, PASS_INPUT_XPATH, password)
-    selenium_helper.wait_and_click(driver, LOGIN_SUBMIT_XPATH)
+    selector_registry.click(driver, "login_button")
+    selector_registry.send_keys(driver, "mail_input", email)
+    selector_registry.send_keys(driver, "password_input", password)
+    selector_registry.click(driver, "login_submit")
+
+@profiler.profiled()
+def restore_session(driver, email, password):
+    """
+    Inject cached session cookies into the driver.
+
+    Returns:
+        True if the cached session is still valid, False otherwise
+    """
+    cookies = SessionCacheService.load(email, password)
+    if not cookies:
+        return False
+
+    try:
+        driver.get(NICO_URL)
+        for cookie in cookies:
+            driver.add_cookie(cookie)
+        # The mylist page redirects to the login page when the session has expired
+        driver.get(MYLIST_URL)
+        if LOGIN_PAGE_HOST not in driver.current_url:
+            return True
+    except Exception as e:
+        print(f"Failed to restore cached session: {e}")
 
+    SessionCacheService.invalidate(email, password)
+    try:
+        driver.delete_all_cookies()
+    except Exception:
+        pass
+    return False
+
+def capture_session(driver, email, password, timeout=10):
+    """
+    Cache the session cookies once the login has completed.
+    """
+    try:
+        WebDriverWait(driver, timeout).until(lambda d: d.get_cookie(SESSION_COOKIE_NAME))
+        SessionCacheService.save(email, password, driver.get_cookies())
+    except Exception as e:
+        # Caching is an optimization only; the login itself succeeded
+        print(f"Failed to capture session cookies: {e}")
+
+@profiler.profiled()
 def remove_all_mylist(driver):
+    driver.get(MYLIST_URL)
+    if bulk_remove_all_mylist(driver):
+        # Reload once so the page reflects the empty state before create_mylist()
+        driver.get(MYLIST_URL)
+        return
+    remove_all_mylist_by_ui(driver)
+
+def bulk_remove_all_mylist(driver):
+    """
+    Delete every mylist in a single pass through the in-page nvapi client.
+
+    Must be called on a logged-in niconico page.
+
+    Returns:
+        True if the verification read found no mylists left, False otherwise
+    """
+    try:
+        result = selenium_helper.run_async_script(driver, BULK_DELETE_MYLISTS_SCRIPT, NVAPI_URL, NVAPI_HEADERS)
+    except Exception as e:
+        print(f"Bulk mylist deletion failed: {e}")
+        return False
+
+    if not result or result.get("error"):
+        print(f"Bulk mylist deletion failed: {result.get('error') if result else 'no result'}")
+        return False
+
+    print(f"Bulk deleted {result['deleted']} mylists (statuses: {result['statuses']})")
+    return result["remaining"] == 0
+
+def remove_all_mylist_by_ui(driver):
     driver.get(MYLIST_URL)
     while True:
-        count_element = driver.find_element("xpath", MYLIST_COUNT_XPATH)
+        count_element = selector_registry.find(driver, "mylist_count")
         count_text = count_element.text
         if count_text == "0":
             break
-        selenium_helper.wait_and_click(driver, MYLIST_REMOVE1_XPATH)
-        selenium_helper.wait_and_click(driver, MYLIST_REMOVE2_XPATH)
-        selenium_helper.wait_and_click(driver, MYLIST_REMOVE3_XPATH)
+        selector_registry.click(driver, "mylist_first")
+        selector_registry.click(driver, "mylist_menu")
+        selector_registry.click(driver, "mylist_delete")
+        selenium_helper.drain_network_log(driver)
         selenium_helper.wait_and_accept_alert(driver)
-        time.sleep(1)
+        selenium_helper.wait_for_network_response(driver, MYLIST_DELETE_API_PATTERN, "DELETE")
         driver.get(MYLIST_URL)
 
+@profiler.profiled()
+def sync_mylist(driver, id_list, title: str = None):
+    """
+    Make the first mylist match id_list without recreating it.
+
+    Reads the mylist once, removes the videos that are not requested and
+    returns the requested videos that are still missing. Creates the mylist
+    when there is none. Must be called on a logged-in driver.
+
+    Returns:
+        Video IDs to add (in id_list order)
+    """
+    driver.get(MYLIST_URL)
+    current = selenium_helper.run_async_script(driver, READ_MYLIST_ITEMS_SCRIPT, NVAPI_URL, NVAPI_HEADERS)
+    if not current or current.get("error"):
+        raise Exception(f"Failed to read mylist items: {current.get('error') if current else 'no result'}")
+
+    if current["mylistId"] is None:
+        create_mylist(driver, title)
+        return list(id_list)
+
+    ids_to_add, item_ids_to_remove = diff_mylist(current["items"], id_list)
+    if item_ids_to_remove:
+        result = selenium_helper.run_async_script(
+            driver, REMOVE_MYLIST_ITEMS_SCRIPT, NVAPI_URL, NVAPI_HEADERS, current["mylistId"], item_ids_to_remove
+        )
+        if not result or result.get("error") or any(status >= 400 for status in result["statuses"]):
+            raise Exception(f"Failed to remove mylist items: {result}")
+    print(f"Sync: {len(ids_to_add)} videos to add, {len(item_ids_to_remove)} removed, "
+          f"{len(id_list) - len(ids_to_add)} already registered")
+    return ids_to_add
+
+@profiler.profiled()
 def create_mylist(driver, title: str = None):
-    selenium_helper.wait_and_click(driver, MYLIST_CREATE_BUTTON_XPATH)
+    selector_registry.click(driver, "mylist_create_button")
     if title is None or title == "":
         current_time = datetime.now().strftime("%Y%m%d_%H%M%S")
         title = f"MyList_{current_time}"
-    selenium_helper.wait_and_send_keys(driver, MYLIST_TITLE_INPUT_XPATH, title)
-    selenium_helper.wait_and_click(driver, MYLIST_CREATE_CONFIRM_XPATH)
-    time.sleep(1)
+    selector_registry.send_keys(driver, "mylist_title_input", title)
+    selenium_helper.drain_network_log(driver)
+    selector_registry.click(driver, "mylist_create_confirm")
+    selenium_helper.wait_for_network_response(driver, MYLIST_CREATE_API_PATTERN, "POST")
     return title
 
-def add_videos_to_mylist(driver, id_list):
-    failed_id_list = []
-    for video_id in id_list:
+def add_videos_to_mylist(driver, id_list, on_result=None, failures=None):
+    """
+    Add videos to the first mylist.
+
+    on_result(video_id, ok) is called after each video (not for a video
+    interrupted by a dead driver), so progress can be checkpointed.
+    The reason of each failure (see failure_service) is stored in failures
+    when a dict is given. With REGIST_PIPELINE_TABS=K (K >= 2) the next
+    watch pages load in background tabs while the current one is handled.
+    """
+    tabs = min(pipeline_tabs(), len(id_list))
+    if tabs > 1:
+        return _add_videos_pipelined(driver, id_list, tabs, on_result, failures)
+
+    return [video_id for video_id in id_list
+            if not _try_add_video(driver, video_id, on_result, failures)]
+
+def pipeline_tabs():
+    """Return the number of tabs to pipeline watch pages through (1 = serial)"""
+    try:
+        return max(1, int(os.environ.get("REGIST_PIPELINE_TABS") or 1))
+    except ValueError:
+        return 1
+
+def _try_add_video(driver, video_id, on_result, failures, navigate=True):
+    """
+    Add one video, recording its result.
+
+    Returns:
+        False if the video failed; a dead driver is raised instead
+    """
+    with profiler.section(f"video:{video_id}"):
         try:
-            driver.get(f"{NICO_URL}/watch/{video_id}")
-            element = selenium_helper.wait_and_find_element(driver, VIDEO_MENU_PARENT_XPATH)
-            selenium_helper.wait_and_click_in_element(element, VIDEO_MENU_BUTTON_XPATH)
-            selenium_helper.wait_and_click(driver, VIDEO_ADD_TO_MYLIST_XPATH)
-            selenium_helper.wait_and_click(driver, VIDEO_MYLIST_SELECT_XPATH)
-            time.sleep(1)
-        except Exception:
+            if navigate:
+                _add_video_to_mylist(driver, video_id)
+            else:
+                _wait_for_watch_page(driver, video_id)
+                _click_add_to_mylist(driver)
+            selenium_helper.report_page_weight(driver, video_id)
+            if on_result:
+                on_result(video_id, True)
+            return True
+        except Exception as e:
             # selenium_helper.save_screenshot_to_s3(driver)
             # Check if driver is still alive
             try:
-                driver.title
+                page_title = driver.title
             except Exception:
                 # Driver is dead, raise to outer scope
+                if failures is not None:
+                    failures[video_id] = failure_service.DRIVER_DEAD
                 raise
-            failed_id_list.append(video_id)
+            reason = FailureService.classify(e, page_title)
+            print(f"Failed to add {video_id} ({reason}): {e}")
+            if failures is not None:
+                failures[video_id] = reason
+            if on_result:
+                on_result(video_id, False)
+            return False
+
+def _add_videos_pipelined(driver, id_list, tabs, on_result, failures):
+    """
+    Add videos through several tabs of the same logged-in browser.
+
+    Video i is handled in tab i % tabs. As soon as it is done, that tab starts
+    loading video i + tabs, so page loads overlap with the clicks in other tabs.
+    """
+    main_handle = driver.current_window_handle
+    handles = [main_handle]
+
+    def start_loading(index):
+        driver.switch_to.window(handles[index % tabs])
+        # Assigning location returns immediately, unlike driver.get()
+        driver.execute_script("window.location.href = arguments[0];", f"{NICO_URL}/watch/{id_list[index]}")
+
+    failed_id_list = []
+    try:
+        for _ in range(tabs - 1):
+            driver.switch_to.new_window("tab")
+            # Request blocking is set per tab
+            selenium_helper.apply_network_filters(driver)
+            handles.append(driver.current_window_handle)
+        for index in range(tabs):
+            start_loading(index)
+
+        for index, video_id in enumerate(id_list):
+            driver.switch_to.window(handles[index % tabs])
+            if not _try_add_video(driver, video_id, on_result, failures, navigate=False):
+                failed_id_list.append(video_id)
+            if index + tabs < len(id_list):
+                start_loading(index + tabs)
+    finally:
+        for handle in handles[1:]:
+            try:
+                driver.switch_to.window(handle)
+                driver.close()
+            except Exception:
+                pass
+        try:
+            driver.switch_to.window(main_handle)
+        except Exception:
+            pass
     return failed_id_list
 
+def _wait_for_watch_page(driver, video_id, timeout=10):
+    """Wait until the current tab has left the previous page and parsed the watch page of video_id"""
+    WebDriverWait(driver, timeout, poll_frequency=0.05, ignored_exceptions=(WebDriverException,)).until(
+        lambda d: d.execute_script(WATCH_PAGE_READY_SCRIPT, video_id),
+        f"Watch page of {video_id} did not load within {timeout}s"
+    )
+
+_scripted_add_failures = 0
+_scripted_add_skipped = 0
+_scripted_add_lock = threading.Lock()
+
+
+def _scripted_add_enabled():
+    """
+    Whether the next add runs as one script. Once it kept failing, it is
+    skipped, but tried again after SCRIPTED_ADD_RETRY_AFTER per-click adds so
+    a warm container picks it up again when the page works with it.
+    """
+    global _scripted_add_skipped
+    if os.environ.get("REGIST_SCRIPTED_ADD", "1").lower() not in ("1", "true"):
+        return False
+    with _scripted_add_lock:
+        if _scripted_add_failures < SCRIPTED_ADD_MAX_FAILURES:
+            return True
+        if _scripted_add_skipped < SCRIPTED_ADD_RETRY_AFTER:
+            _scripted_add_skipped += 1
+            return False
+        _scripted_add_skipped = 0
+        return True
+
+
+def _record_scripted_add(clicked):
+    """
+    Called once every click succeeded. Counts the times the script stopped
+    early although the per-click fallback could finish the sequence.
+    """
+    global _scripted_add_failures
+    with _scripted_add_lock:
+        if clicked == len(VIDEO_ADD_TARGETS):
+            if _scripted_add_failures >= SCRIPTED_ADD_MAX_FAILURES:
+                print("Scripted add works again, switching back from per-click actions")
+            _scripted_add_failures = 0
+        else:
+            _scripted_add_failures += 1
+            if _scripted_add_failures == SCRIPTED_ADD_MAX_FAILURES:
+                print("Scripted add keeps failing where clicks succeed, switching to per-click actions")
+
+
+def _add_video_to_mylist(driver, video_id):
+    driver.get(f"{NICO_URL}/watch/{video_id}")
+    _click_add_to_mylist(driver)
+
+
+def _click_add_to_mylist(driver):
+    # menu -> マイリストに追加 -> mylist in one round trip; per-click actions finish whatever it could not
+    selenium_helper.drain_network_log(driver)
+    scripted = _scripted_add_enabled()
+    clicked = selector_registry.click_sequence(driver, VIDEO_ADD_TARGETS) if scripted else 0
+    for step, target in enumerate(VIDEO_ADD_TARGETS[clicked:], start=clicked):
+        # The script already waited for the step it stopped at
+        timeout = 2 if scripted and step == clicked else 10
+        selector_registry.click(driver, target, timeout)
+    if scripted:
+        _record_scripted_add(clicked)
+    selenium_helper.wait_for_network_response(driver, MYLIST_ITEMS_API_PATTERN, "POST")
+
 
-def regist(email, password, id_list, max_retries=3):
+def regist(email, password, id_list, max_retries=3, workers=None, on_result=None, failures=None):
     """
-    Register videos to mylist with retry logic for selenium failures.
+    Register videos to mylist, restarting the driver when it dies.
+
+    Failed videos are not retried here: their reasons are recorded in
+    failures so the caller can defer the retryable ones.
     
     Args:
         email: User email
         password: User password
         id_list: List of video IDs to register
-        max_retries: Maximum number of retry attempts
+        max_retries: Maximum number of driver restarts
+        workers: Number of parallel drivers (see resolve_worker_count)
+        on_result: Optional callback(video_id, ok) called as each video finishes
+        failures: Optional dict that receives the failure reason of each failed video
         
     Returns:
         List of video IDs that failed to register
     """
-    last_failed_list = id_list
-    
+    failures = {} if failures is None else failures
+    try:
+        with profiler.section("availability"):
+            unavailable = AvailabilityService.find_unavailable(list(id_list))
+        # Deleted or private videos fail without spending browser time on them
+        for video_id in unavailable:
+            failures[video_id] = failure_service.UNAVAILABLE
+            if on_result:
+                on_result(video_id, False)
+        pending_ids = [video_id for video_id in id_list if video_id not in unavailable]
+        if unavailable and not pending_ids:
+            return list(unavailable)
+
+        with profiler.section("regist"):
+            failed_id_list = _regist(email, password, pending_ids, max_retries, workers, on_result, failures)
+        return list(unavailable) + list(failed_id_list)
+    finally:
+        profiler.report("regist")
+
+
+def _regist(email, password, id_list, max_retries, workers, on_result, failures):
+    if not engines.use_http_engine():
+        return _regist_with_selenium(email, password, id_list, max_retries, workers, on_result, failures)
+
+    results = {}
+
+    def track(video_id, ok):
+        results[video_id] = ok
+        if on_result:
+            on_result(video_id, ok)
+
+    try:
+        with engines.HttpEngine() as engine:
+            engine.login(email, password)
+            return engine.add_videos_to_mylist(id_list, on_result=track, failures=failures)
+    except Exception as e:
+        # Videos the HTTP engine already finished are not added a second time
+        pending_ids = [video_id for video_id in id_list if video_id not in results]
+        print(f"HTTP engine failed ({e}), falling back to Selenium for {len(pending_ids)} videos")
+
+    failed_set = {video_id for video_id, ok in results.items() if not ok}
+    if pending_ids:
+        failed_set.update(_regist_with_selenium(email, password, pending_ids, max_retries, workers,
+                                                on_result, failures))
+    return [video_id for video_id in id_list if video_id in failed_set]
+
+
+def _regist_with_selenium(email, password, id_list, max_retries, workers, on_result, failures):
+    workers = min(resolve_worker_count(workers), len(id_list))
+    if workers > 1:
+        return regist_parallel(email, password, id_list, workers, max_retries, on_result, failures)
+
+    results = {}
+
+    def track(video_id, ok):
+        results[video_id] = ok
+        if on_result:
+            on_result(video_id, ok)
+
+    pending_ids = list(id_list)
+    failed_id_list = []
     for attempt in range(max_retries):
         driver = None
         try:
-            driver = selenium_helper.create_chrome_driver()
-            driver.set_window_size(1366, 768)  # Optimized smaller window size for headless mode
+            driver = driver_pool.acquire(SessionCacheService.account_key(email, password))
             login(driver, email, password)
-            failed_id_list = add_videos_to_mylist(driver, id_list)
-            driver.quit()
-            
-            # If we have success (some or all videos registered), return the result
-            if len(failed_id_list) < len(id_list) or attempt == max_retries - 1:
-                return failed_id_list
-                
-            # If all videos failed and we have more retries, continue
-            last_failed_list = failed_id_list
-            
+            failed = add_videos_to_mylist(driver, pending_ids, track, failures)
+            failed_id_list.extend(failed)
+            # A driver that failed every video (e.g. signed out) is not handed to a retry
+            driver_pool.release(driver, healthy=not failed or len(failed) < len(pending_ids))
+            break
         except Exception as e:
             if driver:
-                try:
-                    driver.quit()
-                except:
-                    pass
-            
-            # If this was the last attempt, re-raise the exception
+                driver_pool.release(driver, healthy=False)
+            # Only the videos the dead driver never finished are redone
+            failed_id_list.extend(video_id for video_id in pending_ids if results.get(video_id) is False)
+            pending_ids = [video_id for video_id in pending_ids if video_id not in results]
+
             if attempt == max_retries - 1:
-                raise e
+                # Without any progress the error is the caller's to handle
+                if not results:
+                    raise e
+                for video_id in pending_ids:
+                    failures.setdefault(video_id, failure_service.DRIVER_DEAD)
+                failed_id_list.extend(pending_ids)
+                break
             
-            print(f"Attempt {attempt + 1} failed with exception, retrying...")
-    
-    # Return the last failed list if all retries exhausted
-    return last_failed_list
+            print(f"Attempt {attempt + 1} failed with exception ({e}), "
+                  f"restarting with {len(pending_ids)} videos left...")
+
+    failed_set = set(failed_id_list)
+    return [video_id for video_id in id_list if video_id in failed_set]
+
+
+def _available_memory_mb():
+    """
+    Return the memory (MB) available to this process.
+
+    Uses the Lambda memory size when running on Lambda, falling back to the
+    physical memory reported by the OS. Returns None when it cannot be read.
+    """
+    lambda_memory = os.environ.get("AWS_LAMBDA_FUNCTION_MEMORY_SIZE")
+    if lambda_memory:
+        try:
+            return int(lambda_memory)
+        except ValueError:
+            pass
+    try:
+        return os.sysconf("SC_PHYS_PAGES") * os.sysconf("SC_PAGE_SIZE") // (1024 * 1024)
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+def resolve_worker_count(requested=None):
+    """
+    Resolve how many Chrome workers regist() may run in parallel.
+
+    Args:
+        requested: Desired worker count. Defaults to the REGIST_WORKERS
+            environment variable, or 1 (serial mode) when unset.
+
+    Returns:
+        Worker count capped by MAX_THREADS and by available memory (at least 1)
+    """
+    if requested is None:
+        try:
+            requested = int(os.environ.get("REGIST_WORKERS", "1"))
+        except ValueError:
+            requested = 1
+
+    workers = max(1, min(requested, MAX_THREADS))
+
+    memory_mb = _available_memory_mb()
+    if memory_mb is not None:
+        memory_cap = max(1, (memory_mb - BASE_MEMORY_MB) // CHROME_MEMORY_MB)
+        workers = min(workers, memory_cap)
+
+    return workers
+
+
+def _regist_worker(email, password, work_queue, failed_id_list, lock, max_retries, on_result=None,
+                   failures=None):
+    """
+    Worker loop for parallel registration.
+
+    Each worker owns one logged-in driver and pulls video IDs from the shared
+    queue until it is empty. If the driver dies, the in-flight ID is recorded
+    as failed and the worker restarts with a fresh driver (up to max_retries
+    times) so a crash never affects the other workers.
+    """
+    restarts = 0
+    while True:
+        driver = None
+        healthy = False
+        try:
+            driver = driver_pool.acquire(SessionCacheService.account_key(email, password))
+            login(driver, email, password)
+
+            while True:
+                try:
+                    video_id = work_queue.get_nowait()
+                except queue.Empty:
+                    healthy = True
+                    return
+
+                try:
+                    failed = add_videos_to_mylist(driver, [video_id], on_result, failures)
+                except Exception:
+                    with lock:
+                        failed_id_list.append(video_id)
+                        if failures is not None:
+                            failures.setdefault(video_id, failure_service.DRIVER_DEAD)
+                    if on_result:
+                        on_result(video_id, False)
+                    raise
+
+                if failed:
+                    with lock:
+                        failed_id_list.extend(failed)
+
+        except Exception as e:
+            restarts += 1
+            if restarts >= max_retries:
+                print(f"Worker gave up after {restarts} driver failures: {e}")
+                return
+            print(f"Worker driver failed ({e}), restarting...")
+        finally:
+            if driver:
+                driver_pool.release(driver, healthy)
+
+
+def regist_parallel(email, password, id_list, workers, max_retries=3, on_result=None, failures=None):
+    """
+    Register videos to mylist using several logged-in drivers in parallel.
+
+    Video IDs are distributed through a shared work queue, so a slow video only
+    delays the worker handling it.
+
+    Args:
+        email: User email
+        password: User password
+        id_list: List of video IDs to register
+        workers: Number of parallel drivers
+        max_retries: Maximum driver restarts per worker
+        on_result: Optional callback(video_id, ok), called from worker threads
+        failures: Optional dict that receives the failure reason of each failed video
+
+    Returns:
+        List of video IDs that failed to register (in id_list order)
+    """
+    work_queue = queue.Queue()
+    for video_id in id_list:
+        work_queue.put(video_id)
+
+    failed_id_list = []
+    lock = threading.Lock()
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(_regist_worker, email, password, work_queue, failed_id_list, lock,
+                            max_retries, on_result, failures)
+            for _ in range(workers)
+        ]
+        for future in futures:
+            future.result()
+
+    # IDs left in the queue were never attempted because every worker died
+    while True:
+        try:
+            video_id = work_queue.get_nowait()
+        except queue.Empty:
+            break
+        failed_id_list.append(video_id)
+        if failures is not None:
+            failures.setdefault(video_id, failure_service.DRIVER_DEAD)
+
+    failed_set = set(failed_id_list)
+    return [video_id for video_id in id_list if video_id in failed_set]
 
 
 def delete_and_create_mylist(email, password, title: str = None):
-    driver = selenium_helper.create_chrome_driver()
-    driver.set_window_size(1366, 768)  # Optimized smaller window size for headless mode
-    login(driver, email, password)
-    remove_all_mylist(driver)
-    create_mylist(driver, title)
-    driver.quit()
+    try:
+        with profiler.section("delete_and_create_mylist"):
+            _delete_and_create_mylist(email, password, title)
+    finally:
+        profiler.report("delete_and_create_mylist")
+
+
+def _delete_and_create_mylist(email, password, title):
+    if engines.use_http_engine():
+        try:
+            with engines.HttpEngine() as engine:
+                engine.login(email, password)
+                engine.remove_all_mylist()
+                engine.create_mylist(title)
+                return
+        except Exception as e:
+            print(f"HTTP engine failed ({e}), falling back to Selenium")
+
+    driver = driver_pool.acquire(SessionCacheService.account_key(email, password))
+    healthy = False
+    try:
+        login(driver, email, password)
+        remove_all_mylist(driver)
+        create_mylist(driver, title)
+        healthy = True
+    finally:
+        driver_pool.release(driver, healthy)
+
+
+def prepare_sync_mylist(email, password, id_list, title: str = None):
+    """
+    Differential alternative to delete_and_create_mylist().
+
+    Returns:
+        Video IDs that still have to be registered
+    """
+    try:
+        with profiler.section("prepare_sync_mylist"):
+            return _prepare_sync_mylist(email, password, id_list, title)
+    finally:
+        profiler.report("prepare_sync_mylist")
+
+
+def _prepare_sync_mylist(email, password, id_list, title):
+    if engines.use_http_engine():
+        try:
+            with engines.HttpEngine() as engine:
+                engine.login(email, password)
+                return engine.sync_mylist(id_list, title)
+        except Exception as e:
+            print(f"HTTP engine failed ({e}), falling back to Selenium")
+
+    driver = driver_pool.acquire(SessionCacheService.account_key(email, password))
+    healthy = False
+    try:
+        login(driver, email, password)
+        ids_to_add = sync_mylist(driver, id_list, title)
+        healthy = True
+        return ids_to_add
+    finally:
+        driver_pool.release(driver, healthy)
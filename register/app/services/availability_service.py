@@ -0,0 +1,209 @@
+import json
+import os
+import threading
+import time
+import xml.etree.ElementTree as ElementTree
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import boto3
+import requests
+from requests.adapters import HTTPAdapter
+
+THUMBINFO_URL = "https://ext.nicovideo.jp/api/getthumbinfo"
+REASON_UNAVAILABLE = "unavailable"
+
+
+class LocalFileAvailabilityStore:
+    """Availability cache persisted as one local JSON file (stand-in for S3)"""
+
+    def __init__(self, path: str = "/tmp/niconico-availability.json"):
+        self.path = path
+
+    def load(self) -> Dict[str, dict]:
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def save(self, entries: Dict[str, dict]) -> None:
+        with open(self.path, "w") as f:
+            json.dump(entries, f)
+
+
+class S3AvailabilityStore:
+    """Availability cache persisted as one S3 object"""
+
+    def __init__(self, bucket: str, key: str = "availability/cache.json"):
+        self.bucket = bucket
+        self.key = key
+        self.client = boto3.client("s3")
+
+    def load(self) -> Dict[str, dict]:
+        try:
+            response = self.client.get_object(Bucket=self.bucket, Key=self.key)
+        except self.client.exceptions.NoSuchKey:
+            return {}
+        return json.loads(response["Body"].read())
+
+    def save(self, entries: Dict[str, dict]) -> None:
+        self.client.put_object(Bucket=self.bucket, Key=self.key, Body=json.dumps(entries).encode("utf-8"))
+
+
+class AvailabilityService:
+    """
+    Service for finding deleted or private videos before the browser loads them.
+
+    Opt-in through AVAILABILITY_CHECK=1. Each ID is resolved through the
+    getthumbinfo endpoint (THUMBINFO_URL) on a thread pool sharing one pooled
+    session. Results are cached for AVAILABILITY_CACHE_TTL seconds in memory
+    and, with AVAILABILITY_CACHE_STORE=s3|local, in a persistent store.
+    Lookup errors count as available, so the browser still gets a chance.
+    """
+
+    DEFAULT_TTL_SECONDS = 6 * 60 * 60
+    MAX_WORKERS = 8
+
+    _memory: Dict[str, dict] = {}
+    _store = None
+    _store_loaded = False
+    _session = None
+    _lock = threading.Lock()
+
+    @staticmethod
+    def is_enabled() -> bool:
+        return os.environ.get("AVAILABILITY_CHECK", "").lower() in ("1", "true")
+
+    @staticmethod
+    def ttl_seconds() -> float:
+        try:
+            return float(os.environ.get("AVAILABILITY_CACHE_TTL", AvailabilityService.DEFAULT_TTL_SECONDS))
+        except ValueError:
+            return AvailabilityService.DEFAULT_TTL_SECONDS
+
+    @staticmethod
+    def get_store():
+        if AvailabilityService._store is not None:
+            return AvailabilityService._store
+
+        store_type = os.environ.get("AVAILABILITY_CACHE_STORE", "").lower()
+        if store_type == "s3" and os.environ.get("S3_BUCKET_NAME"):
+            AvailabilityService._store = S3AvailabilityStore(os.environ["S3_BUCKET_NAME"])
+        elif store_type == "local":
+            AvailabilityService._store = LocalFileAvailabilityStore(
+                os.environ.get("AVAILABILITY_CACHE_FILE", "/tmp/niconico-availability.json")
+            )
+        return AvailabilityService._store
+
+    @staticmethod
+    def set_store(store) -> None:
+        """Override the persistent store (None resets to environment configuration)"""
+        AvailabilityService._store = store
+        AvailabilityService._store_loaded = False
+
+    @staticmethod
+    def clear_memory() -> None:
+        AvailabilityService._memory.clear()
+        AvailabilityService._store_loaded = False
+
+    @staticmethod
+    def _get_session() -> requests.Session:
+        if AvailabilityService._session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=AvailabilityService.MAX_WORKERS)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            AvailabilityService._session = session
+        return AvailabilityService._session
+
+    @staticmethod
+    def fetch(video_id: str) -> Optional[str]:
+        """
+        Resolve one video through getthumbinfo.
+
+        Returns:
+            None when the video is available, otherwise the reason (e.g. "DELETED")
+        """
+        url = os.environ.get("THUMBINFO_URL", THUMBINFO_URL).rstrip("/")
+        response = AvailabilityService._get_session().get(f"{url}/{video_id}", timeout=5)
+        response.raise_for_status()
+        root = ElementTree.fromstring(response.content)
+        if root.get("status") == "ok":
+            return None
+        code = root.findtext("error/code")
+        return code or REASON_UNAVAILABLE
+
+    @staticmethod
+    def _load_store() -> None:
+        store = AvailabilityService.get_store()
+        if store is None or AvailabilityService._store_loaded:
+            return
+        try:
+            for video_id, entry in store.load().items():
+                AvailabilityService._memory.setdefault(video_id, entry)
+        except Exception as e:
+            print(f"Failed to load availability cache: {e}")
+        AvailabilityService._store_loaded = True
+
+    @staticmethod
+    def _save_store() -> None:
+        store = AvailabilityService.get_store()
+        if store is None:
+            return
+        now = time.time()
+        try:
+            store.save({video_id: entry for video_id, entry in AvailabilityService._memory.items()
+                        if entry["expires_at"] > now})
+        except Exception as e:
+            print(f"Failed to save availability cache: {e}")
+
+    @staticmethod
+    def find_unavailable(id_list: List[str]) -> Dict[str, str]:
+        """
+        Return the videos that cannot be added to a mylist.
+
+        Args:
+            id_list: Video IDs to check
+
+        Returns:
+            Mapping of unavailable video ID to reason (empty when the check is disabled)
+        """
+        if not AvailabilityService.is_enabled() or not id_list:
+            return {}
+
+        with AvailabilityService._lock:
+            AvailabilityService._load_store()
+            now = time.time()
+            cached = {video_id: AvailabilityService._memory[video_id] for video_id in id_list
+                      if video_id in AvailabilityService._memory
+                      and AvailabilityService._memory[video_id]["expires_at"] > now}
+
+        def check(video_id):
+            try:
+                return video_id, AvailabilityService.fetch(video_id), True
+            except Exception as e:
+                print(f"Availability check failed for {video_id}: {e}")
+                return video_id, None, False
+
+        to_fetch = [video_id for video_id in dict.fromkeys(id_list) if video_id not in cached]
+        fetched = []
+        if to_fetch:
+            with ThreadPoolExecutor(max_workers=min(AvailabilityService.MAX_WORKERS, len(to_fetch))) as executor:
+                fetched = list(executor.map(check, to_fetch))
+
+        expires_at = time.time() + AvailabilityService.ttl_seconds()
+        with AvailabilityService._lock:
+            for video_id, reason, resolved in fetched:
+                if resolved:
+                    entry = {"reason": reason, "expires_at": expires_at}
+                    AvailabilityService._memory[video_id] = entry
+                    cached[video_id] = entry
+            if any(resolved for _, _, resolved in fetched):
+                AvailabilityService._save_store()
+
+        unavailable = {video_id: cached[video_id]["reason"] for video_id in id_list
+                       if video_id in cached and cached[video_id]["reason"]}
+        if unavailable:
+            print(f"Availability check: {len(unavailable)} of {len(id_list)} videos unavailable")
+        return unavailable
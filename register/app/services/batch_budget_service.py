@@ -0,0 +1,89 @@
+import os
+from typing import Any, Optional
+
+
+class BatchBudgetService:
+    """Service for sizing chain batches from the Lambda's remaining execution time"""
+
+    # 実測値が無いときに仮定する 1 動画あたりの処理時間 (ms)
+    DEFAULT_PER_VIDEO_MS = 8000.0
+    # タイムアウト前に次のチェーンを呼び出すための余裕 (ms)
+    DEFAULT_SAFETY_MARGIN_MS = 60000
+    # 新しい実測値を推定値に反映する割合 (指数移動平均)
+    SMOOTHING = 0.3
+
+    # Kept at class level so warm containers reuse the estimate
+    _per_video_ms: Optional[float] = None
+
+    @staticmethod
+    def remaining_time_ms(context: Any) -> Optional[int]:
+        """
+        Return the remaining execution time from a Lambda context.
+
+        Returns:
+            Remaining milliseconds, or None when the context cannot report it
+        """
+        if context is None or not hasattr(context, "get_remaining_time_in_millis"):
+            return None
+        return context.get_remaining_time_in_millis()
+
+    @staticmethod
+    def safety_margin_ms() -> int:
+        return int(os.environ.get("CHAIN_SAFETY_MARGIN_MS", BatchBudgetService.DEFAULT_SAFETY_MARGIN_MS))
+
+    @staticmethod
+    def per_video_ms() -> float:
+        """Return the current per-video latency estimate"""
+        return BatchBudgetService._per_video_ms or BatchBudgetService.DEFAULT_PER_VIDEO_MS
+
+    @staticmethod
+    def seed(per_video_ms: Optional[float]) -> None:
+        """
+        Seed the estimate with a value carried over from the previous chain hop.
+        A measurement already taken in this container takes precedence.
+        """
+        if per_video_ms and BatchBudgetService._per_video_ms is None:
+            BatchBudgetService._per_video_ms = float(per_video_ms)
+
+    @staticmethod
+    def record(video_count: int, elapsed_ms: float) -> None:
+        """
+        Update the per-video estimate with a measured batch.
+
+        Args:
+            video_count: Number of videos processed
+            elapsed_ms: Wall time the batch took
+        """
+        if video_count <= 0:
+            return
+        measured = elapsed_ms / video_count
+        current = BatchBudgetService._per_video_ms
+        if current is None:
+            BatchBudgetService._per_video_ms = measured
+        else:
+            BatchBudgetService._per_video_ms = (
+                BatchBudgetService.SMOOTHING * measured + (1 - BatchBudgetService.SMOOTHING) * current
+            )
+
+    @staticmethod
+    def next_batch_size(remaining_ms: int, pending_count: int, workers: int = 1) -> int:
+        """
+        Return how many videos fit into the remaining time budget.
+
+        Args:
+            remaining_ms: Remaining Lambda execution time
+            pending_count: Number of videos still waiting
+            workers: Number of parallel drivers processing the batch
+
+        Returns:
+            Number of videos to process next (0 when the budget is used up)
+        """
+        budget_ms = remaining_ms - BatchBudgetService.safety_margin_ms()
+        if budget_ms <= 0:
+            return 0
+        fits = int(budget_ms * max(1, workers) / BatchBudgetService.per_video_ms())
+        return max(0, min(pending_count, fits))
+
+    @staticmethod
+    def reset() -> None:
+        BatchBudgetService._per_video_ms = None
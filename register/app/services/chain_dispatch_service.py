@@ -0,0 +1,193 @@
+import json
+import os
+import time
+from typing import Any, Dict, List
+
+
+class LambdaDispatcher:
+    """Invoke the register Lambda asynchronously (InvocationType=Event)"""
+
+    name = "lambda"
+
+    def __init__(self, function_name: str):
+        import boto3
+
+        self.function_name = function_name
+        self.client = boto3.client("lambda")
+
+    def dispatch(self, payload: Dict[str, Any]) -> None:
+        # Wrap the payload like an API Gateway event so lambda_handler parses it unchanged
+        response = self.client.invoke(
+            FunctionName=self.function_name,
+            InvocationType="Event",
+            Payload=json.dumps({"body": json.dumps(payload)}).encode("utf-8")
+        )
+        if response.get("StatusCode") != 202:
+            raise RuntimeError(f"Async invoke returned {response.get('StatusCode')}")
+
+
+class SqsDispatcher:
+    """Send the next hop to an SQS queue that triggers the register Lambda"""
+
+    name = "sqs"
+
+    def __init__(self, queue_url: str):
+        import boto3
+
+        self.queue_url = queue_url
+        self.client = boto3.client("sqs")
+
+    def dispatch(self, payload: Dict[str, Any]) -> None:
+        self.client.send_message(QueueUrl=self.queue_url, MessageBody=json.dumps(payload))
+
+
+class UnacknowledgedDispatchError(RuntimeError):
+    """Raised when a hop was sent but not acknowledged, so it may or may not run"""
+
+
+class HttpDispatcher:
+    """
+    POST the next hop to REGISTER_LAMBDA_ENDPOINT through a pooled session.
+
+    The deployed endpoint (the register Lambda's URL) runs the hop before it
+    answers, so the response is not awaited: once the request is sent, a
+    read timeout means the endpoint took it and the Lambda keeps running the
+    hop after the client disconnects. Connection errors and error statuses
+    returned within the timeout are failures.
+
+    With asynchronous=True (CHAIN_DISPATCH_HTTP_ASYNC, for an API Gateway
+    async integration mapping X-Amz-Invocation-Type: Event) the hop only
+    counts as handed off when the endpoint answers 202 Accepted.
+    """
+
+    name = "http"
+
+    def __init__(self, endpoint: str, timeout: float = 3, asynchronous: bool = False):
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.endpoint = endpoint
+        self.timeout = timeout
+        self.asynchronous = asynchronous
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=2)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def dispatch(self, payload: Dict[str, Any]) -> None:
+        from requests.exceptions import ReadTimeout
+
+        headers = {"Content-Type": "application/json"}
+        if self.asynchronous:
+            headers["X-Amz-Invocation-Type"] = "Event"
+        try:
+            response = self.session.post(self.endpoint, json=payload, headers=headers, timeout=self.timeout)
+        except ReadTimeout as e:
+            if self.asynchronous:
+                raise UnacknowledgedDispatchError(
+                    f"Chain endpoint did not acknowledge the hop within {self.timeout}s"
+                ) from e
+            print(f"Chain endpoint is running the hop (no response within {self.timeout}s)")
+            return
+        if self.asynchronous and response.status_code != 202:
+            raise RuntimeError(f"Chain endpoint returned {response.status_code} instead of 202 Accepted")
+        if not self.asynchronous and response.status_code >= 400:
+            raise RuntimeError(f"Chain endpoint returned {response.status_code}")
+
+
+class LocalDispatcher:
+    """Collect dispatched payloads in memory (stand-in for tests and local runs)"""
+
+    name = "local"
+
+    def __init__(self):
+        self.payloads: List[Dict[str, Any]] = []
+
+    def dispatch(self, payload: Dict[str, Any]) -> None:
+        self.payloads.append(payload)
+
+
+class ChainDispatchService:
+    """
+    Service for handing a chain's next hop to the register Lambda without waiting for it.
+
+    CHAIN_DISPATCH_BACKEND selects the backend (lambda, sqs, http or local).
+    When unset, the first configured one of REGISTER_LAMBDA_FUNCTION_NAME,
+    CHAIN_QUEUE_URL and REGISTER_LAMBDA_ENDPOINT is used.
+    """
+
+    MAX_ATTEMPTS = 3
+    BACKOFF_SECONDS = 0.2
+
+    _dispatcher = None
+
+    @staticmethod
+    def get_dispatcher():
+        if ChainDispatchService._dispatcher is not None:
+            return ChainDispatchService._dispatcher
+
+        backend = os.environ.get("CHAIN_DISPATCH_BACKEND", "").lower()
+        function_name = os.environ.get("REGISTER_LAMBDA_FUNCTION_NAME")
+        queue_url = os.environ.get("CHAIN_QUEUE_URL")
+        endpoint = os.environ.get("REGISTER_LAMBDA_ENDPOINT")
+
+        if backend == "local":
+            dispatcher = LocalDispatcher()
+        elif function_name and backend in ("", "lambda"):
+            dispatcher = LambdaDispatcher(function_name)
+        elif queue_url and backend in ("", "sqs"):
+            dispatcher = SqsDispatcher(queue_url)
+        elif endpoint and backend in ("", "http"):
+            dispatcher = HttpDispatcher(
+                endpoint,
+                float(os.environ.get("CHAIN_DISPATCH_TIMEOUT", "3")),
+                os.environ.get("CHAIN_DISPATCH_HTTP_ASYNC", "").lower() in ("1", "true")
+            )
+        else:
+            return None
+
+        # Cached for the container's lifetime so warm invocations reuse connections
+        ChainDispatchService._dispatcher = dispatcher
+        return dispatcher
+
+    @staticmethod
+    def set_dispatcher(dispatcher) -> None:
+        """Override the dispatcher (None resets to environment configuration)"""
+        ChainDispatchService._dispatcher = dispatcher
+
+    @staticmethod
+    def dispatch(payload: Dict[str, Any]) -> bool:
+        """
+        Enqueue the next chain hop, retrying transient failures with backoff.
+
+        Args:
+            payload: Request body for the next register Lambda invocation
+
+        Returns:
+            True when the hop was handed off; False when it failed or its
+            hand-off could not be confirmed
+        """
+        dispatcher = ChainDispatchService.get_dispatcher()
+        if dispatcher is None:
+            print("No chain dispatch backend configured, cannot chain request")
+            return False
+
+        for attempt in range(ChainDispatchService.MAX_ATTEMPTS):
+            try:
+                start = time.monotonic()
+                dispatcher.dispatch(payload)
+                print(f"Dispatched chain hop via {dispatcher.name} in "
+                      f"{(time.monotonic() - start) * 1000:.0f} ms")
+                return True
+            except UnacknowledgedDispatchError as e:
+                # Sending it again could run the same hop twice
+                print(f"Chain hop via {dispatcher.name} was not acknowledged: {e}")
+                return False
+            except Exception as e:
+                if attempt == ChainDispatchService.MAX_ATTEMPTS - 1:
+                    print(f"Failed to dispatch chain hop via {dispatcher.name}: {e}")
+                    return False
+                delay = ChainDispatchService.BACKOFF_SECONDS * (2 ** attempt)
+                print(f"Chain dispatch failed ({e}), retrying in {delay:.1f}s...")
+                time.sleep(delay)
+        return False
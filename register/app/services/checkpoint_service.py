@@ -0,0 +1,311 @@
+import glob
+import json
+import os
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+
+class LocalFileCheckpointStore:
+    """Checkpoint store backed by local files (stand-in for S3 in tests and local runs)"""
+
+    def __init__(self, directory: str = "/tmp/niconico-checkpoints"):
+        self.directory = directory
+        self._lock = threading.Lock()
+
+    def _path(self, chain_id: str, suffix: str) -> str:
+        return os.path.join(self.directory, f"{chain_id}.{suffix}")
+
+    def put_state(self, chain_id: str, state: Dict[str, Any]) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self._path(chain_id, "state.json"), "w") as f:
+            json.dump(state, f)
+
+    def get_state(self, chain_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._path(chain_id, "state.json")) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def put_page(self, chain_id: str, generation: int, index: int, ids: List[str]) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self._path(chain_id, f"page-{generation}-{index}.json"), "w") as f:
+            json.dump(ids, f)
+
+    def get_page(self, chain_id: str, generation: int, index: int) -> List[str]:
+        with open(self._path(chain_id, f"page-{generation}-{index}.json")) as f:
+            return json.load(f)
+
+    def append_result(self, chain_id: str, video_id: str, ok: bool) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        with self._lock, open(self._path(chain_id, "results.jsonl"), "a") as f:
+            f.write(json.dumps({"id": video_id, "ok": ok}) + "\n")
+
+    def get_results(self, chain_id: str) -> Dict[str, bool]:
+        results = {}
+        try:
+            with open(self._path(chain_id, "results.jsonl")) as f:
+                for line in f:
+                    if line.strip():
+                        record = json.loads(line)
+                        results[record["id"]] = record["ok"]
+        except FileNotFoundError:
+            pass
+        return results
+
+    def delete(self, chain_id: str) -> None:
+        for path in glob.glob(self._path(chain_id, "*")):
+            os.remove(path)
+
+
+class S3CheckpointStore:
+    """
+    Checkpoint store backed by S3.
+
+    Each result is its own object (results/<video_id>.ok or .failed), so
+    recording a result is a single PUT and loading only needs a key listing.
+    """
+
+    def __init__(self, bucket: str, prefix: str = "checkpoints/"):
+        import boto3
+
+        self.bucket = bucket
+        self.prefix = prefix
+        self.client = boto3.client("s3")
+
+    def _key(self, chain_id: str, name: str) -> str:
+        return f"{self.prefix}{chain_id}/{name}"
+
+    def put_state(self, chain_id: str, state: Dict[str, Any]) -> None:
+        self.client.put_object(Bucket=self.bucket, Key=self._key(chain_id, "state.json"),
+                               Body=json.dumps(state).encode("utf-8"))
+
+    def get_state(self, chain_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            response = self.client.get_object(Bucket=self.bucket, Key=self._key(chain_id, "state.json"))
+        except self.client.exceptions.NoSuchKey:
+            return None
+        return json.loads(response["Body"].read())
+
+    def put_page(self, chain_id: str, generation: int, index: int, ids: List[str]) -> None:
+        self.client.put_object(Bucket=self.bucket, Key=self._key(chain_id, f"pages/{generation}/{index}.json"),
+                               Body=json.dumps(ids).encode("utf-8"))
+
+    def get_page(self, chain_id: str, generation: int, index: int) -> List[str]:
+        response = self.client.get_object(Bucket=self.bucket,
+                                          Key=self._key(chain_id, f"pages/{generation}/{index}.json"))
+        return json.loads(response["Body"].read())
+
+    def append_result(self, chain_id: str, video_id: str, ok: bool) -> None:
+        suffix = "ok" if ok else "failed"
+        self.client.put_object(Bucket=self.bucket, Key=self._key(chain_id, f"results/{video_id}.{suffix}"), Body=b"")
+
+    def _list_keys(self, prefix: str):
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=prefix):
+            for item in page.get("Contents", []):
+                yield item["Key"]
+
+    def get_results(self, chain_id: str) -> Dict[str, bool]:
+        results = {}
+        for key in self._list_keys(self._key(chain_id, "results/")):
+            video_id, _, suffix = key.rsplit("/", 1)[1].rpartition(".")
+            # A success recorded by a retry wins over an earlier failure
+            results[video_id] = results.get(video_id, False) or suffix == "ok"
+        return results
+
+    def delete(self, chain_id: str) -> None:
+        keys = list(self._list_keys(self._key(chain_id, "")))
+        for start in range(0, len(keys), 1000):
+            self.client.delete_objects(Bucket=self.bucket, Delete={
+                "Objects": [{"Key": key} for key in keys[start:start + 1000]]
+            })
+
+
+class IdCursor:
+    """
+    Lazy view of a chain's stored ID list, starting at offset.
+
+    Supports what the batch loop needs: len(), cursor[:n] (loads only the
+    pages covering the slice) and cursor[n:] (a new cursor; nothing loaded).
+    """
+
+    def __init__(self, chain_id: str, offset: int, total: int, page_size: int, generation: int = 0,
+                 pages: Dict[int, List[str]] = None):
+        self.chain_id = chain_id
+        self.generation = generation
+        self.offset = offset
+        self.total = total
+        self.page_size = page_size
+        self._pages = {} if pages is None else pages
+
+    def __len__(self) -> int:
+        return max(0, self.total - self.offset)
+
+    def __iter__(self):
+        return iter(self[:len(self)])
+
+    def _page(self, index: int) -> List[str]:
+        if index not in self._pages:
+            self._pages[index] = CheckpointService.get_store().get_page(self.chain_id, self.generation, index)
+        return self._pages[index]
+
+    def __getitem__(self, item):
+        if not isinstance(item, slice) or item.step not in (None, 1):
+            raise TypeError("IdCursor only supports [:n] and [n:] slices")
+
+        start = min(self.offset + (item.start or 0), self.total)
+        if item.stop is None:
+            return IdCursor(self.chain_id, start, self.total, self.page_size, self.generation, self._pages)
+
+        stop = min(self.offset + item.stop, self.total)
+        ids = []
+        if stop > start:
+            for index in range(start // self.page_size, (stop - 1) // self.page_size + 1):
+                base = index * self.page_size
+                ids.extend(self._page(index)[max(start - base, 0):stop - base])
+        return ids
+
+
+class CheckpointService:
+    """
+    Service for checkpointing chain progress so a failed step can be resumed.
+
+    CHECKPOINT_STORE selects the backend: "s3" (uses S3_BUCKET_NAME) or
+    "local" (uses CHECKPOINT_DIR). Without a backend every call is a no-op.
+    """
+
+    PAGE_SIZE = 100
+
+    _store = None
+
+    @staticmethod
+    def new_chain_id() -> str:
+        return uuid.uuid4().hex
+
+    @staticmethod
+    def get_store():
+        if CheckpointService._store is not None:
+            return CheckpointService._store
+
+        store_type = os.environ.get("CHECKPOINT_STORE", "").lower()
+        if store_type == "s3" and os.environ.get("S3_BUCKET_NAME"):
+            CheckpointService._store = S3CheckpointStore(os.environ["S3_BUCKET_NAME"])
+        elif store_type == "local":
+            CheckpointService._store = LocalFileCheckpointStore(
+                os.environ.get("CHECKPOINT_DIR", "/tmp/niconico-checkpoints")
+            )
+        return CheckpointService._store
+
+    @staticmethod
+    def is_enabled() -> bool:
+        return CheckpointService.get_store() is not None
+
+    @staticmethod
+    def set_store(store) -> None:
+        """Override the store (None resets to environment configuration)"""
+        CheckpointService._store = store
+
+    @staticmethod
+    def save_state(chain_id: str, state: Dict[str, Any], raise_errors: bool = False) -> None:
+        """
+        Save the chain's request parameters, needed to resume it later.
+
+        Args:
+            chain_id: Chain identifier
+            state: email, encrypted password, subscription, title, the ID
+                list's total/page_size/generation from save_ids and whether
+                the mylist has been prepared
+            raise_errors: Raise instead of logging when the write fails, for
+                writes the rest of the chain depends on
+        """
+        store = CheckpointService.get_store()
+        if store is None or not chain_id:
+            return
+        try:
+            store.put_state(chain_id, state)
+        except Exception as e:
+            if raise_errors:
+                raise
+            print(f"Failed to save chain state: {e}")
+
+    @staticmethod
+    def save_ids(chain_id: str, id_list: List[str], generation: int = 0) -> Dict[str, int]:
+        """
+        Store the chain's ID list once, in pages, so hops only carry an offset.
+
+        A list replacing the current one is written under a new generation,
+        so the pages in use are never modified; the chain switches to it only
+        when the returned entries are saved with the state.
+
+        Returns:
+            "total", "page_size" and "generation" entries to keep in the chain state
+        """
+        store = CheckpointService.get_store()
+        page_size = CheckpointService.PAGE_SIZE
+        pages = [id_list[start:start + page_size] for start in range(0, len(id_list), page_size)]
+        with ThreadPoolExecutor(max_workers=10) as executor:
+            list(executor.map(lambda page: store.put_page(chain_id, generation, page[0], page[1]),
+                              enumerate(pages)))
+        return {"total": len(id_list), "page_size": page_size, "generation": generation}
+
+    @staticmethod
+    def cursor(chain_id: str, state: Dict[str, Any], offset: int = 0) -> IdCursor:
+        """Return a lazy view of the stored ID list starting at offset"""
+        return IdCursor(chain_id, offset, state["total"], state["page_size"], state["generation"])
+
+    @staticmethod
+    def load_state(chain_id: str) -> Optional[Dict[str, Any]]:
+        store = CheckpointService.get_store()
+        if store is None or not chain_id:
+            return None
+        return store.get_state(chain_id)
+
+    @staticmethod
+    def record(chain_id: str, video_id: str, ok: bool) -> None:
+        """
+        Record the result of one video.
+
+        Args:
+            chain_id: Chain identifier
+            video_id: Processed video ID
+            ok: Whether the video was registered
+        """
+        store = CheckpointService.get_store()
+        if store is None or not chain_id:
+            return
+        try:
+            store.append_result(chain_id, video_id, ok)
+        except Exception as e:
+            # A missing checkpoint only means the video is redone on recovery
+            print(f"Failed to checkpoint {video_id}: {e}")
+
+    @staticmethod
+    def load_results(chain_id: str) -> Dict[str, bool]:
+        """
+        Load the recorded results of a chain.
+
+        Returns:
+            Mapping of video ID to whether it was registered
+        """
+        store = CheckpointService.get_store()
+        if store is None or not chain_id:
+            return {}
+        try:
+            return store.get_results(chain_id)
+        except Exception as e:
+            print(f"Failed to load checkpoints: {e}")
+            return {}
+
+    @staticmethod
+    def clear(chain_id: str) -> None:
+        """Remove every checkpoint of a finished chain"""
+        store = CheckpointService.get_store()
+        if store is None or not chain_id:
+            return
+        try:
+            store.delete(chain_id)
+        except Exception as e:
+            print(f"Failed to clear checkpoints: {e}")
@@ -0,0 +1,161 @@
+import os
+import sqlite3
+import threading
+from typing import List, Optional
+
+
+class SQLiteCompletionStore:
+    """
+    Completion store backed by SQLite (stand-in for DynamoDB in tests and local runs).
+
+    The default in-memory database only sees chunks handled by this container.
+    """
+
+    def __init__(self, path: str = ":memory:"):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute("CREATE TABLE IF NOT EXISTS batches (uuid TEXT PRIMARY KEY, remaining INTEGER)")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS failures (uuid TEXT, video_id TEXT, "
+                               "PRIMARY KEY (uuid, video_id))")
+
+    def increment(self, uuid: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("INSERT INTO batches VALUES (?, 1) "
+                               "ON CONFLICT(uuid) DO UPDATE SET remaining = remaining + 1", (uuid,))
+
+    def decrement(self, uuid: str, failed_ids: List[str], chunk_count: Optional[int]) -> tuple:
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR IGNORE INTO batches VALUES (?, ?)", (uuid, chunk_count or 0))
+            self._conn.execute("UPDATE batches SET remaining = remaining - 1 WHERE uuid = ?", (uuid,))
+            self._conn.executemany("INSERT OR IGNORE INTO failures VALUES (?, ?)",
+                                   [(uuid, video_id) for video_id in failed_ids])
+            remaining = self._conn.execute("SELECT remaining FROM batches WHERE uuid = ?", (uuid,)).fetchone()[0]
+            all_failed = [row[0] for row in self._conn.execute(
+                "SELECT video_id FROM failures WHERE uuid = ?", (uuid,))]
+        return remaining, all_failed
+
+    def delete(self, uuid: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM batches WHERE uuid = ?", (uuid,))
+            self._conn.execute("DELETE FROM failures WHERE uuid = ?", (uuid,))
+
+
+class DynamoDBCompletionStore:
+    """
+    Completion store backed by a DynamoDB table with a "uuid" string partition key.
+
+    The counter and the failure set are updated in one atomic UpdateItem, so
+    exactly one chunk observes remaining == 0 even across containers.
+    """
+
+    def __init__(self, table_name: str):
+        import boto3
+
+        self.table_name = table_name
+        self.client = boto3.client("dynamodb")
+
+    def increment(self, uuid: str) -> None:
+        self.client.update_item(
+            TableName=self.table_name,
+            Key={"uuid": {"S": uuid}},
+            UpdateExpression="ADD remaining :one",
+            ExpressionAttributeValues={":one": {"N": "1"}}
+        )
+
+    def decrement(self, uuid: str, failed_ids: List[str], chunk_count: Optional[int]) -> tuple:
+        update = "SET remaining = if_not_exists(remaining, :count) - :one"
+        values = {":count": {"N": str(chunk_count or 0)}, ":one": {"N": "1"}}
+        if failed_ids:
+            # DynamoDB string sets cannot be empty
+            update += " ADD failed_ids :failed"
+            values[":failed"] = {"SS": list(set(failed_ids))}
+
+        response = self.client.update_item(
+            TableName=self.table_name,
+            Key={"uuid": {"S": uuid}},
+            UpdateExpression=update,
+            ExpressionAttributeValues=values,
+            ReturnValues="ALL_NEW"
+        )
+        item = response["Attributes"]
+        return int(item["remaining"]["N"]), item.get("failed_ids", {}).get("SS", [])
+
+    def delete(self, uuid: str) -> None:
+        self.client.delete_item(TableName=self.table_name, Key={"uuid": {"S": uuid}})
+
+
+class CompletionTrackerService:
+    """
+    Service for tracking when every chunk of a batch registration has finished.
+
+    Each batch UUID has a "chunks remaining" counter and the union of failed IDs.
+    With chunk_count the counter starts at the number of chunks; without it,
+    chunks are counted in on start() and out on finish().
+
+    COMPLETION_TRACKER_TABLE selects DynamoDB; otherwise SQLite is used
+    (COMPLETION_TRACKER_DB, in-memory by default). SQLite only counts the
+    chunks of one container, so a Lambda without the table logs a warning.
+    """
+
+    _store = None
+
+    @staticmethod
+    def get_store():
+        if CompletionTrackerService._store is None:
+            table_name = os.environ.get("COMPLETION_TRACKER_TABLE")
+            if table_name:
+                CompletionTrackerService._store = DynamoDBCompletionStore(table_name)
+            else:
+                if os.environ.get("AWS_LAMBDA_FUNCTION_NAME"):
+                    print("WARNING: COMPLETION_TRACKER_TABLE is not set; batch completion is only tracked "
+                          "per container, so chunks handled by other containers are never counted")
+                CompletionTrackerService._store = SQLiteCompletionStore(
+                    os.environ.get("COMPLETION_TRACKER_DB", ":memory:")
+                )
+        return CompletionTrackerService._store
+
+    @staticmethod
+    def set_store(store) -> None:
+        """Override the store (None resets to environment configuration)"""
+        CompletionTrackerService._store = store
+
+    @staticmethod
+    def start(uuid: str, chunk_count: Optional[int] = None) -> None:
+        """
+        Mark a chunk as in progress.
+
+        Args:
+            uuid: Unique identifier for the batch
+            chunk_count: Total number of chunks in the batch, when known
+        """
+        if not uuid or chunk_count:
+            return
+        CompletionTrackerService.get_store().increment(uuid)
+
+    @staticmethod
+    def finish(uuid: str, failed_ids: List[str], chunk_count: Optional[int] = None) -> Optional[List[str]]:
+        """
+        Mark a chunk as finished and record its failed IDs.
+
+        Args:
+            uuid: Unique identifier for the batch
+            failed_ids: IDs that failed in this chunk
+            chunk_count: Total number of chunks in the batch, when known
+
+        Returns:
+            Failed IDs of every chunk when this was the last chunk, otherwise None
+        """
+        if not uuid:
+            # Not part of a batch: the chunk is the whole request
+            return list(failed_ids)
+
+        remaining, all_failed = CompletionTrackerService.get_store().decrement(uuid, failed_ids, chunk_count)
+        if remaining != 0:
+            return None
+
+        CompletionTrackerService.get_store().delete(uuid)
+        failed_set = set(all_failed)
+        # Keep this chunk's order, then the other chunks' IDs
+        ordered = [video_id for video_id in failed_ids if video_id in failed_set]
+        return list(dict.fromkeys(ordered + sorted(failed_set - set(ordered))))
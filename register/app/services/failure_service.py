@@ -0,0 +1,94 @@
+import re
+from typing import Dict, List, Optional
+
+TIMEOUT = "timeout"
+ELEMENT_MISSING = "element_missing"
+UNAVAILABLE = "unavailable"
+MYLIST_FULL = "mylist_full"
+RATE_LIMITED = "rate_limited"
+SERVER_ERROR = "server_error"
+DRIVER_DEAD = "driver_dead"
+UNKNOWN = "unknown"
+
+# Worth another attempt later; the rest can never succeed for this request
+RETRYABLE_REASONS = {TIMEOUT, ELEMENT_MISSING, RATE_LIMITED, SERVER_ERROR, DRIVER_DEAD, UNKNOWN}
+
+# Title of the watch page shown for deleted or private videos
+UNAVAILABLE_PAGE_TITLE_PATTERN = re.compile(r"視聴できません")
+# nvapi error codes returned when a mylist cannot take more items
+MYLIST_FULL_ERROR_PATTERN = re.compile(r'"errorCode"\s*:\s*"[A-Z_]*(?:MAX|LIMIT)[A-Z_]*"')
+
+# Browser exceptions are matched by class name, so classifying an HTTP engine
+# failure never imports selenium
+DRIVER_DEAD_EXCEPTIONS = {"InvalidSessionIdException", "NoSuchWindowException"}
+# ElementWaitTimeout is selenium_helper's timeout of a wait for a UI element
+ELEMENT_MISSING_EXCEPTIONS = {"ElementWaitTimeout", "NoSuchElementException", "StaleElementReferenceException",
+                              "ElementClickInterceptedException", "ElementNotInteractableException"}
+BROWSER_EXCEPTION_MODULES = ("selenium.", "app.helpers.selenium_helper")
+
+
+def _browser_exception_names(error: Exception) -> set:
+    """Names of the selenium (and selenium_helper) exception classes error is an instance of"""
+    return {cls.__name__ for cls in type(error).__mro__ if cls.__module__.startswith(BROWSER_EXCEPTION_MODULES)}
+
+
+class FailureService:
+    """Service for classifying why a video could not be registered"""
+
+    @staticmethod
+    def classify(error: Exception, page_title: Optional[str] = None) -> str:
+        """
+        Classify a registration failure.
+
+        Args:
+            error: Exception raised while adding the video
+            page_title: Title of the page the browser was on, when available
+
+        Returns:
+            One of the failure reasons defined in this module
+        """
+        status_code = getattr(error, "status_code", None)
+        if status_code == 429:
+            return RATE_LIMITED
+        if MYLIST_FULL_ERROR_PATTERN.search(str(error)):
+            return MYLIST_FULL
+        if status_code in (403, 404, 410):
+            return UNAVAILABLE
+        if page_title and UNAVAILABLE_PAGE_TITLE_PATTERN.search(page_title):
+            return UNAVAILABLE
+        names = _browser_exception_names(error)
+        if names & DRIVER_DEAD_EXCEPTIONS:
+            return DRIVER_DEAD
+        if names & ELEMENT_MISSING_EXCEPTIONS:
+            return ELEMENT_MISSING
+        if "TimeoutException" in names:
+            # Page loads, script runs and network waits
+            return TIMEOUT
+        if status_code is not None and status_code >= 500:
+            return SERVER_ERROR
+        return UNKNOWN
+
+    @staticmethod
+    def is_retryable(reason: Optional[str]) -> bool:
+        return reason in RETRYABLE_REASONS
+
+    @staticmethod
+    def split(failed_ids: List[str], failures: Dict[str, str]):
+        """
+        Split failed IDs into retryable and permanent failures.
+
+        IDs without a recorded reason (e.g. re-reported from a checkpoint)
+        count as permanent, since they already had their attempt.
+
+        Returns:
+            Tuple of (retryable IDs, mapping of permanently failed ID to reason)
+        """
+        retryable = []
+        permanent = {}
+        for video_id in failed_ids:
+            reason = failures.get(video_id)
+            if FailureService.is_retryable(reason):
+                retryable.append(video_id)
+            else:
+                permanent[video_id] = reason or UNKNOWN
+        return retryable, permanent
@@ -1,19 +1,33 @@
 import json
 import os
-import requests
+from collections import Counter
+
+# 失敗理由 (failure_service) の通知用表示名
+REASON_LABELS = {
+    "invalid_format": "ID形式不正",
+    "unavailable": "削除・非公開",
+    "mylist_full": "マイリスト上限",
+    "rate_limited": "アクセス制限",
+    "server_error": "サーバーエラー",
+    "timeout": "タイムアウト",
+    "element_missing": "画面要素なし",
+    "driver_dead": "ブラウザ異常終了",
+    "unknown": "不明",
+}
 
 
 class NotificationService:
     """Service for handling push notifications"""
     
     @staticmethod
-    def send_push_notification(subscription_json: str, failed_id_list: list) -> None:
+    def send_push_notification(subscription_json: str, failed_id_list: list, failure_reasons: dict = None) -> None:
         """
         Send push notification with registration results.
         
         Args:
             subscription_json: JSON string containing push subscription info
             failed_id_list: List of video IDs that failed to register
+            failure_reasons: Optional mapping of failed video ID to its reason
             
         Raises:
             Exception: If notification sending fails
@@ -27,13 +41,20 @@ class NotificationService:
                 message = "すべての動画の登録が完了しました！"
             else:
                 message = f"登録処理が完了しました。{total_count}件の動画で登録に失敗しました。"
+                if failure_reasons:
+                    counts = Counter(failure_reasons.get(video_id) or "unknown" for video_id in failed_id_list)
+                    message += "（" + "、".join(
+                        f"{REASON_LABELS.get(reason, reason)}: {count}件" for reason, count in counts.most_common()
+                    ) + "）"
             
             # Send notification via Next.js API
             api_endpoint = os.environ.get("NOTIFICATION_API_ENDPOINT")
             if not api_endpoint:
                 print("NOTIFICATION_API_ENDPOINT not configured, skipping push notification")
                 return
-                
+
+            import requests
+
             response = requests.post(
                 api_endpoint,
                 json={
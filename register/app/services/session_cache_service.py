@@ -0,0 +1,198 @@
+import hashlib
+import hmac
+import json
+import os
+import time
+from typing import Dict, List, Optional
+
+import boto3
+
+from app.services.auth_service import AuthService
+
+
+class LocalFileSessionStore:
+    """Session store backed by local files (stand-in for S3 in tests and local runs)"""
+
+    def __init__(self, directory: str = "/tmp/niconico-sessions"):
+        self.directory = directory
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.session")
+
+    def get(self, key: str) -> Optional[str]:
+        try:
+            with open(self._path(key), "r") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def put(self, key: str, value: str) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self._path(key), "w") as f:
+            f.write(value)
+
+    def delete(self, key: str) -> None:
+        if os.path.exists(self._path(key)):
+            os.remove(self._path(key))
+
+
+class S3SessionStore:
+    """Session store backed by S3 objects"""
+
+    def __init__(self, bucket: str, prefix: str = "sessions/"):
+        self.bucket = bucket
+        self.prefix = prefix
+        self.client = boto3.client("s3")
+
+    def get(self, key: str) -> Optional[str]:
+        try:
+            response = self.client.get_object(Bucket=self.bucket, Key=f"{self.prefix}{key}")
+        except self.client.exceptions.NoSuchKey:
+            return None
+        return response["Body"].read().decode("utf-8")
+
+    def put(self, key: str, value: str) -> None:
+        self.client.put_object(Bucket=self.bucket, Key=f"{self.prefix}{key}", Body=value.encode("utf-8"))
+
+    def delete(self, key: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=f"{self.prefix}{key}")
+
+
+class SessionCacheService:
+    """
+    Service for caching niconico login cookies per account.
+
+    Cookies are kept in process memory for warm containers and, when a store
+    is configured, encrypted with the shared secret key in a persistent store
+    so other containers and later chain hops can reuse the session.
+    """
+
+    _memory: Dict[str, List[dict]] = {}
+    _store = None
+    # HMAC key when SHARED_SECRET_KEY is unset (the store is not used then, so memory only)
+    _process_key = os.urandom(32)
+
+    @staticmethod
+    def account_key(email: str, password: str) -> str:
+        """
+        Return a non-reversible cache key for a set of credentials.
+
+        The password is part of the key, so a cached session is only handed
+        to a request that supplies the password it was created with.
+        """
+        secret_key = os.environ.get("SHARED_SECRET_KEY")
+        key = secret_key.encode("utf-8") if secret_key else SessionCacheService._process_key
+        message = f"{email.strip().lower()}\0{password}".encode("utf-8")
+        return hmac.new(key, message, hashlib.sha256).hexdigest()
+
+    @staticmethod
+    def get_store():
+        """
+        Return the configured persistent store, or None for memory only.
+
+        SESSION_CACHE_STORE selects the backend: "s3" (uses S3_BUCKET_NAME)
+        or "local" (uses SESSION_CACHE_DIR).
+        """
+        if SessionCacheService._store is not None:
+            return SessionCacheService._store
+
+        store_type = os.environ.get("SESSION_CACHE_STORE", "").lower()
+        if store_type == "s3" and os.environ.get("S3_BUCKET_NAME"):
+            SessionCacheService._store = S3SessionStore(os.environ["S3_BUCKET_NAME"])
+        elif store_type == "local":
+            SessionCacheService._store = LocalFileSessionStore(
+                os.environ.get("SESSION_CACHE_DIR", "/tmp/niconico-sessions")
+            )
+        return SessionCacheService._store
+
+    @staticmethod
+    def set_store(store) -> None:
+        """Override the persistent store (None resets to environment configuration)"""
+        SessionCacheService._store = store
+
+    @staticmethod
+    def _unexpired(cookies: List[dict]) -> List[dict]:
+        now = time.time()
+        return [c for c in cookies if "expiry" not in c or c["expiry"] > now]
+
+    @staticmethod
+    def load(email: str, password: str) -> Optional[List[dict]]:
+        """
+        Load cached cookies for an account.
+
+        Args:
+            email: User email
+            password: User password
+
+        Returns:
+            List of unexpired cookies, or None if no usable session is cached
+        """
+        key = SessionCacheService.account_key(email, password)
+
+        cookies = SessionCacheService._memory.get(key)
+        if cookies is None:
+            cookies = SessionCacheService._load_from_store(key)
+            if cookies is not None:
+                SessionCacheService._memory[key] = cookies
+
+        if not cookies:
+            return None
+        cookies = SessionCacheService._unexpired(cookies)
+        return cookies or None
+
+    @staticmethod
+    def _load_from_store(key: str) -> Optional[List[dict]]:
+        store = SessionCacheService.get_store()
+        if store is None or not os.environ.get("SHARED_SECRET_KEY"):
+            return None
+        try:
+            encrypted = store.get(key)
+            if not encrypted:
+                return None
+            return json.loads(AuthService.decrypt_password(encrypted))
+        except Exception as e:
+            print(f"Failed to load cached session: {e}")
+            return None
+
+    @staticmethod
+    def save(email: str, password: str, cookies: List[dict]) -> None:
+        """
+        Cache cookies for an account in memory and in the persistent store.
+
+        Args:
+            email: User email
+            password: User password
+            cookies: Cookies returned by driver.get_cookies()
+        """
+        key = SessionCacheService.account_key(email, password)
+        SessionCacheService._memory[key] = cookies
+
+        store = SessionCacheService.get_store()
+        secret_key = os.environ.get("SHARED_SECRET_KEY")
+        if store is None or not secret_key:
+            return
+        try:
+            store.put(key, AuthService.encrypt_password(json.dumps(cookies), secret_key))
+        except Exception as e:
+            # Persisting the session is best effort
+            print(f"Failed to persist session: {e}")
+
+    @staticmethod
+    def invalidate(email: str, password: str) -> None:
+        """
+        Drop the cached session for an account (e.g. after it expired).
+
+        Args:
+            email: User email
+            password: User password
+        """
+        key = SessionCacheService.account_key(email, password)
+        SessionCacheService._memory.pop(key, None)
+
+        store = SessionCacheService.get_store()
+        if store is None:
+            return
+        try:
+            store.delete(key)
+        except Exception as e:
+            print(f"Failed to delete cached session: {e}")
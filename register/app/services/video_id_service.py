@@ -0,0 +1,51 @@
+import re
+from typing import Dict, List, Tuple
+
+# niconico video IDs; watch page URLs are reduced to the ID they contain
+VIDEO_ID_PATTERN = re.compile(r"^(?:sm|so|nm)\d+$")
+VIDEO_URL_PATTERN = re.compile(r"(?:nicovideo\.jp/watch|nico\.ms)/((?:sm|so|nm)\d+)(?:[/?#]|$)")
+
+REASON_INVALID_FORMAT = "invalid_format"
+
+
+class VideoIdService:
+    """Service for validating video IDs before any browser time is spent on them"""
+
+    @staticmethod
+    def normalize(id_list: List[str]) -> Tuple[List[str], Dict[str, str]]:
+        """
+        Strip, deduplicate (keeping the first occurrence) and validate video IDs.
+
+        Empty entries are dropped. Watch page URLs are reduced to their video ID.
+
+        Args:
+            id_list: Video IDs as received
+
+        Returns:
+            Tuple of (valid IDs in order, mapping of invalid entry to reason)
+        """
+        valid_ids = []
+        invalid_ids = {}
+        seen = set()
+        for raw_id in id_list or []:
+            video_id = str(raw_id).strip()
+            if not video_id:
+                continue
+
+            url_match = VIDEO_URL_PATTERN.search(video_id)
+            if url_match:
+                video_id = url_match.group(1)
+
+            if not VIDEO_ID_PATTERN.match(video_id):
+                invalid_ids.setdefault(video_id, REASON_INVALID_FORMAT)
+                continue
+            if video_id in seen:
+                continue
+            seen.add(video_id)
+            valid_ids.append(video_id)
+
+        skipped = len(id_list or []) - len(valid_ids) - len(invalid_ids)
+        if invalid_ids or skipped:
+            print(f"Pre-flight: {len(valid_ids)} valid IDs, {len(invalid_ids)} invalid, "
+                  f"{skipped} empty or duplicate entries dropped")
+        return valid_ids, invalid_ids
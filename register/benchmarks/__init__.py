@@ -0,0 +1,2 @@
+# Offline benchmarks for the register Lambda. Run from the register directory,
+# e.g. `python -m benchmarks.bench_http_engine`.
@@ -0,0 +1,53 @@
+import argparse
+import statistics
+import time
+
+from app.engines import HttpEngine
+from tests.fakes.fake_niconico_server import FakeNiconicoServer
+
+
+def run(video_count: int) -> dict:
+    """Register video_count videos through the HTTP engine against the fake server"""
+    id_list = [f"sm{i}" for i in range(1, video_count + 1)]
+    latencies = []
+
+    with FakeNiconicoServer() as server:
+        with HttpEngine(nvapi_url=server.base_url, account_url=server.base_url) as engine:
+            start = time.perf_counter()
+            engine.login("test@example.com", "password")
+            engine.remove_all_mylist()
+            engine.create_mylist("Benchmark")
+            mylist_id = engine.list_mylist_ids()[0]
+            setup_seconds = time.perf_counter() - start
+
+            start = time.perf_counter()
+            for video_id in id_list:
+                item_start = time.perf_counter()
+                engine.add_video(mylist_id, video_id)
+                latencies.append(time.perf_counter() - item_start)
+            total_seconds = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "videos": video_count,
+        "setup_ms": setup_seconds * 1000,
+        "videos_per_sec": video_count / total_seconds,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the HTTP registration engine offline")
+    parser.add_argument("--videos", type=int, nargs="+", default=[10, 100, 1000])
+    args = parser.parse_args()
+
+    print(f"{'videos':>8} {'setup ms':>10} {'videos/s':>10} {'p50 ms':>8} {'p95 ms':>8}")
+    for count in args.videos:
+        r = run(count)
+        print(f"{r['videos']:>8} {r['setup_ms']:>10.1f} {r['videos_per_sec']:>10.1f} "
+              f"{r['p50_ms']:>8.2f} {r['p95_ms']:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
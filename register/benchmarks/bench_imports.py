@@ -0,0 +1,97 @@
+"""
+Cold-start import benchmark for the register Lambda.
+
+Imports each target module in a fresh interpreter with `python -X importtime`
+and reports its total import time and the modules with the highest cumulative
+cost. Exits with status 1 when a target exceeds its --budget, so import-time
+regressions (e.g. a new top-level selenium or boto3 import) fail CI.
+
+    python -m benchmarks.bench_imports --budget handler=100 --json result.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# handler is what every cold start pays; the others are the extra cost of the
+# first chain hop (no browser) and of a registering hop
+DEFAULT_TARGETS = ["handler", "app.handlers.chain_register_handler", "app.regist"]
+DEFAULT_BUDGETS = ["handler=100", "app.handlers.chain_register_handler=100"]
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def parse_importtime(stderr: str) -> list:
+    """
+    Parse `-X importtime` output.
+
+    Returns:
+        List of (module, self_us, cumulative_us, depth) in output order
+    """
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip(" ")) - 1) // 2
+        entries.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return entries
+
+
+def _import_entries(statement: str) -> list:
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", statement],
+                            cwd=ROOT, capture_output=True, text=True, check=True)
+    return parse_importtime(result.stderr)
+
+
+def measure(module: str, samples: int) -> dict:
+    """Import module in fresh interpreters and return its cost beyond interpreter startup"""
+    baseline = {name for name, _, _, _ in _import_entries("pass")}
+    totals = []
+    entries = []
+    for _ in range(samples):
+        entries = [entry for entry in _import_entries(f"import {module}") if entry[0] not in baseline]
+        totals.append(sum(cumulative for _, _, cumulative, depth in entries if depth == 0))
+    top = sorted(entries, key=lambda entry: entry[2], reverse=True)
+    return {
+        "module": module,
+        "total_ms": statistics.median(totals) / 1000,
+        "modules": len(entries),
+        "top": [{"module": name, "cumulative_ms": cumulative / 1000, "self_ms": self_us / 1000}
+                for name, self_us, cumulative, _ in top[:15]],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the register Lambda's cold-start imports")
+    parser.add_argument("--modules", nargs="+", default=DEFAULT_TARGETS)
+    parser.add_argument("--samples", type=int, default=5)
+    parser.add_argument("--budget", nargs="+", default=DEFAULT_BUDGETS, metavar="MODULE=MS",
+                        help="fail if a module's median import time is higher")
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    budgets = {module: float(ms) for module, ms in (budget.split("=", 1) for budget in args.budget)}
+    results = []
+    for module in args.modules:
+        result = measure(module, args.samples)
+        results.append(result)
+        print(f"{module}: {result['total_ms']:.1f} ms ({result['modules']} modules)")
+        for entry in result["top"]:
+            print(f"    {entry['cumulative_ms']:>8.1f} ms  {entry['module']}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    failures = [f"{result['module']}: {result['total_ms']:.1f} ms > {budgets[result['module']]} ms"
+                for result in results
+                if result["module"] in budgets and result["total_ms"] > budgets[result["module"]]]
+    for failure in failures:
+        print(f"REGRESSION: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
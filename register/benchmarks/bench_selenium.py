@@ -0,0 +1,149 @@
+"""
+Offline Selenium benchmark against the local fake niconico site.
+
+Runs real headless Chrome (same requirements as the Lambda image) through
+regist() and delete_and_create_mylist() with NICO_URL / MYLIST_URL pointed at
+tests/fakes. Exits with status 1 when a --min-videos-per-sec or --max-p95-ms
+gate fails, so it can be used as a regression check for performance changes.
+
+    python -m benchmarks.bench_selenium --videos 10 100 1000 --json result.json
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+from app import regist
+from app.helpers import driver_pool, selector_registry, selenium_helper
+from tests.fakes.fake_niconico_server import FakeNiconicoServer, FakeNiconicoState
+
+EMAIL = "test@example.com"
+PASSWORD = "password"
+
+
+def point_at(server: FakeNiconicoServer) -> None:
+    """Redirect the register Lambda's niconico URLs to the fake server"""
+    regist.NICO_URL = server.base_url
+    regist.MYLIST_URL = f"{server.base_url}/my/mylist"
+    regist.NVAPI_URL = server.base_url
+    regist.LOGIN_PAGE_HOST = f"{server.base_url}/login"
+
+
+def percentile(values, ratio):
+    ordered = sorted(values)
+    return ordered[max(0, int(len(ordered) * ratio) - 1)]
+
+
+def measure_driver_startup(samples: int, preset: str = None) -> dict:
+    """Time from launching Chrome with the given preset to its first completed command"""
+    timings = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        driver = selenium_helper.create_chrome_driver(preset)
+        driver.execute_script("return 1")
+        timings.append(time.perf_counter() - start)
+        selenium_helper.quit_driver(driver)
+    return {"samples": samples, "p50_ms": statistics.median(timings) * 1000, "max_ms": max(timings) * 1000}
+
+
+def bench_delete_and_create(server: FakeNiconicoServer, mylist_count: int) -> dict:
+    for i in range(mylist_count):
+        server.state.create_mylist(f"old{i}")
+    start = time.perf_counter()
+    regist.delete_and_create_mylist(EMAIL, PASSWORD, "Benchmark")
+    return {"mylists": mylist_count, "seconds": time.perf_counter() - start}
+
+
+def bench_regist(video_count: int) -> dict:
+    latencies = []
+    add_video = regist._add_video_to_mylist
+
+    def timed_add_video(driver, video_id):
+        start = time.perf_counter()
+        try:
+            add_video(driver, video_id)
+        finally:
+            latencies.append(time.perf_counter() - start)
+
+    regist._add_video_to_mylist = timed_add_video
+    try:
+        id_list = [f"sm{i}" for i in range(1, video_count + 1)]
+        start = time.perf_counter()
+        failed_ids = regist.regist(EMAIL, PASSWORD, id_list)
+        total_seconds = time.perf_counter() - start
+    finally:
+        regist._add_video_to_mylist = add_video
+
+    return {
+        "videos": video_count,
+        "failed": len(failed_ids),
+        "seconds": total_seconds,
+        "videos_per_sec": video_count / total_seconds,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Selenium registration flow offline")
+    parser.add_argument("--videos", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--mylists", type=int, default=20, help="mylists to delete in delete_and_create_mylist")
+    parser.add_argument("--startup-samples", type=int, default=3)
+    parser.add_argument("--presets", nargs="+", default=["fast", "safe"],
+                        choices=sorted(selenium_helper.LAUNCH_PRESETS), help="launch presets to time")
+    parser.add_argument("--pipeline-tabs", type=int, default=1,
+                        help="tabs to load watch pages in while videos are added (REGIST_PIPELINE_TABS)")
+    parser.add_argument("--latency-ms", type=int, default=0, help="artificial delay per fake server response")
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--min-videos-per-sec", type=float, help="fail if any run is slower")
+    parser.add_argument("--max-p95-ms", type=float, help="fail if any run's p95 latency is higher")
+    args = parser.parse_args()
+    os.environ["REGIST_PIPELINE_TABS"] = str(args.pipeline_tabs)
+
+    results = {"driver_startup": {}, "runs": []}
+    for preset in args.presets:
+        startup = measure_driver_startup(args.startup_samples, preset)
+        results["driver_startup"][preset] = startup
+        print(f"driver startup ({preset}): p50 {startup['p50_ms']:.0f} ms, max {startup['max_ms']:.0f} ms")
+
+    with FakeNiconicoServer(FakeNiconicoState(latency_ms=args.latency_ms)) as server:
+        point_at(server)
+        try:
+            results["delete_and_create"] = bench_delete_and_create(server, args.mylists)
+            print(f"delete_and_create_mylist ({args.mylists} mylists): "
+                  f"{results['delete_and_create']['seconds']:.2f} s")
+
+            print(f"{'videos':>8} {'failed':>7} {'videos/s':>9} {'p50 ms':>8} {'p95 ms':>8}")
+            for count in args.videos:
+                run = bench_regist(count)
+                results["runs"].append(run)
+                print(f"{run['videos']:>8} {run['failed']:>7} {run['videos_per_sec']:>9.2f} "
+                      f"{run['p50_ms']:>8.0f} {run['p95_ms']:>8.0f}")
+        finally:
+            driver_pool.close_all()
+
+    results["selectors"] = selector_registry.stats()
+    print(selector_registry.format_stats(results["selectors"]))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    failures = []
+    for run in results["runs"]:
+        if run["failed"]:
+            failures.append(f"{run['failed']} of {run['videos']} videos failed")
+        if args.min_videos_per_sec and run["videos_per_sec"] < args.min_videos_per_sec:
+            failures.append(f"{run['videos']} videos: {run['videos_per_sec']:.2f} videos/s "
+                            f"< {args.min_videos_per_sec}")
+        if args.max_p95_ms and run["p95_ms"] > args.max_p95_ms:
+            failures.append(f"{run['videos']} videos: p95 {run['p95_ms']:.0f} ms > {args.max_p95_ms}")
+    for failure in failures:
+        print(f"REGRESSION: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
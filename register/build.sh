@@ -3,4 +3,5 @@ docker build \
   --build-arg S3_BUCKET_NAME= \
   --build-arg SHARED_SECRET_KEY= \
   --build-arg NOTIFICATION_API_ENDPOINT= \
+  --build-arg COMPLETION_TRACKER_TABLE= \
   -t dev-niconico-mylist-assistant-register .
\ No newline at end of file
@@ -1,11 +1,14 @@
 import json
-from app.services.auth_service import AuthService
 from app.handlers.health_check_handler import HealthCheckHandler
-from app.handlers.delete_and_create_handler import DeleteAndCreateHandler
-from app.handlers.register_handler import RegisterHandler
-from app.handlers.chain_register_handler import ChainRegisterHandler
+
+# Handlers, selenium, boto3, requests and cryptography are imported on the paths
+# that use them, so health checks and rejected requests cold-start quickly
 
 def lambda_handler(event, context):
+    # Chain hops dispatched through SQS carry the request body in the record (batch size 1)
+    if not event.get("body") and event.get("Records"):
+        event = {"body": event["Records"][0]["body"]}
+
     # Parse URL from event body (assume JSON)
     body = event.get("body")
     if body:
@@ -23,12 +26,19 @@ def lambda_handler(event, context):
         action = data.get("action")  # New field to distinguish delete or register
         uuid = data.get("uuid", "")
         chunk_index = data.get("chunk_index", "")
+        chunk_count = data.get("chunk_count")
         
         # Chain register specific fields
         remaining_ids = data.get("remaining_ids")
         failed_ids = data.get("failed_ids", [])
         is_first_request = data.get("is_first_request", True)
         is_delete_and_create_request = data.get("is_delete_and_create_request", False)
+        per_video_ms = data.get("per_video_ms")
+        chain_id = data.get("chain_id")
+        offset = data.get("offset")
+        sync_mode = data.get("sync_mode", False)
+        retry_queue = data.get("retry_queue")
+        failure_reasons = data.get("failure_reasons")
     else:
         email = None
         encrypted_password = None
@@ -38,19 +48,48 @@ def lambda_handler(event, context):
         action = None
         uuid = None
         chunk_index = None
+        chunk_count = None
         remaining_ids = None
         failed_ids = []
         is_first_request = True
         is_delete_and_create_request = False
+        per_video_ms = None
+        chain_id = None
+        offset = None
+        sync_mode = False
+        retry_queue = None
+        failure_reasons = None
 
-    # For chain_register, we need either id_list (first request) or remaining_ids (chain request)
-    if action == "chain_register":
+    # resume_chain restores everything else from the chain's checkpoint
+    if action == "resume_chain":
+        if not chain_id:
+            return {
+                "statusCode": 400,
+                "body": json.dumps({"error": "Missing 'chain_id' in request body"})
+            }
+        from app.handlers.chain_register_handler import ChainRegisterHandler
+        return ChainRegisterHandler.resume(chain_id, context)
+
+    # warmup logs in ahead of a large registration; Chrome only starts for valid credentials
+    if action == "warmup":
         if not email or not encrypted_password:
             return {
                 "statusCode": 400,
                 "body": json.dumps({"error": "Missing 'email' or 'password' in request body"})
             }
-        if not id_list and not remaining_ids:
+        from app.handlers.warmup_handler import WarmupHandler
+        return WarmupHandler.handle(email, encrypted_password, context)
+
+    # For chain_register, we need either id_list (first request) or remaining_ids (chain request).
+    # Cursor-based hops only carry chain_id and offset; the rest is loaded from the chain's store
+    is_cursor_hop = bool(chain_id) and offset is not None
+    if action == "chain_register":
+        if not is_cursor_hop and (not email or not encrypted_password):
+            return {
+                "statusCode": 400,
+                "body": json.dumps({"error": "Missing 'email' or 'password' in request body"})
+            }
+        if not is_cursor_hop and not id_list and not remaining_ids and not retry_queue:
             return {
                 "statusCode": 400,
                 "body": json.dumps({"error": "Missing 'id_list' or 'remaining_ids' in request body"})
@@ -63,6 +102,7 @@ def lambda_handler(event, context):
 
     # Decrypt password only for non-chain actions
     if action != "chain_register":
+        from app.services.auth_service import AuthService
         try:
             password = AuthService.decrypt_password(encrypted_password)
         except Exception as e:
@@ -70,17 +110,27 @@ def lambda_handler(event, context):
                 "statusCode": 400,
                 "body": json.dumps({"error": "Failed to decrypt password", "detail": str(e)})
             }
+        if action in ("delete_and_create", "register"):
+            # Chrome boots while the handler is imported; chain hops prewarm once they decrypted
+            from app.helpers import driver_pool
+            driver_pool.prewarm_if_enabled()
 
     # Dispatch to appropriate handler based on action
     if action == "delete_and_create":
+        from app.handlers.delete_and_create_handler import DeleteAndCreateHandler
         return DeleteAndCreateHandler.handle(email, password, title)
     elif action == "register":
-        return RegisterHandler.handle(email, password, id_list, subscription_json, uuid, chunk_index)
+        from app.handlers.register_handler import RegisterHandler
+        return RegisterHandler.handle(email, password, id_list, subscription_json, uuid, chunk_index,
+                                      chunk_count)
     elif action == "chain_register":
+        from app.handlers.chain_register_handler import ChainRegisterHandler
         # For chain_register, pass encrypted password to avoid re-encryption in chains
         return ChainRegisterHandler.handle(
             email, encrypted_password, id_list, subscription_json, title,
-            remaining_ids, failed_ids, is_first_request, is_delete_and_create_request
+            remaining_ids, failed_ids, is_first_request, is_delete_and_create_request,
+            context=context, per_video_ms=per_video_ms, chain_id=chain_id, offset=offset,
+            sync_mode=sync_mode, retry_queue=retry_queue, failure_reasons=failure_reasons
         )
     else:
         return {
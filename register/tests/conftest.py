@@ -0,0 +1,8 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def no_driver_prewarm(monkeypatch):
+    # Handlers would otherwise start a real Chrome in the background;
+    # tests of the prewarm itself turn it back on
+    monkeypatch.setenv("DRIVER_PREWARM", "0")
@@ -0,0 +1 @@
+# Local stand-ins for niconico used by tests and benchmarks.
@@ -0,0 +1,91 @@
+import pytest
+from app.services.availability_service import AvailabilityService, LocalFileAvailabilityStore
+from tests.fakes.fake_niconico_server import FakeNiconicoServer, FakeNiconicoState
+
+
+@pytest.fixture
+def server(monkeypatch):
+    with FakeNiconicoServer(FakeNiconicoState(unavailable_ids=["sm404"])) as server:
+        monkeypatch.setenv("AVAILABILITY_CHECK", "1")
+        monkeypatch.setenv("THUMBINFO_URL", f"{server.base_url}/api/getthumbinfo")
+        AvailabilityService.set_store(None)
+        AvailabilityService.clear_memory()
+        yield server
+        AvailabilityService.set_store(None)
+        AvailabilityService.clear_memory()
+
+
+def test_disabled_by_default(monkeypatch):
+    monkeypatch.delenv("AVAILABILITY_CHECK", raising=False)
+
+    assert AvailabilityService.find_unavailable(["sm404"]) == {}
+
+
+def test_find_unavailable_reports_reason(server):
+    assert AvailabilityService.find_unavailable(["sm1", "sm404", "sm2"]) == {"sm404": "DELETED"}
+
+
+def test_results_are_cached_in_memory(server):
+    AvailabilityService.find_unavailable(["sm1", "sm404"])
+    requests_after_first = server.state.request_count
+
+    assert AvailabilityService.find_unavailable(["sm1", "sm404"]) == {"sm404": "DELETED"}
+    assert server.state.request_count == requests_after_first
+
+
+def test_expired_entries_are_fetched_again(server, monkeypatch):
+    monkeypatch.setenv("AVAILABILITY_CACHE_TTL", "0")
+    AvailabilityService.find_unavailable(["sm1"])
+    requests_after_first = server.state.request_count
+
+    AvailabilityService.find_unavailable(["sm1"])
+    assert server.state.request_count == requests_after_first + 1
+
+
+def test_persistent_store_survives_cold_start(server, tmp_path):
+    store = LocalFileAvailabilityStore(str(tmp_path / "availability.json"))
+    AvailabilityService.set_store(store)
+    AvailabilityService.find_unavailable(["sm1", "sm404"])
+    requests_after_first = server.state.request_count
+
+    # A cold container only has the persistent store
+    AvailabilityService.clear_memory()
+    assert AvailabilityService.find_unavailable(["sm404"]) == {"sm404": "DELETED"}
+    assert server.state.request_count == requests_after_first
+
+
+def test_lookup_errors_count_as_available(monkeypatch):
+    monkeypatch.setenv("AVAILABILITY_CHECK", "1")
+    monkeypatch.setenv("THUMBINFO_URL", "http://127.0.0.1:9/api/getthumbinfo")
+    AvailabilityService.clear_memory()
+
+    assert AvailabilityService.find_unavailable(["sm1"]) == {}
+    # Failed lookups are not cached
+    assert "sm1" not in AvailabilityService._memory
+
+
+def test_regist_skips_unavailable_videos(server, monkeypatch):
+    added = []
+    results = []
+
+    monkeypatch.setattr("app.regist._regist",
+                        lambda email, password, id_list, max_retries, workers, on_result, failures:
+                        added.extend(id_list) or [])
+
+    from app import regist
+    failed_ids = regist.regist("test@example.com", "password", ["sm1", "sm404"],
+                               on_result=lambda video_id, ok: results.append((video_id, ok)))
+
+    assert failed_ids == ["sm404"]
+    assert added == ["sm1"]
+    assert results == [("sm404", False)]
+
+
+def test_regist_without_available_videos_skips_browser(server, monkeypatch):
+    def fail_regist(*args):
+        raise AssertionError("Browser should not be used")
+
+    monkeypatch.setattr("app.regist._regist", fail_regist)
+
+    from app import regist
+    assert regist.regist("test@example.com", "password", ["sm404"]) == ["sm404"]
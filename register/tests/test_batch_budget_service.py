@@ -0,0 +1,38 @@
+from app.services.batch_budget_service import BatchBudgetService
+
+
+def setup_function():
+    BatchBudgetService.reset()
+
+
+def teardown_function():
+    BatchBudgetService.reset()
+
+
+def test_next_batch_size_respects_safety_margin(monkeypatch):
+    monkeypatch.setenv("CHAIN_SAFETY_MARGIN_MS", "60000")
+    BatchBudgetService.seed(1000)
+
+    assert BatchBudgetService.next_batch_size(160000, 500) == 100
+    assert BatchBudgetService.next_batch_size(160000, 20) == 20
+    assert BatchBudgetService.next_batch_size(160000, 500, workers=2) == 200
+    assert BatchBudgetService.next_batch_size(50000, 500) == 0
+
+
+def test_record_updates_running_estimate():
+    BatchBudgetService.record(10, 50000)
+    assert BatchBudgetService.per_video_ms() == 5000
+
+    BatchBudgetService.record(10, 10000)
+    assert BatchBudgetService.per_video_ms() == 0.3 * 1000 + 0.7 * 5000
+
+
+def test_seed_does_not_override_measurement():
+    BatchBudgetService.record(1, 3000)
+    BatchBudgetService.seed(9000)
+    assert BatchBudgetService.per_video_ms() == 3000
+
+
+def test_remaining_time_without_context():
+    assert BatchBudgetService.remaining_time_ms(None) is None
+    assert BatchBudgetService.remaining_time_ms({}) is None
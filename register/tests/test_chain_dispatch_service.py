@@ -0,0 +1,121 @@
+import json
+import pytest
+import requests
+from unittest.mock import MagicMock, patch
+from app.services.chain_dispatch_service import (
+    ChainDispatchService, HttpDispatcher, LambdaDispatcher, LocalDispatcher, UnacknowledgedDispatchError
+)
+
+
+@pytest.fixture(autouse=True)
+def reset_dispatcher(monkeypatch):
+    for name in ("CHAIN_DISPATCH_BACKEND", "REGISTER_LAMBDA_FUNCTION_NAME",
+                 "CHAIN_QUEUE_URL", "REGISTER_LAMBDA_ENDPOINT", "CHAIN_DISPATCH_HTTP_ASYNC"):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setattr(ChainDispatchService, "BACKOFF_SECONDS", 0)
+    ChainDispatchService.set_dispatcher(None)
+    yield
+    ChainDispatchService.set_dispatcher(None)
+
+
+def test_no_backend_configured():
+    assert ChainDispatchService.dispatch({"action": "chain_register"}) is False
+
+
+def test_backend_selection(monkeypatch):
+    monkeypatch.setenv("REGISTER_LAMBDA_ENDPOINT", "https://example.com")
+    assert isinstance(ChainDispatchService.get_dispatcher(), HttpDispatcher)
+
+    ChainDispatchService.set_dispatcher(None)
+    monkeypatch.setenv("REGISTER_LAMBDA_FUNCTION_NAME", "register")
+    with patch("boto3.client"):
+        assert isinstance(ChainDispatchService.get_dispatcher(), LambdaDispatcher)
+
+    ChainDispatchService.set_dispatcher(None)
+    monkeypatch.setenv("CHAIN_DISPATCH_BACKEND", "local")
+    assert isinstance(ChainDispatchService.get_dispatcher(), LocalDispatcher)
+
+
+def test_lambda_dispatch_wraps_payload_as_event():
+    with patch("boto3.client") as mock_client:
+        mock_client.return_value.invoke.return_value = {"StatusCode": 202}
+        LambdaDispatcher("register").dispatch({"action": "chain_register"})
+
+    kwargs = mock_client.return_value.invoke.call_args[1]
+    assert kwargs["InvocationType"] == "Event"
+    event = json.loads(kwargs["Payload"])
+    assert json.loads(event["body"]) == {"action": "chain_register"}
+
+
+def test_retries_transient_failures():
+    dispatcher = MagicMock(name="dispatcher")
+    dispatcher.dispatch.side_effect = [Exception("Throttled"), None]
+    ChainDispatchService.set_dispatcher(dispatcher)
+
+    assert ChainDispatchService.dispatch({"action": "chain_register"}) is True
+    assert dispatcher.dispatch.call_count == 2
+
+
+def test_gives_up_after_max_attempts():
+    dispatcher = MagicMock(name="dispatcher")
+    dispatcher.dispatch.side_effect = Exception("Down")
+    ChainDispatchService.set_dispatcher(dispatcher)
+
+    assert ChainDispatchService.dispatch({"action": "chain_register"}) is False
+    assert dispatcher.dispatch.call_count == ChainDispatchService.MAX_ATTEMPTS
+
+
+def test_http_dispatch_does_not_wait_for_the_synchronous_endpoint():
+    dispatcher = HttpDispatcher("https://example.com")
+    ChainDispatchService.set_dispatcher(dispatcher)
+    with patch.object(dispatcher.session, "post", side_effect=requests.exceptions.ReadTimeout) as mock_post:
+        # The endpoint took the request and runs the hop, so it is not sent again
+        assert ChainDispatchService.dispatch({"action": "chain_register"}) is True
+
+    assert mock_post.call_count == 1
+    assert "X-Amz-Invocation-Type" not in mock_post.call_args.kwargs["headers"]
+
+
+def test_http_dispatch_fails_on_error_status():
+    dispatcher = HttpDispatcher("https://example.com")
+    with patch.object(dispatcher.session, "post") as mock_post:
+        mock_post.return_value.status_code = 200
+        dispatcher.dispatch({"action": "chain_register"})
+
+        mock_post.return_value.status_code = 403
+        with pytest.raises(RuntimeError):
+            dispatcher.dispatch({"action": "chain_register"})
+
+
+def test_async_http_dispatch_needs_acknowledgement():
+    dispatcher = HttpDispatcher("https://example.com", asynchronous=True)
+    with patch.object(dispatcher.session, "post") as mock_post:
+        mock_post.return_value.status_code = 202
+        dispatcher.dispatch({"action": "chain_register"})
+        assert mock_post.call_args.kwargs["headers"]["X-Amz-Invocation-Type"] == "Event"
+
+        # An endpoint that ran the hop synchronously did not hand it off
+        mock_post.return_value.status_code = 200
+        with pytest.raises(RuntimeError):
+            dispatcher.dispatch({"action": "chain_register"})
+
+
+def test_async_http_read_timeout_is_a_failed_hand_off():
+    dispatcher = HttpDispatcher("https://example.com", asynchronous=True)
+    ChainDispatchService.set_dispatcher(dispatcher)
+    with patch.object(dispatcher.session, "post", side_effect=requests.exceptions.ReadTimeout) as mock_post:
+        with pytest.raises(UnacknowledgedDispatchError):
+            dispatcher.dispatch({"action": "chain_register"})
+
+        assert ChainDispatchService.dispatch({"action": "chain_register"}) is False
+    # The hop may already be running, so it is not sent again
+    assert mock_post.call_count == 2
+
+
+def test_sqs_event_is_unwrapped():
+    from handler import lambda_handler
+    with patch("app.handlers.chain_register_handler.ChainRegisterHandler.resume") as mock_resume:
+        mock_resume.return_value = {"statusCode": 200, "body": "{}"}
+        lambda_handler({"Records": [{"body": json.dumps({"action": "resume_chain", "chain_id": "c1"})}]}, None)
+
+    mock_resume.assert_called_once_with("c1", None)
@@ -1,10 +1,12 @@
 import pytest
 import json
+import requests
 import os
 import base64
 from unittest.mock import patch, MagicMock, Mock
 from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 from app.handlers.chain_register_handler import ChainRegisterHandler
+from app.services.chain_dispatch_service import ChainDispatchService
 
 
 def encrypt_password(password, secret_key):
@@ -33,7 +35,7 @@ class TestChainRegisterHandler:
             email = "test@example.com"
             secret_key = os.urandom(32)
             encrypted_password = encrypt_password("password", secret_key)
-            id_list = ["video1", "video2", "video3"]
+            id_list = ["sm1", "sm2", "sm3"]
             
             # Call handler
             result = ChainRegisterHandler.handle(
@@ -50,7 +52,8 @@ class TestChainRegisterHandler:
             
             # Verify delete and create chain was invoked
             mock_delete_chain.assert_called_once_with(
-                email, encrypted_password, id_list, None, "Test Title"
+                email, encrypted_password, id_list, None, "Test Title", chain_id=None, failed_ids=[],
+                sync_mode=False, failure_reasons={}
             )
             
             # Verify response indicates immediate return
@@ -60,6 +63,17 @@ class TestChainRegisterHandler:
             assert response_data["user_message"] == "登録処理を開始しました。完了時に通知をお送りします。"
             assert response_data["total_videos"] == 3
     
+    def test_first_request_reports_failed_hand_off(self):
+        """Test that the Manager is told when the chain could not be started"""
+        with patch.object(ChainRegisterHandler, '_invoke_delete_and_create_chain', return_value=False):
+            result = ChainRegisterHandler.handle(
+                "test@example.com", "encrypted_password", ["sm1"], None, "Test Title",
+                None, None, True
+            )
+
+        assert result["statusCode"] == 500
+        assert "Failed to start" in json.loads(result["body"])["error"]
+
     def test_handle_delete_and_create_request(self):
         """Test delete and create request - should perform delete/create and start video registration"""
         with patch('app.regist.delete_and_create_mylist') as mock_delete_create, \
@@ -90,7 +104,7 @@ class TestChainRegisterHandler:
             mock_delete_create.assert_called_once_with(email, "password", "Test Title")
             
             # Verify video registration was called
-            mock_regist.assert_called_once_with(email, "password", id_list)
+            mock_regist.assert_called_once_with(email, "password", id_list, failures={})
             
             # Verify no chaining needed for small list
             mock_chain.assert_not_called()
@@ -176,7 +190,7 @@ class TestChainRegisterHandler:
             mock_delete_create.assert_not_called()
             
             # Verify regist was called with remaining IDs
-            mock_regist.assert_called_once_with(email, "password", remaining_ids)
+            mock_regist.assert_called_once_with(email, "password", remaining_ids, failures={})
             
             # Verify response
             assert result["statusCode"] == 200
@@ -204,8 +218,11 @@ class TestChainRegisterHandler:
     
     def test_invoke_delete_and_create_chain_success(self):
         """Test successful invocation of delete and create chain (fire-and-forget)"""
-        with patch('requests.post') as mock_post, \
+        with patch('requests.Session.post') as mock_post, \
+             patch.object(ChainDispatchService, '_dispatcher', None), \
              patch.dict(os.environ, {'REGISTER_LAMBDA_ENDPOINT': 'https://test.lambda.endpoint'}):
+            # The deployed endpoint runs the hop synchronously, so the request times out
+            mock_post.side_effect = requests.exceptions.ReadTimeout
             
             # Test data
             email = "test@example.com"
@@ -215,9 +232,9 @@ class TestChainRegisterHandler:
             title = "Test Title"
             
             # Call the method
-            ChainRegisterHandler._invoke_delete_and_create_chain(
+            assert ChainRegisterHandler._invoke_delete_and_create_chain(
                 email, encrypted_password, id_list, subscription_json, title
-            )
+            ) is True
             
             # Verify the request was made with correct payload
             mock_post.assert_called_once()
@@ -225,7 +242,6 @@ class TestChainRegisterHandler:
             
             assert args[0] == 'https://test.lambda.endpoint'
             assert kwargs['headers'] == {"Content-Type": "application/json"}
-            # Fire-and-forget request, no specific timeout requirement
             
             payload = kwargs['json']
             assert payload['action'] == 'chain_register'
@@ -235,4 +251,121 @@ class TestChainRegisterHandler:
             assert payload['subscription'] == subscription_json
             assert payload['title'] == title
             assert payload['is_first_request'] is False
-            assert payload['is_delete_and_create_request'] is True
\ No newline at end of file
+            assert payload['is_delete_and_create_request'] is True
+
+    def test_adaptive_batch_uses_remaining_time(self):
+        """Test that the batch keeps growing until the time budget is used up"""
+        from app.services.batch_budget_service import BatchBudgetService
+
+        class FakeContext:
+            def __init__(self):
+                self.remaining_ms = 300000
+
+            def get_remaining_time_in_millis(self):
+                return self.remaining_ms
+
+        context = FakeContext()
+
+        def fake_regist(email, password, batch, failures=None):
+            # Each video consumes 2 seconds of the Lambda's budget
+            context.remaining_ms -= 2000 * len(batch)
+            return []
+
+        BatchBudgetService.reset()
+        try:
+            with patch('app.regist.regist', side_effect=fake_regist) as mock_regist, \
+                 patch('app.services.auth_service.AuthService.decrypt_password', return_value="password"), \
+                 patch('app.handlers.chain_register_handler.time.monotonic', side_effect=[0, 60, 60, 120, 120, 180, 180, 240]), \
+                 patch.object(ChainRegisterHandler, '_invoke_next_chain') as mock_chain, \
+                 patch.dict(os.environ, {'CHAIN_SAFETY_MARGIN_MS': '60000'}):
+
+                remaining_ids = [f"video{i}" for i in range(500)]
+                result = ChainRegisterHandler.handle(
+                    "test@example.com", "encrypted", None, None, "",
+                    remaining_ids, [], False, context=context, per_video_ms=2000
+                )
+
+            processed = sum(len(call[0][2]) for call in mock_regist.call_args_list)
+            response_data = json.loads(result["body"])
+
+            # 240 s of budget at 2 s per video fits 120 videos, more than the fixed 30
+            assert processed == 120
+            assert response_data["processed_count"] == 120
+            assert response_data["remaining_count"] == 380
+            mock_chain.assert_called_once()
+            assert mock_chain.call_args[1]["per_video_ms"] == 2000
+        finally:
+            BatchBudgetService.reset()
+
+    def test_sync_mode_registers_only_missing_videos(self):
+        """Test that sync mode keeps the mylist and only registers the difference"""
+        with patch('app.regist.delete_and_create_mylist') as mock_delete_create, \
+             patch('app.regist.prepare_sync_mylist', return_value=["sm2"]) as mock_sync, \
+             patch('app.regist.regist', return_value=[]) as mock_regist, \
+             patch('app.services.auth_service.AuthService.decrypt_password', return_value="password"):
+
+            result = ChainRegisterHandler.handle(
+                "test@example.com", "encrypted", ["sm1", "sm2"], None, "Title",
+                None, None, False, True, sync_mode=True
+            )
+
+            mock_delete_create.assert_not_called()
+            mock_sync.assert_called_once_with("test@example.com", "password", ["sm1", "sm2"], "Title")
+            mock_regist.assert_called_once_with("test@example.com", "password", ["sm2"], failures={})
+            assert json.loads(result["body"])["is_complete"] is True
+
+    def test_retryable_failures_are_retried_at_the_end(self):
+        """Test that only retryable failures are retried, once every video was tried"""
+        calls = []
+
+        def fake_regist(email, password, batch, failures=None):
+            calls.append(list(batch))
+            if len(calls) == 1:
+                failures.update({"sm2": "timeout", "sm3": "unavailable"})
+                return ["sm2", "sm3"]
+            return []
+
+        with patch('app.regist.regist', side_effect=fake_regist), \
+             patch('app.services.auth_service.AuthService.decrypt_password', return_value="password"), \
+             patch('app.services.notification_service.NotificationService.send_push_notification') as mock_notify, \
+             patch.object(ChainRegisterHandler, 'RETRY_BACKOFF_SECONDS', 0):
+            result = ChainRegisterHandler.handle(
+                "test@example.com", "encrypted", None, "{}", "",
+                ["sm1", "sm2", "sm3"], [], False
+            )
+
+        assert calls == [["sm1", "sm2", "sm3"], ["sm2"]]
+        mock_notify.assert_called_once_with("{}", ["sm3"], failure_reasons={"sm3": "unavailable"})
+        response_data = json.loads(result["body"])
+        assert response_data["is_complete"] is True
+        assert response_data["failure_reasons"] == {"sm3": "unavailable"}
+
+    def test_retry_queue_gives_up_after_max_attempts(self):
+        """Test that a video failing every retry is reported with its last reason"""
+        calls = []
+
+        def fake_regist(email, password, batch, failures=None):
+            calls.append(list(batch))
+            failures["sm1"] = "rate_limited"
+            return ["sm1"]
+
+        with patch('app.regist.regist', side_effect=fake_regist), \
+             patch('app.services.auth_service.AuthService.decrypt_password', return_value="password"), \
+             patch('app.services.notification_service.NotificationService.send_push_notification') as mock_notify, \
+             patch.object(ChainRegisterHandler, 'RETRY_BACKOFF_SECONDS', 0), \
+             patch.object(ChainRegisterHandler, '_invoke_next_chain') as mock_chain:
+            ChainRegisterHandler.handle(
+                "test@example.com", "encrypted", None, "{}", "",
+                [], [], False, retry_queue={"sm1": 0}
+            )
+            # Without a Lambda context one retry pass is made per hop
+            assert len(calls) == 1
+            assert mock_chain.call_args[1]["retry_queue"] == {"sm1": 1}
+
+            ChainRegisterHandler.handle(
+                "test@example.com", "encrypted", None, "{}", "",
+                [], [], False, retry_queue={"sm1": 1}
+            )
+
+        assert len(calls) == 2
+        mock_notify.assert_called_once_with("{}", ["sm1"], failure_reasons={"sm1": "rate_limited"})
@@ -0,0 +1,218 @@
+import json
+import os
+import pytest
+from unittest.mock import patch
+from app.handlers.chain_register_handler import ChainRegisterHandler
+from app.services.checkpoint_service import CheckpointService, LocalFileCheckpointStore
+
+
+@pytest.fixture
+def local_store(tmp_path):
+    store = LocalFileCheckpointStore(str(tmp_path))
+    CheckpointService.set_store(store)
+    yield store
+    CheckpointService.set_store(None)
+
+
+def test_disabled_without_store(monkeypatch):
+    monkeypatch.delenv("CHECKPOINT_STORE", raising=False)
+    CheckpointService.set_store(None)
+
+    CheckpointService.record("chain", "sm1", True)
+    assert not CheckpointService.is_enabled()
+    assert CheckpointService.load_results("chain") == {}
+
+
+def test_record_and_load_results(local_store):
+    CheckpointService.record("chain", "sm1", True)
+    CheckpointService.record("chain", "sm2", False)
+    # A retry that succeeds overrides the earlier failure
+    CheckpointService.record("chain", "sm2", True)
+    CheckpointService.record("other", "sm3", False)
+
+    assert CheckpointService.load_results("chain") == {"sm1": True, "sm2": True}
+
+    CheckpointService.clear("chain")
+    assert CheckpointService.load_results("chain") == {}
+    assert CheckpointService.load_results("other") == {"sm3": False}
+
+
+def test_chain_step_checkpoints_each_video(local_store):
+    def fake_regist(email, password, batch, on_result=None, failures=None):
+        on_result(batch[0], True)
+        on_result(batch[1], False)
+        raise Exception("Lambda timed out")
+
+    with patch('app.regist.regist', side_effect=fake_regist), \
+         patch('app.services.auth_service.AuthService.decrypt_password', return_value="password"):
+        result = ChainRegisterHandler.handle(
+            "test@example.com", "encrypted", None, None, "",
+            ["sm1", "sm2", "sm3"], [], False, chain_id="chain"
+        )
+
+    assert result["statusCode"] == 500
+    assert CheckpointService.load_results("chain") == {"sm1": True, "sm2": False}
+
+
+def test_resume_skips_checkpointed_videos(local_store):
+    state = {
+        "email": "test@example.com",
+        "password": "encrypted",
+        "subscription": None,
+        "title": "Title",
+        "mylist_ready": True
+    }
+    state.update(CheckpointService.save_ids("chain", ["sm1", "sm2", "sm3", "sm4"]))
+    CheckpointService.save_state("chain", state)
+    CheckpointService.record("chain", "sm1", True)
+    CheckpointService.record("chain", "sm2", False)
+
+    with patch('app.regist.regist', return_value=["sm4"]) as mock_regist, \
+         patch('app.regist.delete_and_create_mylist') as mock_delete_create, \
+         patch('app.services.auth_service.AuthService.decrypt_password', return_value="password"), \
+         patch('app.services.notification_service.NotificationService.send_push_notification'):
+        result = ChainRegisterHandler.resume("chain")
+
+    mock_delete_create.assert_not_called()
+    assert mock_regist.call_args[0][2] == ["sm3", "sm4"]
+    response_data = json.loads(result["body"])
+    assert response_data["is_complete"] is True
+    assert response_data["failed_count"] == 2
+    # A finished chain removes its checkpoints
+    assert CheckpointService.load_state("chain") is None
+
+
+def test_resume_unknown_chain(local_store):
+    result = ChainRegisterHandler.resume("missing")
+    assert result["statusCode"] == 404
+
+
+def test_id_cursor_loads_only_needed_pages(local_store, monkeypatch):
+    monkeypatch.setattr(CheckpointService, "PAGE_SIZE", 3)
+    state = CheckpointService.save_ids("chain", [f"sm{i}" for i in range(10)])
+    loaded = []
+    get_page = local_store.get_page
+    monkeypatch.setattr(local_store, "get_page", lambda chain_id, generation, index: loaded.append(index) or get_page(chain_id, generation, index))
+
+    cursor = CheckpointService.cursor("chain", state, offset=4)
+    assert len(cursor) == 6
+    assert cursor[:3] == ["sm4", "sm5", "sm6"]
+    assert loaded == [1, 2]
+
+    rest = cursor[3:]
+    assert rest.offset == 7
+    assert list(rest) == ["sm7", "sm8", "sm9"]
+    assert not rest[3:]
+
+
+def test_cursor_chain_sends_constant_size_payloads(local_store):
+    from handler import lambda_handler
+    from app.services.chain_dispatch_service import ChainDispatchService, LocalDispatcher
+
+    dispatcher = LocalDispatcher()
+    ChainDispatchService.set_dispatcher(dispatcher)
+    id_list = [f"sm{i}" for i in range(1, 101)]
+
+    def fake_regist(email, password, batch, on_result=None, failures=None):
+        for video_id in batch:
+            on_result(video_id, not video_id.endswith("7"))
+        failed = [video_id for video_id in batch if video_id.endswith("7")]
+        failures.update(dict.fromkeys(failed, "unavailable"))
+        return failed
+
+    try:
+        with patch('app.regist.regist', side_effect=fake_regist), \
+             patch('app.regist.delete_and_create_mylist'), \
+             patch('app.regist.resolve_worker_count', return_value=1), \
+             patch('app.services.auth_service.AuthService.decrypt_password', return_value="password"), \
+             patch('app.services.notification_service.NotificationService.send_push_notification') as mock_notify:
+            lambda_handler({"body": json.dumps({
+                "action": "chain_register", "email": "test@example.com", "password": "encrypted",
+                "id_list": id_list, "subscription": "{}", "title": "Title"
+            })}, None)
+
+            while dispatcher.payloads:
+                payload = dispatcher.payloads.pop(0)
+                assert "remaining_ids" not in payload and "password" not in payload
+                lambda_handler({"body": json.dumps(payload)}, None)
+    finally:
+        ChainDispatchService.set_dispatcher(None)
+
+    failed_ids = [f"sm{i}" for i in range(7, 101, 10)]
+    mock_notify.assert_called_once_with("{}", failed_ids, failure_reasons=dict.fromkeys(failed_ids, "unavailable"))
+    # The finished chain's state, pages and results are removed
+    assert os.listdir(local_store.directory) == []
+
+
+def test_cursor_chain_retries_failures_after_the_list(local_store):
+    from handler import lambda_handler
+    from app.services.chain_dispatch_service import ChainDispatchService, LocalDispatcher
+
+    dispatcher = LocalDispatcher()
+    ChainDispatchService.set_dispatcher(dispatcher)
+    calls = []
+
+    def fake_regist(email, password, batch, on_result=None, failures=None):
+        calls.append(list(batch))
+        # sm2 times out the first time only
+        failed = ["sm2"] if len(calls) == 1 else []
+        failures.update(dict.fromkeys(failed, "timeout"))
+        for video_id in batch:
+            on_result(video_id, video_id not in failed)
+        return failed
+
+    try:
+        with patch('app.regist.regist', side_effect=fake_regist), \
+             patch('app.regist.delete_and_create_mylist'), \
+             patch('app.services.auth_service.AuthService.decrypt_password', return_value="password"), \
+             patch.object(ChainRegisterHandler, 'RETRY_BACKOFF_SECONDS', 0), \
+             patch('app.services.notification_service.NotificationService.send_push_notification') as mock_notify:
+            lambda_handler({"body": json.dumps({
+                "action": "chain_register", "email": "test@example.com", "password": "encrypted",
+                "id_list": ["sm1", "sm2", "sm3"], "subscription": "{}", "title": "Title"
+            })}, None)
+
+            while dispatcher.payloads:
+                lambda_handler({"body": json.dumps(dispatcher.payloads.pop(0))}, None)
+    finally:
+        ChainDispatchService.set_dispatcher(None)
+
+    assert calls == [["sm1", "sm2", "sm3"], ["sm2"]]
+    mock_notify.assert_called_once_with("{}", [], failure_reasons={})
+
+
+def test_sync_delta_replaces_the_list_only_with_the_state(local_store, monkeypatch):
+    monkeypatch.setattr(CheckpointService, "PAGE_SIZE", 2)
+    state = {
+        "email": "test@example.com", "password": "encrypted", "subscription": None,
+        "title": "Title", "sync_mode": True, "mylist_ready": False
+    }
+    state.update(CheckpointService.save_ids("chain", ["sm1", "sm2", "sm3", "sm4"]))
+    CheckpointService.save_state("chain", state)
+    put_state = local_store.put_state
+
+    def fail_put_state(chain_id, state):
+        raise OSError("S3 unavailable")
+
+    def step():
+        return ChainRegisterHandler.handle(
+            None, None, None, is_first_request=False, is_delete_and_create_request=True,
+            chain_id="chain", offset=0
+        )
+
+    with patch('app.regist.prepare_sync_mylist', return_value=["sm3"]) as mock_sync, \
+         patch('app.regist.regist', return_value=[]) as mock_regist, \
+         patch('app.services.auth_service.AuthService.decrypt_password', return_value="password"), \
+         patch('app.services.notification_service.NotificationService.send_push_notification'):
+        monkeypatch.setattr(local_store, "put_state", fail_put_state)
+        assert step()["statusCode"] == 500
+        mock_regist.assert_not_called()
+        # The stored list is untouched, so the redelivered step syncs against all of it again
+        saved = CheckpointService.load_state("chain")
+        assert list(CheckpointService.cursor("chain", saved)) == ["sm1", "sm2", "sm3", "sm4"]
+
+        monkeypatch.setattr(local_store, "put_state", put_state)
+        assert json.loads(step()["body"])["is_complete"] is True
+
+    assert mock_sync.call_args_list[1][0][2] == ["sm1", "sm2", "sm3", "sm4"]
+    assert mock_regist.call_args[0][2] == ["sm3"]
@@ -0,0 +1,66 @@
+import pytest
+from unittest.mock import patch
+from app.handlers.register_handler import RegisterHandler
+from app.services.completion_tracker_service import CompletionTrackerService, SQLiteCompletionStore
+
+
+@pytest.fixture
+def sqlite_store():
+    store = SQLiteCompletionStore()
+    CompletionTrackerService.set_store(store)
+    yield store
+    CompletionTrackerService.set_store(None)
+
+
+def test_request_without_uuid_completes_immediately(sqlite_store):
+    CompletionTrackerService.start("")
+    assert CompletionTrackerService.finish("", ["sm1"]) == ["sm1"]
+
+
+def test_in_flight_counting_without_chunk_count(sqlite_store):
+    CompletionTrackerService.start("batch")
+    CompletionTrackerService.start("batch")
+
+    assert CompletionTrackerService.finish("batch", ["sm1"]) is None
+    assert CompletionTrackerService.finish("batch", ["sm5", "sm4"]) == ["sm5", "sm4", "sm1"]
+
+
+def test_chunk_count_waits_for_every_chunk(sqlite_store):
+    # Chunks that have not started yet are still counted
+    assert CompletionTrackerService.finish("batch", ["sm0"], chunk_count=3) is None
+    assert CompletionTrackerService.finish("batch", ["sm1"], chunk_count=3) is None
+    assert CompletionTrackerService.finish("batch", [], chunk_count=3) == ["sm0", "sm1"]
+
+    # The batch is cleaned up once complete
+    assert CompletionTrackerService.finish("batch", [], chunk_count=1) == []
+
+
+def test_register_handler_notifies_once_with_all_failures(sqlite_store):
+    with patch('app.regist.regist', side_effect=[["sm2"], ["sm3"]]), \
+         patch('app.services.notification_service.NotificationService.send_push_notification') as mock_notify:
+        RegisterHandler.handle("email", "password", ["sm1", "sm2"], "{}", "batch", "0", 2)
+        mock_notify.assert_not_called()
+
+        RegisterHandler.handle("email", "password", ["sm3", "sm4"], "{}", "batch", "1", 2)
+        mock_notify.assert_called_once_with("{}", ["sm3", "sm2"])
+
+
+def test_register_handler_counts_out_crashed_chunk(sqlite_store):
+    with patch('app.regist.regist', side_effect=Exception("Chrome crashed")), \
+         patch('app.services.notification_service.NotificationService.send_push_notification') as mock_notify:
+        result = RegisterHandler.handle("email", "password", ["sm1"], "{}", "batch", "0", 1)
+
+    assert result["statusCode"] == 500
+    mock_notify.assert_called_once_with("{}", ["sm1"])
+
+
+def test_sqlite_fallback_warns_in_lambda(monkeypatch, capsys):
+    monkeypatch.delenv("COMPLETION_TRACKER_TABLE", raising=False)
+    monkeypatch.setenv("AWS_LAMBDA_FUNCTION_NAME", "register")
+    CompletionTrackerService.set_store(None)
+    try:
+        assert isinstance(CompletionTrackerService.get_store(), SQLiteCompletionStore)
+    finally:
+        CompletionTrackerService.set_store(None)
+
+    assert "COMPLETION_TRACKER_TABLE is not set" in capsys.readouterr().out
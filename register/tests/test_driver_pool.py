@@ -0,0 +1,154 @@
+import threading
+
+import pytest
+from app.helpers import driver_pool, selenium_helper
+
+
+class FakeDriver:
+    def __init__(self):
+        self.alive = True
+        self.quit_called = False
+        self.cdp_commands = []
+        self.window_handles = ["main"]
+
+    def set_window_size(self, w, h):
+        pass
+
+    def execute_script(self, script):
+        if not self.alive:
+            raise Exception("chrome not reachable")
+        return 1
+
+    def execute_cdp_cmd(self, cmd, params):
+        self.cdp_commands.append(cmd)
+
+    @property
+    def switch_to(self):
+        return self
+
+    def window(self, handle):
+        pass
+
+    def get(self, url):
+        pass
+
+    def quit(self):
+        self.quit_called = True
+
+
+@pytest.fixture
+def created(monkeypatch):
+    created = []
+
+    def fake_create_chrome_driver():
+        driver = FakeDriver()
+        created.append(driver)
+        return driver
+
+    driver_pool.close_all()
+    monkeypatch.setattr("app.helpers.selenium_helper.create_chrome_driver", fake_create_chrome_driver)
+    yield created
+    driver_pool.close_all()
+
+
+def test_healthy_driver_is_reused(created):
+    driver = driver_pool.acquire("a@example.com")
+    driver_pool.release(driver)
+
+    assert driver_pool.acquire("a@example.com") is driver
+    assert len(created) == 1
+    # Same account keeps its cookies
+    assert driver.cdp_commands == []
+
+
+def test_driver_is_reset_between_accounts(created):
+    driver = driver_pool.acquire("a@example.com")
+    driver_pool.release(driver)
+
+    assert driver_pool.acquire("b@example.com") is driver
+    assert driver.cdp_commands == ["Network.clearBrowserCookies"]
+
+
+def test_driver_is_reset_for_same_email_with_other_password(created):
+    from app.services.session_cache_service import SessionCacheService
+
+    driver = driver_pool.acquire(SessionCacheService.account_key("a@example.com", "password"))
+    driver_pool.release(driver)
+
+    # Knowing the email alone must not hand over the logged-in browser
+    assert driver_pool.acquire(SessionCacheService.account_key("a@example.com", "guess")) is driver
+    assert driver.cdp_commands == ["Network.clearBrowserCookies"]
+
+
+def test_dead_driver_is_replaced(created):
+    driver = driver_pool.acquire("a@example.com")
+    driver_pool.release(driver)
+    driver.alive = False
+
+    new_driver = driver_pool.acquire("a@example.com")
+
+    assert new_driver is not driver
+    assert driver.quit_called
+
+
+def test_unhealthy_driver_is_not_pooled(created):
+    driver = driver_pool.acquire("a@example.com")
+    driver_pool.release(driver, healthy=False)
+
+    assert driver.quit_called
+    assert driver_pool.idle_count() == 0
+
+
+def test_driver_is_recycled_after_max_uses(created, monkeypatch):
+    monkeypatch.setenv("DRIVER_POOL_MAX_USES", "2")
+
+    driver = driver_pool.acquire("a@example.com")
+    driver_pool.release(driver)
+    driver_pool.release(driver_pool.acquire("a@example.com"))
+
+    assert driver.quit_called
+    assert driver_pool.acquire("a@example.com") is not driver
+
+
+def test_prewarmed_driver_is_used_by_acquire(created):
+    thread = driver_pool.prewarm_async()
+    assert thread is not None
+    # A second call while the first launch runs (or its driver is idle) starts nothing
+    assert driver_pool.prewarm_async() is None
+
+    driver = driver_pool.acquire("a@example.com")
+
+    assert len(created) == 1
+    assert driver is created[0]
+
+
+def test_acquire_waits_for_prewarm_in_progress(created, monkeypatch):
+    release_launch = threading.Event()
+    fake_create = selenium_helper.create_chrome_driver
+
+    def slow_create():
+        release_launch.wait(5)
+        return fake_create()
+
+    monkeypatch.setattr("app.helpers.selenium_helper.create_chrome_driver", slow_create)
+    driver_pool.prewarm_async()
+    threading.Timer(0.05, release_launch.set).start()
+
+    driver_pool.acquire("a@example.com")
+
+    assert len(created) == 1
+
+
+def test_failed_prewarm_falls_back_to_launch(created, monkeypatch):
+    fake_create = selenium_helper.create_chrome_driver
+
+    def failing_create():
+        raise Exception("chrome failed to start")
+
+    monkeypatch.setattr("app.helpers.selenium_helper.create_chrome_driver", failing_create)
+    driver_pool.prewarm_async().join()
+    monkeypatch.setattr("app.helpers.selenium_helper.create_chrome_driver", fake_create)
+
+    driver_pool.acquire("a@example.com")
+
+    assert len(created) == 1
@@ -0,0 +1,69 @@
+from selenium.common.exceptions import InvalidSessionIdException, NoSuchElementException, TimeoutException
+from unittest.mock import patch
+from app.engines import HttpEngine, NicoApiError
+from app.handlers.register_handler import RegisterHandler
+from app.helpers.selenium_helper import ElementWaitTimeout, NetworkRequestError
+from app.services.failure_service import FailureService
+from tests.fakes.fake_niconico_server import FakeNiconicoServer, FakeNiconicoState
+
+
+def test_classify_api_errors():
+    assert FailureService.classify(NicoApiError("POST failed: 429", 429)) == "rate_limited"
+    assert FailureService.classify(NetworkRequestError("https://nvapi/items", 404)) == "unavailable"
+    assert FailureService.classify(NicoApiError(
+        'POST failed: 409 - {"meta":{"status":409,"errorCode":"MAX_ITEM_COUNT_EXCEEDED"}}', 409
+    )) == "mylist_full"
+    assert FailureService.classify(NicoApiError("POST failed: 503", 503)) == "server_error"
+
+
+def test_classify_browser_errors():
+    assert FailureService.classify(ElementWaitTimeout("No candidate of video_menu_button became visible")) \
+        == "element_missing"
+    # Page loads and network waits time out without a message too
+    assert FailureService.classify(TimeoutException()) == "timeout"
+    assert FailureService.classify(TimeoutException("No response for POST /items within 10s")) == "timeout"
+    assert FailureService.classify(NoSuchElementException()) == "element_missing"
+    assert FailureService.classify(InvalidSessionIdException()) == "driver_dead"
+    assert FailureService.classify(ElementWaitTimeout(), "お探しの動画は視聴できません") == "unavailable"
+    assert FailureService.classify(Exception("boom")) == "unknown"
+
+
+def test_split_separates_retryable_failures():
+    retryable, permanent = FailureService.split(
+        ["sm1", "sm2", "sm3"], {"sm1": "timeout", "sm2": "unavailable"}
+    )
+
+    assert retryable == ["sm1"]
+    # Without a recorded reason the failure is not retried again
+    assert permanent == {"sm2": "unavailable", "sm3": "unknown"}
+
+
+def test_http_engine_records_reasons():
+    with FakeNiconicoServer(FakeNiconicoState(unavailable_ids=["sm404"])) as server:
+        with HttpEngine(nvapi_url=server.base_url, account_url=server.base_url) as engine:
+            engine.login("test@example.com", "password")
+            engine.create_mylist("Title")
+            failures = {}
+            assert engine.add_videos_to_mylist(["sm1", "sm404"], failures=failures) == ["sm404"]
+
+    assert failures == {"sm404": "unavailable"}
+
+
+def test_register_handler_retries_retryable_failures(monkeypatch):
+    monkeypatch.setattr(RegisterHandler, "RETRY_BACKOFF_SECONDS", 0)
+    calls = []
+
+    def fake_regist(email, password, id_list, failures=None):
+        calls.append(list(id_list))
+        if len(calls) == 1:
+            failures.update({"sm2": "timeout", "sm3": "unavailable", "sm4": "element_missing"})
+            return ["sm2", "sm3", "sm4"]
+        # sm2 keeps timing out; sm4 goes through on the first retry
+        failures["sm2"] = "timeout"
+        return ["sm2"]
+
+    with patch("app.regist.regist", side_effect=fake_regist):
+        failed_ids = RegisterHandler._regist_with_retries("email", "password", ["sm1", "sm2", "sm3", "sm4"])
+
+    assert calls == [["sm1", "sm2", "sm3", "sm4"], ["sm2", "sm4"], ["sm2"]]
+    assert failed_ids == ["sm2", "sm3"]
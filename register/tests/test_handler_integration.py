@@ -1,6 +1,7 @@
 import json
 import pytest
 from unittest.mock import patch
+from app.helpers import driver_pool
 from handler import lambda_handler
 
 
@@ -20,7 +21,8 @@ class TestLambdaHandler:
             })
         }
         
-        with patch('app.handlers.chain_register_handler.ChainRegisterHandler.handle') as mock_handle:
+        with patch('app.handlers.chain_register_handler.ChainRegisterHandler.handle') as mock_handle, \
+                patch('app.helpers.driver_pool.prewarm_async') as mock_prewarm:
             
             mock_handle.return_value = {
                 "statusCode": 200,
@@ -32,9 +34,14 @@ class TestLambdaHandler:
             # Verify chain handler was called with encrypted password (new behavior)
             mock_handle.assert_called_once_with(
                 "test@example.com", "encrypted_password", ["video1", "video2"],
-                None, "Test Title", None, [], True, False
+                None, "Test Title", None, [], True, False,
+                context={}, per_video_ms=None, chain_id=None, offset=None, sync_mode=False,
+                retry_queue=None, failure_reasons=None
             )
             
+            # The first hop only hands off, so no browser is launched
+            mock_prewarm.assert_not_called()
+
             # Verify response
             assert result["statusCode"] == 200
     
@@ -48,7 +55,9 @@ class TestLambdaHandler:
             })
         }
         
-        result = lambda_handler(event, {})
+        with patch('app.helpers.driver_pool.prewarm_async') as mock_prewarm:
+            result = lambda_handler(event, {})
+        mock_prewarm.assert_not_called()
         
         assert result["statusCode"] == 400
         response_data = json.loads(result["body"])
@@ -79,7 +88,78 @@ class TestLambdaHandler:
             # Verify chain handler was called with encrypted password (new behavior)
             mock_handle.assert_called_once_with(
                 "test@example.com", "encrypted_password", None,
-                None, "", ["video31", "video32"], ["failed1"], False, False
+                None, "", ["video31", "video32"], ["failed1"], False, False,
+                context={}, per_video_ms=None, chain_id=None, offset=None, sync_mode=False,
+                retry_queue=None, failure_reasons=None
             )
             
-            assert result["statusCode"] == 200
\ No newline at end of file
+            assert result["statusCode"] == 200
+
+    def test_chain_hop_prewarms_after_decryption(self, monkeypatch):
+        """A chain hop starts Chrome only once its credentials decrypted"""
+        monkeypatch.setenv("DRIVER_PREWARM", "1")
+        event = {
+            "body": json.dumps({
+                "action": "chain_register",
+                "email": "test@example.com",
+                "password": "encrypted_password",
+                "remaining_ids": ["video31"],
+                "is_first_request": False
+            })
+        }
+
+        with patch('app.services.auth_service.AuthService.decrypt_password', side_effect=ValueError("bad")), \
+                patch('app.helpers.driver_pool.prewarm_async') as mock_prewarm:
+            assert lambda_handler(event, {})["statusCode"] == 500
+        mock_prewarm.assert_not_called()
+
+        with patch('app.services.auth_service.AuthService.decrypt_password', return_value="password"), \
+                patch('app.regist.regist', return_value=[]), \
+                patch('app.helpers.driver_pool.prewarm_async') as mock_prewarm:
+            assert lambda_handler(event, {})["statusCode"] == 200
+        mock_prewarm.assert_called_once_with()
+
+    def test_cursor_hop_prewarms_before_loading_its_state(self, monkeypatch):
+        """Cursor hops are internal, so Chrome boots while their state loads"""
+        monkeypatch.setenv("DRIVER_PREWARM", "1")
+        calls = []
+        event = {
+            "body": json.dumps({
+                "action": "chain_register",
+                "chain_id": "chain1",
+                "offset": 0,
+                "is_first_request": False
+            })
+        }
+
+        with patch('app.helpers.driver_pool.prewarm_async', side_effect=lambda: calls.append("prewarm")), \
+                patch('app.services.checkpoint_service.CheckpointService.load_state',
+                      side_effect=lambda chain_id: calls.append("load_state")):
+            assert lambda_handler(event, {})["statusCode"] == 404
+        assert calls == ["prewarm", "load_state"]
+
+    def test_register_does_not_prewarm_when_decryption_fails(self, monkeypatch):
+        """A request rejected with 400 never launches Chrome"""
+        monkeypatch.setenv("DRIVER_PREWARM", "1")
+        event = {
+            "body": json.dumps({
+                "action": "register",
+                "email": "test@example.com",
+                "password": "not-encrypted",
+                "id_list": ["sm9"]
+            })
+        }
+
+        with patch('app.helpers.driver_pool.prewarm_async') as mock_prewarm:
+            assert lambda_handler(event, {})["statusCode"] == 400
+        mock_prewarm.assert_not_called()
+
+    def test_prewarm_skipped_for_http_engine(self, monkeypatch):
+        """The HTTP engine only falls back to Chrome, so nothing is prewarmed"""
+        monkeypatch.setenv("DRIVER_PREWARM", "1")
+        monkeypatch.setenv("REGIST_ENGINE", "http")
+
+        with patch('app.helpers.driver_pool.prewarm_async') as mock_prewarm:
+            driver_pool.prewarm_if_enabled()
+
+        mock_prewarm.assert_not_called()
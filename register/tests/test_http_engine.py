@@ -0,0 +1,165 @@
+import pytest
+from app.engines import HttpEngine, NicoApiError, use_http_engine
+from tests.fakes.fake_niconico_server import FakeNiconicoServer, FakeNiconicoState
+
+
+@pytest.fixture
+def server():
+    with FakeNiconicoServer(FakeNiconicoState(unavailable_ids=["sm404"])) as server:
+        yield server
+
+
+def make_engine(server):
+    return HttpEngine(nvapi_url=server.base_url, account_url=server.base_url)
+
+
+def test_login_failure_raises(server):
+    with make_engine(server) as engine:
+        with pytest.raises(NicoApiError):
+            engine.login("test@example.com", "wrong")
+
+
+def test_delete_create_and_add(server):
+    server.state.create_mylist("old1")
+    server.state.create_mylist("old2")
+
+    with make_engine(server) as engine:
+        engine.login("test@example.com", "password")
+        engine.remove_all_mylist()
+        assert engine.list_mylist_ids() == []
+
+        title = engine.create_mylist("New List")
+        assert title == "New List"
+
+        failed_ids = engine.add_videos_to_mylist(["sm1", "sm404", "sm2", "sm1"])
+
+    assert failed_ids == ["sm404"]
+    mylists = list(server.state.mylists.values())
+    assert len(mylists) == 1
+    assert mylists[0]["name"] == "New List"
+    assert mylists[0]["items"] == ["sm1", "sm2"]
+
+
+def test_unauthenticated_add_raises(server):
+    server.state.create_mylist("list")
+    with make_engine(server) as engine:
+        with pytest.raises(NicoApiError) as excinfo:
+            engine.add_videos_to_mylist(["sm1"], mylist_id=1)
+    assert excinfo.value.status_code == 401
+
+
+def test_engine_selection(monkeypatch):
+    monkeypatch.delenv("REGIST_ENGINE", raising=False)
+    assert not use_http_engine()
+
+    monkeypatch.setenv("REGIST_ENGINE", "HTTP")
+    assert use_http_engine()
+
+    monkeypatch.setenv("REGIST_ENGINE", "unknown")
+    assert not use_http_engine()
+
+
+def test_regist_uses_http_engine(server, monkeypatch):
+    monkeypatch.setenv("REGIST_ENGINE", "http")
+    monkeypatch.setenv("NVAPI_URL", server.base_url)
+    monkeypatch.setenv("ACCOUNT_URL", server.base_url)
+
+    def fail_create_chrome_driver():
+        raise AssertionError("Selenium should not be used")
+
+    monkeypatch.setattr("app.regist.selenium_helper.create_chrome_driver", fail_create_chrome_driver)
+
+    from app import regist
+    regist.delete_and_create_mylist("test@example.com", "password", "Title")
+    failed_ids = regist.regist("test@example.com", "password", ["sm1", "sm404"])
+
+    assert failed_ids == ["sm404"]
+
+
+def test_regist_falls_back_to_selenium(server, monkeypatch):
+    monkeypatch.setenv("REGIST_ENGINE", "http")
+    monkeypatch.setenv("NVAPI_URL", server.base_url)
+    monkeypatch.setenv("ACCOUNT_URL", server.base_url)
+
+    class DummyDriver:
+        def set_window_size(self, w, h):
+            pass
+        def quit(self):
+            pass
+
+    monkeypatch.setattr("app.regist.selenium_helper.create_chrome_driver", DummyDriver)
+    monkeypatch.setattr("app.regist.login", lambda driver, email, password: None)
+    monkeypatch.setattr("app.regist.add_videos_to_mylist", lambda driver, id_list, on_result=None, failures=None: [])
+
+    from app import regist
+    # Wrong password makes the HTTP login fail, so the Selenium path runs
+    failed_ids = regist.regist("test@example.com", "wrong", ["sm1"])
+
+    assert failed_ids == []
+
+
+def test_regist_falls_back_with_only_pending_videos(server, monkeypatch):
+    monkeypatch.setenv("REGIST_ENGINE", "http")
+    monkeypatch.setenv("NVAPI_URL", server.base_url)
+    monkeypatch.setenv("ACCOUNT_URL", server.base_url)
+    server.state.create_mylist("list")
+    add_video = HttpEngine.add_video
+
+    def add_video_until_session_expires(engine, mylist_id, video_id):
+        if video_id == "sm3":
+            raise NicoApiError("session expired", 401)
+        add_video(engine, mylist_id, video_id)
+
+    selenium_ids = []
+    results = []
+    monkeypatch.setattr(HttpEngine, "add_video", add_video_until_session_expires)
+    monkeypatch.setattr("app.regist._regist_with_selenium",
+                        lambda email, password, id_list, *args: selenium_ids.extend(id_list) or ["sm4"])
+
+    from app import regist
+    failed_ids = regist.regist("test@example.com", "password", ["sm1", "sm404", "sm3", "sm4"],
+                               on_result=lambda video_id, ok: results.append((video_id, ok)))
+
+    # sm1 was added and sm404 failed over HTTP, so neither is attempted again
+    assert selenium_ids == ["sm3", "sm4"]
+    assert results == [("sm1", True), ("sm404", False)]
+    assert failed_ids == ["sm404", "sm4"]
+
+
+def test_sync_mylist_only_changes_the_difference(server):
+    mylist_id = server.state.create_mylist("List")
+    for video_id in ["sm1", "sm2", "sm3"]:
+        server.state.add_item(mylist_id, video_id)
+
+    with make_engine(server) as engine:
+        engine.login("test@example.com", "password")
+        ids_to_add = engine.sync_mylist(["sm2", "sm4", "sm3", "sm5"])
+        assert ids_to_add == ["sm4", "sm5"]
+        assert engine.add_videos_to_mylist(ids_to_add) == []
+
+        # Resubmitting the same list is a no-op
+        requests_before = server.state.request_count
+        assert engine.sync_mylist(["sm2", "sm4", "sm3", "sm5"]) == []
+
+    assert server.state.request_count - requests_before == 2
+    assert list(server.state.mylists) == [mylist_id]
+    assert sorted(server.state.mylists[mylist_id]["items"]) == ["sm2", "sm3", "sm4", "sm5"]
+
+
+def test_sync_mylist_creates_missing_mylist(server):
+    with make_engine(server) as engine:
+        engine.login("test@example.com", "password")
+        assert engine.sync_mylist(["sm1"], "New List") == ["sm1"]
+
+    assert [mylist["name"] for mylist in server.state.mylists.values()] == ["New List"]
+
+
+def test_regist_prepare_sync_uses_http_engine(server, monkeypatch):
+    monkeypatch.setenv("REGIST_ENGINE", "http")
+    monkeypatch.setenv("NVAPI_URL", server.base_url)
+    monkeypatch.setenv("ACCOUNT_URL", server.base_url)
+    mylist_id = server.state.create_mylist("List")
+    server.state.add_item(mylist_id, "sm9")
+
+    from app import regist
+    assert regist.prepare_sync_mylist("test@example.com", "password", ["sm1", "sm9"]) == ["sm1"]
@@ -0,0 +1,68 @@
+import json
+import subprocess
+import sys
+
+from benchmarks.bench_imports import ROOT, parse_importtime
+
+HEAVY_MODULES = ["selenium", "boto3", "requests", "cryptography"]
+
+
+def loaded_modules(statement):
+    script = f"import json, sys\n{statement}\nprint(json.dumps(sorted(sys.modules)))"
+    result = subprocess.run([sys.executable, "-c", script], cwd=ROOT, capture_output=True, text=True, check=True)
+    return set(json.loads(result.stdout.splitlines()[-1]))
+
+
+def test_health_check_does_not_import_heavy_dependencies():
+    modules = loaded_modules(
+        "import handler\n"
+        "handler.lambda_handler({'body': json.dumps({'health_check': True})}, None)\n"
+        "handler.lambda_handler({'body': json.dumps({'action': 'register'})}, None)"
+    )
+
+    assert [name for name in HEAVY_MODULES if name in modules] == []
+
+
+def test_chain_handler_does_not_import_heavy_dependencies():
+    modules = loaded_modules("import app.handlers.chain_register_handler")
+
+    assert [name for name in ("selenium", "boto3", "requests") if name in modules] == []
+
+
+def test_first_chain_hop_does_not_import_heavy_dependencies(tmp_path):
+    modules = loaded_modules(
+        "import os\n"
+        f"os.environ.update(CHAIN_DISPATCH_BACKEND='local', CHECKPOINT_STORE='local', CHECKPOINT_DIR={str(tmp_path)!r})\n"
+        "import handler\n"
+        "body = {'action': 'chain_register', 'email': 'user@example.com', 'password': 'x', 'id_list': ['sm9', 'sm10']}\n"
+        "assert handler.lambda_handler({'body': json.dumps(body)}, None)['statusCode'] == 200"
+    )
+
+    assert [name for name in ("selenium", "boto3", "requests") if name in modules] == []
+
+
+def test_classifying_http_failures_does_not_import_selenium():
+    modules = loaded_modules(
+        "from app.engines import NicoApiError\n"
+        "from app.services.failure_service import FailureService\n"
+        "assert FailureService.classify(NicoApiError('Request failed', 503)) == 'server_error'\n"
+        "assert FailureService.classify(TimeoutError('read timed out')) == 'unknown'"
+    )
+
+    assert "selenium" not in modules
+
+
+def test_driver_pool_leaves_selenium_to_the_prewarm_thread():
+    modules = loaded_modules("from app.helpers import driver_pool")
+
+    assert "selenium" not in modules
+
+
+def test_parse_importtime():
+    stderr = (
+        "import time: self [us] | cumulative | imported package\n"
+        "import time:       120 |        120 |   json.decoder\n"
+        "import time:       300 |        420 | json\n"
+    )
+
+    assert parse_importtime(stderr) == [("json.decoder", 120, 120, 1), ("json", 300, 420, 0)]
@@ -0,0 +1,66 @@
+import json
+import pytest
+from app.helpers import profiler
+
+
+class ExecuteDriver:
+    def __init__(self):
+        self.commands = []
+
+    def execute(self, driver_command, params=None):
+        self.commands.append(driver_command)
+        return {"value": None}
+
+
+@pytest.fixture
+def enabled(monkeypatch, tmp_path):
+    monkeypatch.setenv("SELENIUM_PROFILE", "1")
+    monkeypatch.setenv("SELENIUM_PROFILE_DIR", str(tmp_path))
+    profiler.reset()
+    yield tmp_path
+    profiler.reset()
+
+
+def test_commands_are_attributed_to_sections(enabled):
+    driver = profiler.instrument(ExecuteDriver())
+
+    @profiler.profiled()
+    def wait_and_click(d):
+        d.execute("findElement")
+        d.execute("clickElement")
+
+    with profiler.section("regist"):
+        with profiler.section("video:sm9"):
+            wait_and_click(driver)
+        driver.execute("get")
+
+    rows = {(row["section"], row["command"]): row for row in profiler.build_report()["rows"]}
+
+    assert rows[("regist > video:sm9 > wait_and_click", "findElement")]["count"] == 1
+    assert rows[("regist > video:sm9 > wait_and_click", "clickElement")]["count"] == 1
+    assert rows[("regist", "get")]["count"] == 1
+    assert ("regist > video:sm9", profiler.SECTION_COMMAND) in rows
+    assert profiler.build_report()["command_count"] == 3
+
+
+def test_report_writes_json_and_resets(enabled):
+    driver = profiler.instrument(ExecuteDriver())
+    with profiler.section("login"):
+        driver.execute("get")
+
+    path = profiler.report("regist")
+
+    with open(path) as f:
+        data = json.load(f)
+    assert data["label"] == "regist"
+    assert data["command_count"] == 1
+    assert profiler.build_report()["rows"] == []
+
+
+def test_disabled_profiler_is_a_no_op(monkeypatch):
+    monkeypatch.delenv("SELENIUM_PROFILE", raising=False)
+    driver = ExecuteDriver()
+    original_execute = driver.execute
+
+    assert profiler.instrument(driver).execute == original_execute
+    assert profiler.report("regist") is None
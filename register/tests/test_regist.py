@@ -13,6 +13,7 @@ def test_lambda_handler_success():
 
 def test_process_regist_retry(monkeypatch):
     call_count = {"count": 0}
+    attempted = []
 
     class DummyDriver:
         def __init__(self):
@@ -21,11 +22,6 @@ def test_process_regist_retry(monkeypatch):
             pass
         def quit(self):
             self.closed = True
-        @property
-        def title(self):
-            if call_count["count"] < 2:
-                raise Exception("Driver crashed")
-            return "title"
 
     def dummy_create_chrome_driver():
         call_count["count"] += 1
@@ -34,10 +30,12 @@ def test_process_regist_retry(monkeypatch):
     def dummy_login(driver, email, password):
         pass
 
-    def dummy_add_videos_to_mylist(driver, id_list):
-        # Fail first two calls, succeed on third
-        if call_count["count"] < 3:
-            return id_list
+    def dummy_add_videos_to_mylist(driver, id_list, on_result=None, failures=None):
+        attempted.append(list(id_list))
+        # The first driver dies after finishing id1
+        on_result(id_list[0], True)
+        if call_count["count"] < 2:
+            raise Exception("Driver crashed")
         return []
 
     monkeypatch.setattr("app.regist.selenium_helper.create_chrome_driver", dummy_create_chrome_driver)
@@ -47,4 +45,285 @@ def test_process_regist_retry(monkeypatch):
     from app.regist import regist
     failed_ids = regist("email", "password", ["id1", "id2"], max_retries=3)
     assert failed_ids == []
+    # Only the unfinished video is redone on the fresh driver
+    assert attempted == [["id1", "id2"], ["id2"]]
 
+
+def test_process_regist_does_not_retry_failures(monkeypatch):
+    calls = []
+
+    class DummyDriver:
+        def set_window_size(self, w, h):
+            pass
+        def quit(self):
+            pass
+
+    def dummy_add_videos_to_mylist(driver, id_list, on_result=None, failures=None):
+        calls.append(list(id_list))
+        failures["id2"] = "timeout"
+        return ["id2"]
+
+    monkeypatch.setattr("app.regist.selenium_helper.create_chrome_driver", DummyDriver)
+    monkeypatch.setattr("app.regist.login", lambda driver, email, password: None)
+    monkeypatch.setattr("app.regist.add_videos_to_mylist", dummy_add_videos_to_mylist)
+
+    from app.regist import regist
+    failures = {}
+    assert regist("email", "password", ["id1", "id2"], failures=failures) == ["id2"]
+    assert failures == {"id2": "timeout"}
+    assert calls == [["id1", "id2"]]
+
+
+def test_regist_parallel_merges_failed_ids(monkeypatch):
+    created = []
+
+    class DummyDriver:
+        def set_window_size(self, w, h):
+            pass
+        def quit(self):
+            pass
+
+    def dummy_create_chrome_driver():
+        driver = DummyDriver()
+        created.append(driver)
+        return driver
+
+    def dummy_add_videos_to_mylist(driver, id_list, on_result=None, failures=None):
+        return [video_id for video_id in id_list if video_id.endswith("bad")]
+
+    monkeypatch.setattr("app.regist.selenium_helper.create_chrome_driver", dummy_create_chrome_driver)
+    monkeypatch.setattr("app.regist.login", lambda driver, email, password: None)
+    monkeypatch.setattr("app.regist.add_videos_to_mylist", dummy_add_videos_to_mylist)
+    monkeypatch.setattr("app.regist._available_memory_mb", lambda: 4096)
+
+    from app.regist import regist
+    id_list = ["sm1", "sm2bad", "sm3", "sm4bad", "sm5"]
+    failed_ids = regist("email", "password", id_list, workers=3)
+
+    assert failed_ids == ["sm2bad", "sm4bad"]
+    assert len(created) == 3
+
+
+def test_regist_parallel_isolates_driver_crash(monkeypatch):
+    class DummyDriver:
+        def set_window_size(self, w, h):
+            pass
+        def quit(self):
+            pass
+
+    def dummy_add_videos_to_mylist(driver, id_list, on_result=None, failures=None):
+        if id_list == ["sm2"]:
+            raise Exception("Driver crashed")
+        return []
+
+    monkeypatch.setattr("app.regist.selenium_helper.create_chrome_driver", DummyDriver)
+    monkeypatch.setattr("app.regist.login", lambda driver, email, password: None)
+    monkeypatch.setattr("app.regist.add_videos_to_mylist", dummy_add_videos_to_mylist)
+    monkeypatch.setattr("app.regist._available_memory_mb", lambda: 4096)
+
+    from app.regist import regist
+    failed_ids = regist("email", "password", ["sm1", "sm2", "sm3", "sm4"], workers=2)
+
+    assert failed_ids == ["sm2"]
+
+
+def test_resolve_worker_count_is_capped(monkeypatch):
+    from app.regist import resolve_worker_count, MAX_THREADS
+
+    monkeypatch.setattr("app.regist._available_memory_mb", lambda: 8192)
+    assert resolve_worker_count(10) == MAX_THREADS
+
+    monkeypatch.setattr("app.regist._available_memory_mb", lambda: 1024)
+    assert resolve_worker_count(3) == 1
+
+    monkeypatch.setenv("REGIST_WORKERS", "2")
+    monkeypatch.setattr("app.regist._available_memory_mb", lambda: 8192)
+    assert resolve_worker_count() == 2
+
+
+class ScriptDriver:
+    def __init__(self, result):
+        self.result = result
+        self.visited = []
+
+    def get(self, url):
+        self.visited.append(url)
+
+    def set_script_timeout(self, timeout):
+        pass
+
+    def execute_async_script(self, script, *args):
+        if isinstance(self.result, Exception):
+            raise self.result
+        return self.result
+
+
+def test_remove_all_mylist_uses_bulk_delete(monkeypatch):
+    from app import regist
+
+    ui_calls = []
+    monkeypatch.setattr("app.regist.remove_all_mylist_by_ui", lambda driver: ui_calls.append(driver))
+
+    driver = ScriptDriver({"deleted": 25, "statuses": [200] * 25, "remaining": 0})
+    regist.remove_all_mylist(driver)
+
+    assert ui_calls == []
+    # Page loads no longer depend on the number of mylists
+    assert driver.visited == [regist.MYLIST_URL, regist.MYLIST_URL]
+
+
+def test_remove_all_mylist_falls_back_to_ui(monkeypatch):
+    from app import regist
+
+    ui_calls = []
+    monkeypatch.setattr("app.regist.remove_all_mylist_by_ui", lambda driver: ui_calls.append(driver))
+
+    driver = ScriptDriver({"error": "Error: list mylists failed: 401"})
+    regist.remove_all_mylist(driver)
+    assert ui_calls == [driver]
+
+    driver = ScriptDriver({"deleted": 2, "statuses": [200, 500], "remaining": 1})
+    regist.remove_all_mylist(driver)
+    assert ui_calls[-1] is driver
+
+
+def test_add_video_runs_clicks_as_one_script(monkeypatch):
+    from app import regist as regist_module
+    clicks = []
+
+    class Driver:
+        def get(self, url):
+            pass
+
+    monkeypatch.setattr(regist_module, "_scripted_add_failures", 0)
+    monkeypatch.setattr("app.regist.selector_registry.click_sequence", lambda driver, targets: len(targets))
+    monkeypatch.setattr("app.regist.selector_registry.click",
+                        lambda driver, target, timeout=10: clicks.append((target, timeout)))
+    monkeypatch.setattr("app.regist.selenium_helper.drain_network_log", lambda driver: None)
+    monkeypatch.setattr("app.regist.selenium_helper.wait_for_network_response", lambda *args: None)
+
+    regist_module._add_video_to_mylist(Driver(), "sm9")
+
+    assert clicks == []
+
+
+def test_add_video_finishes_with_clicks_where_script_stopped(monkeypatch):
+    from app import regist as regist_module
+    clicks = []
+
+    class Driver:
+        def get(self, url):
+            pass
+
+    monkeypatch.setattr(regist_module, "_scripted_add_failures", 0)
+    monkeypatch.setattr(regist_module, "_scripted_add_skipped", 0)
+    monkeypatch.setattr("app.regist.selector_registry.click_sequence", lambda driver, targets: 1)
+    monkeypatch.setattr("app.regist.selector_registry.click",
+                        lambda driver, target, timeout=10: clicks.append((target, timeout)))
+    monkeypatch.setattr("app.regist.selenium_helper.drain_network_log", lambda driver: None)
+    monkeypatch.setattr("app.regist.selenium_helper.wait_for_network_response", lambda *args: None)
+
+    for _ in range(regist_module.SCRIPTED_ADD_MAX_FAILURES):
+        regist_module._add_video_to_mylist(Driver(), "sm9")
+
+    assert clicks[:2] == [("video_add_to_mylist", 2), ("video_mylist_select", 10)]
+    # The script keeps stopping where clicks succeed, so it is skipped for now
+    assert not regist_module._scripted_add_enabled()
+
+
+def test_scripted_add_is_tried_again_after_per_click_adds(monkeypatch):
+    from app import regist as regist_module
+    scripts = []
+
+    class Driver:
+        def get(self, url):
+            pass
+
+    monkeypatch.setattr(regist_module, "_scripted_add_failures", regist_module.SCRIPTED_ADD_MAX_FAILURES)
+    monkeypatch.setattr(regist_module, "_scripted_add_skipped", 0)
+    monkeypatch.setattr("app.regist.selector_registry.click_sequence",
+                        lambda driver, targets: scripts.append(targets) or len(targets))
+    monkeypatch.setattr("app.regist.selector_registry.click", lambda driver, target, timeout=10: None)
+    monkeypatch.setattr("app.regist.selenium_helper.drain_network_log", lambda driver: None)
+    monkeypatch.setattr("app.regist.selenium_helper.wait_for_network_response", lambda *args: None)
+
+    for _ in range(regist_module.SCRIPTED_ADD_RETRY_AFTER):
+        regist_module._add_video_to_mylist(Driver(), "sm9")
+    assert scripts == []
+
+    regist_module._add_video_to_mylist(Driver(), "sm9")
+
+    # The retried script finished the sequence, so it is used again from now on
+    assert len(scripts) == 1
+    assert regist_module._scripted_add_failures == 0
+    assert regist_module._scripted_add_enabled()
+
+
+class TabDriver:
+    """Fake driver whose tabs keep the URL last assigned to window.location"""
+
+    def __init__(self):
+        self.urls = {"tab0": "about:blank"}
+        self.current_window_handle = "tab0"
+        self.closed = []
+        self.title = "watch"
+        self.switch_to = self
+
+    def window(self, handle):
+        self.current_window_handle = handle
+
+    def new_window(self, type_hint):
+        self.current_window_handle = f"tab{len(self.urls)}"
+        self.urls[self.current_window_handle] = "about:blank"
+
+    def execute_script(self, script, *args):
+        if script.startswith("window.location.href"):
+            self.urls[self.current_window_handle] = args[0]
+            return None
+        return self.urls[self.current_window_handle].endswith(f"/watch/{args[0]}")
+
+    def execute_cdp_cmd(self, cmd, params):
+        pass
+
+    def close(self):
+        self.closed.append(self.current_window_handle)
+
+
+def test_add_videos_pipelines_pages_across_tabs(monkeypatch):
+    from app import regist as regist_module
+    clicked = []
+    results = []
+
+    def click_add(driver):
+        url = driver.urls[driver.current_window_handle]
+        if url.endswith("sm3"):
+            raise Exception("menu not found")
+        clicked.append((driver.current_window_handle, url.rsplit("/", 1)[-1]))
+
+    monkeypatch.setenv("REGIST_PIPELINE_TABS", "2")
+    monkeypatch.setattr("app.regist._click_add_to_mylist", click_add)
+    monkeypatch.setattr("app.regist.selenium_helper.report_page_weight", lambda driver, label: None)
+
+    driver = TabDriver()
+    failed = regist_module.add_videos_to_mylist(driver, ["sm1", "sm2", "sm3", "sm4"],
+                                                on_result=lambda video_id, ok: results.append((video_id, ok)))
+
+    # Each video is handled in the tab that was loading it, alternating between the two
+    assert clicked == [("tab0", "sm1"), ("tab1", "sm2"), ("tab1", "sm4")]
+    assert failed == ["sm3"]
+    assert results == [("sm1", True), ("sm2", True), ("sm3", False), ("sm4", True)]
+    # Extra tabs are closed and the driver is left on the original one
+    assert driver.closed == ["tab1"]
+    assert driver.current_window_handle == "tab0"
+
+
+def test_add_videos_is_serial_without_pipeline_tabs(monkeypatch):
+    from app import regist as regist_module
+    added = []
+
+    monkeypatch.delenv("REGIST_PIPELINE_TABS", raising=False)
+    monkeypatch.setattr("app.regist._add_video_to_mylist", lambda driver, video_id: added.append(video_id))
+    monkeypatch.setattr("app.regist.selenium_helper.report_page_weight", lambda driver, label: None)
+
+    assert regist_module.add_videos_to_mylist(TabDriver(), ["sm1", "sm2"]) == []
+    assert added == ["sm1", "sm2"]
@@ -0,0 +1,116 @@
+import pytest
+from selenium.common.exceptions import TimeoutException
+from app.helpers import selector_registry
+
+TARGETS = selector_registry.SELECTORS
+
+
+class FakeElement:
+    def __init__(self, name):
+        self.name = name
+        self.clicked = False
+
+    def click(self):
+        self.clicked = True
+
+
+class PageDriver:
+    """Resolves candidates like FIND_CANDIDATE_SCRIPT against {selector value: (element, lookup ms)}"""
+
+    def __init__(self, page):
+        self.page = page
+        self.scripts = 0
+
+    def execute_script(self, script, candidates):
+        self.scripts += 1
+        for index, (by, value) in enumerate(candidates):
+            if value in self.page:
+                element, lookup_ms = self.page[value]
+                return [index, element, lookup_ms]
+        return None
+
+
+@pytest.fixture(autouse=True)
+def selectors(monkeypatch):
+    monkeypatch.setattr(selector_registry, "SELECTORS", {
+        "menu": [
+            (selector_registry.XPATH, "/html/body/div[13]/button"),
+            (selector_registry.CSS, "#app button.menu"),
+            (selector_registry.XPATH, '//button[@aria-label="メニュー"]'),
+        ],
+    })
+    selector_registry.reset()
+    yield
+    selector_registry.reset()
+
+
+def test_falls_back_to_next_candidate():
+    element = FakeElement("menu")
+    driver = PageDriver({"#app button.menu": (element, 0.2)})
+
+    selector_registry.click(driver, "menu")
+
+    assert element.clicked
+    # One round trip tries every candidate
+    assert driver.scripts == 1
+    stats = selector_registry.stats()["menu"]
+    assert (stats["hits"], stats["misses"], stats["candidates"]) == (1, 0, {1: 1})
+
+
+def test_candidates_keep_declared_order():
+    precise, loose = FakeElement("precise"), FakeElement("loose")
+    # The loose fallback resolved faster before; that must not make it preferred
+    selector_registry.find(PageDriver({'//button[@aria-label="メニュー"]': (loose, 0.1)}), "menu")
+    selector_registry.find(PageDriver({"#app button.menu": (precise, 0.5)}), "menu")
+
+    assert selector_registry.candidates("menu") == [list(selector) for selector in selector_registry.SELECTORS["menu"]]
+    page = {"#app button.menu": (precise, 0.5), '//button[@aria-label="メニュー"]': (loose, 0.1)}
+    assert selector_registry.find(PageDriver(page), "menu") is precise
+    assert selector_registry.stats()["menu"]["lookup_ms"] == {2: 0.1, 1: 0.5}
+
+
+def test_timeout_is_recorded_as_miss():
+    with pytest.raises(TimeoutException):
+        selector_registry.find(PageDriver({}), "menu", timeout=0.2)
+
+    stats = selector_registry.stats()["menu"]
+    assert (stats["hits"], stats["misses"]) == (0, 1)
+
+
+def test_every_target_has_candidates():
+    for target, candidates in TARGETS.items():
+        assert candidates, target
+        assert all(by in (selector_registry.CSS, selector_registry.XPATH) for by, _ in candidates)
+
+
+class ScriptDriver:
+    def __init__(self, result):
+        self.result = result
+        self.scripts = []
+
+    def set_script_timeout(self, timeout):
+        pass
+
+    def execute_async_script(self, script, *args):
+        self.scripts.append(args)
+        return self.result
+
+
+def test_click_sequence_records_each_step():
+    driver = ScriptDriver({"ok": True, "step": 2, "results": [[1, 0.2, 30.0], [0, 0.1, 5.0]]})
+    selector_registry.SELECTORS["panel"] = [(selector_registry.CSS, ".panel button")]
+
+    assert selector_registry.click_sequence(driver, ["menu", "panel"]) == 2
+
+    assert len(driver.scripts) == 1
+    stats = selector_registry.stats()
+    assert stats["menu"]["candidates"] == {1: 1}
+    assert stats["panel"]["hits"] == 1
+
+
+def test_click_sequence_reports_where_it_stopped():
+    driver = ScriptDriver({"ok": False, "step": 0, "results": []})
+
+    assert selector_registry.click_sequence(driver, ["menu"]) == 0
+    # The fallback click records the miss or hit, not the script
+    assert selector_registry.stats() == {}
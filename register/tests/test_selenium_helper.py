@@ -0,0 +1,264 @@
+import json
+import os
+import re
+import pytest
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from app.helpers import selenium_helper
+
+
+def log_entry(method, **params):
+    return {"message": json.dumps({"message": {"method": method, "params": params}})}
+
+
+def request(request_id, url, method):
+    return log_entry("Network.requestWillBeSent", requestId=request_id,
+                     request={"url": url, "method": method})
+
+
+def response(request_id, url, status):
+    return log_entry("Network.responseReceived", requestId=request_id,
+                     response={"url": url, "status": status})
+
+
+class LogDriver:
+    def __init__(self, batches):
+        self.batches = list(batches)
+
+    def get_log(self, log_type):
+        return self.batches.pop(0) if self.batches else []
+
+
+ITEMS_URL = "https://nvapi.nicovideo.jp/v1/users/me/mylists/1/items?itemId=sm9"
+
+
+def test_returns_matching_response():
+    driver = LogDriver([
+        [request("1", ITEMS_URL, "OPTIONS"), response("1", ITEMS_URL, 204)],
+        [request("2", ITEMS_URL, "POST")],
+        [response("2", ITEMS_URL, 201)],
+    ])
+
+    result = selenium_helper.wait_for_network_response(driver, r"/mylists/\d+/items", "POST")
+
+    assert result == {"url": ITEMS_URL, "status": 201}
+
+
+def test_error_status_fails_fast():
+    driver = LogDriver([[request("1", ITEMS_URL, "POST"), response("1", ITEMS_URL, 409)]])
+
+    with pytest.raises(selenium_helper.NetworkRequestError) as excinfo:
+        selenium_helper.wait_for_network_response(driver, r"/mylists/\d+/items", "POST")
+
+    assert excinfo.value.status_code == 409
+
+
+def test_stale_response_does_not_count():
+    driver = LogDriver([
+        # An earlier add whose wait timed out, answered after its wait gave up
+        [request("1", ITEMS_URL, "POST")],
+        [response("1", ITEMS_URL, 201)],
+        [request("2", ITEMS_URL, "POST"), response("2", ITEMS_URL, 409)],
+    ])
+    selenium_helper.drain_network_log(driver)
+
+    with pytest.raises(selenium_helper.NetworkRequestError):
+        selenium_helper.wait_for_network_response(driver, r"/mylists/\d+/items", "POST")
+
+
+def test_timeout_without_response():
+    driver = LogDriver([])
+
+    with pytest.raises(TimeoutException):
+        selenium_helper.wait_for_network_response(driver, r"/mylists/\d+/items", "POST", timeout=0.1)
+
+
+def test_falls_back_to_delay_without_performance_log():
+    class NoLogDriver:
+        def get_log(self, log_type):
+            raise WebDriverException("log type 'performance' not found")
+
+    assert selenium_helper.wait_for_network_response(NoLogDriver(), "items", fallback_delay=0) is None
+
+
+class CdpDriver:
+    def __init__(self, weight=None):
+        self.cdp_commands = []
+        self.weight = weight
+
+    def execute_cdp_cmd(self, cmd, params):
+        self.cdp_commands.append((cmd, params))
+
+    def execute_script(self, script):
+        return self.weight
+
+
+def test_blocked_url_patterns_from_env(monkeypatch):
+    monkeypatch.delenv("CHROME_BLOCKED_URLS", raising=False)
+    assert selenium_helper.blocked_url_patterns() == selenium_helper.DEFAULT_BLOCKED_URL_PATTERNS
+
+    monkeypatch.setenv("CHROME_BLOCKED_URLS", "none")
+    assert selenium_helper.blocked_url_patterns() == []
+
+    monkeypatch.setenv("CHROME_BLOCKED_URLS", "default, *.woff2*")
+    assert selenium_helper.blocked_url_patterns() == selenium_helper.DEFAULT_BLOCKED_URL_PATTERNS + ["*.woff2*"]
+
+
+def test_default_patterns_block_segments_with_query_strings():
+    def blocked(url):
+        # Network.setBlockedURLs patterns only treat "*" as a wildcard
+        return any(
+            re.fullmatch(".*".join(re.escape(part) for part in pattern.split("*")), url)
+            for pattern in selenium_helper.DEFAULT_BLOCKED_URL_PATTERNS
+        )
+
+    assert blocked("https://example.com/hls/segment_0001.ts")
+    assert blocked("https://example.com/hls/segment_0001.ts?session=abc")
+    assert not blocked("https://www.nicovideo.jp/static/app.tsx")
+
+
+def test_apply_network_filters_blocks_through_cdp(monkeypatch):
+    monkeypatch.setenv("CHROME_BLOCKED_URLS", "*.mp4*")
+    driver = CdpDriver()
+    selenium_helper.apply_network_filters(driver)
+
+    assert driver.cdp_commands == [("Network.enable", {}), ("Network.setBlockedURLs", {"urls": ["*.mp4*"]})]
+
+    monkeypatch.setenv("CHROME_BLOCKED_URLS", "none")
+    driver = CdpDriver()
+    selenium_helper.apply_network_filters(driver)
+    assert driver.cdp_commands == []
+
+
+def test_page_load_strategy_defaults_to_eager(monkeypatch):
+    monkeypatch.delenv("CHROME_PAGE_LOAD_STRATEGY", raising=False)
+    assert selenium_helper.page_load_strategy() == "eager"
+
+    monkeypatch.setenv("CHROME_PAGE_LOAD_STRATEGY", "normal")
+    assert selenium_helper.page_load_strategy() == "normal"
+
+    monkeypatch.setenv("CHROME_PAGE_LOAD_STRATEGY", "fast")
+    assert selenium_helper.page_load_strategy() == "eager"
+
+
+def test_report_page_weight_records_in_profile(monkeypatch, tmp_path):
+    from app.helpers import profiler
+
+    monkeypatch.setenv("SELENIUM_PROFILE", "1")
+    profiler.reset()
+    driver = CdpDriver({"requests": 12, "transfer_bytes": 2048, "decoded_bytes": 4096})
+    try:
+        assert selenium_helper.report_page_weight(driver, "sm9")["transfer_bytes"] == 2048
+        pages = profiler.build_report()["pages"]
+    finally:
+        profiler.reset()
+
+    assert pages["count"] == 1
+    assert pages["requests"] == 12
+    assert pages["avg_transfer_bytes"] == 2048
+
+
+def test_report_page_weight_disabled_without_profile(monkeypatch):
+    monkeypatch.delenv("SELENIUM_PROFILE", raising=False)
+    assert selenium_helper.report_page_weight(CdpDriver(), "sm9") is None
+
+
+class LaunchedChrome(CdpDriver):
+    """Stands in for webdriver.Chrome; writes a profile like a real launch would"""
+
+    launches = []
+
+    def __init__(self, options=None, service=None):
+        super().__init__()
+        self.options = options
+        self.service = service
+        user_data_dir = next(arg.split("=", 1)[1] for arg in options.arguments if arg.startswith("--user-data-dir="))
+        LaunchedChrome.launches.append({"seeded": os.path.exists(os.path.join(user_data_dir, "Default", "Preferences"))})
+        os.makedirs(os.path.join(user_data_dir, "Default"), exist_ok=True)
+        for name in ("Default/Preferences", "SingletonLock", "Default/Cache"):
+            with open(os.path.join(user_data_dir, name), "w") as f:
+                f.write("{}")
+
+    def set_page_load_timeout(self, seconds):
+        pass
+
+    def implicitly_wait(self, seconds):
+        pass
+
+    def quit(self):
+        pass
+
+
+@pytest.fixture
+def launched_chrome(monkeypatch, tmp_path):
+    LaunchedChrome.launches = []
+    monkeypatch.setattr(selenium_helper.webdriver, "Chrome", LaunchedChrome)
+    monkeypatch.setenv("CHROME_PROFILE_TEMPLATE_DIR", str(tmp_path / "template"))
+    monkeypatch.setenv("CHROME_HEADLESS_SHELL_PATH", str(tmp_path / "missing"))
+    monkeypatch.delenv("CHROME_LAUNCH_PRESET", raising=False)
+    drivers = []
+    yield drivers
+    for driver in drivers:
+        selenium_helper.quit_driver(driver)
+
+
+def test_launch_preset_from_env(monkeypatch):
+    monkeypatch.delenv("CHROME_LAUNCH_PRESET", raising=False)
+    assert selenium_helper.launch_preset() == "safe"
+
+    monkeypatch.setenv("CHROME_LAUNCH_PRESET", "Safe")
+    assert selenium_helper.launch_preset() == "safe"
+    assert selenium_helper.launch_preset("debug") == "debug"
+
+    monkeypatch.setenv("CHROME_LAUNCH_PRESET", "turbo")
+    assert selenium_helper.launch_preset() == "safe"
+
+
+def test_fast_preset_merges_disabled_features():
+    arguments = selenium_helper.LAUNCH_PRESETS["fast"]["arguments"]
+    disabled = [argument for argument in arguments if argument.startswith("--disable-features=")]
+
+    assert disabled == ["--disable-features=TranslateUI,MediaRouter,OptimizationHints,Translate"]
+    # The base flags keep their order; only the feature list grows
+    assert arguments[:len(selenium_helper.BASE_CHROME_ARGUMENTS)] == [
+        disabled[0] if argument.startswith("--disable-features=") else argument
+        for argument in selenium_helper.BASE_CHROME_ARGUMENTS
+    ]
+
+
+def test_safe_preset_keeps_original_launch(launched_chrome, tmp_path):
+    driver = selenium_helper.create_chrome_driver("safe")
+    launched_chrome.append(driver)
+
+    arguments = [arg for arg in driver.options.arguments if not arg.startswith("--user-data-dir=")]
+    assert arguments == selenium_helper.BASE_CHROME_ARGUMENTS
+    assert driver.launch_preset == "safe"
+    assert not (tmp_path / "template").exists()
+
+
+def test_fast_preset_launches_from_profile_template(launched_chrome, tmp_path):
+    first = selenium_helper.create_chrome_driver("fast")
+    launched_chrome.append(first)
+    template = tmp_path / "template"
+    assert (template / "Default" / "Preferences").exists()
+    assert not (template / "SingletonLock").exists()
+    assert not (template / "Default" / "Cache").exists()
+
+    second = selenium_helper.create_chrome_driver("fast")
+    launched_chrome.append(second)
+    assert [launch["seeded"] for launch in LaunchedChrome.launches] == [False, True]
+    assert second.user_data_dir != first.user_data_dir
+    assert "--no-first-run" in second.options.arguments
+
+
+def test_fast_preset_uses_headless_shell_when_installed(launched_chrome, monkeypatch, tmp_path):
+    shell = tmp_path / "chrome-headless-shell"
+    shell.write_text("")
+    shell.chmod(0o755)
+    monkeypatch.setenv("CHROME_HEADLESS_SHELL_PATH", str(shell))
+
+    fast = selenium_helper.create_chrome_driver("fast")
+    safe = selenium_helper.create_chrome_driver("safe")
+    launched_chrome.extend([fast, safe])
+
+    assert fast.options.binary_location == str(shell)
+    assert safe.options.binary_location == ""
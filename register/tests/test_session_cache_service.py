@@ -0,0 +1,123 @@
+import base64
+import os
+import time
+import pytest
+from app.services.session_cache_service import SessionCacheService, LocalFileSessionStore
+
+
+@pytest.fixture
+def local_store(tmp_path, monkeypatch):
+    monkeypatch.setenv("SHARED_SECRET_KEY", base64.b64encode(os.urandom(32)).decode("utf-8"))
+    store = LocalFileSessionStore(str(tmp_path))
+    SessionCacheService.set_store(store)
+    SessionCacheService._memory.clear()
+    yield store
+    SessionCacheService.set_store(None)
+    SessionCacheService._memory.clear()
+
+
+def test_save_and_load_from_memory(local_store):
+    cookies = [{"name": "user_session", "value": "abc"}]
+    SessionCacheService.save("test@example.com", "password", cookies)
+
+    assert SessionCacheService.load("test@example.com", "password") == cookies
+
+
+def test_persistent_store_is_encrypted(local_store):
+    cookies = [{"name": "user_session", "value": "secret-session"}]
+    SessionCacheService.save("test@example.com", "password", cookies)
+
+    key = SessionCacheService.account_key("test@example.com", "password")
+    stored = local_store.get(key)
+    assert stored is not None
+    assert "secret-session" not in stored
+
+    # A cold container only has the persistent store
+    SessionCacheService._memory.clear()
+    assert SessionCacheService.load("test@example.com", "password") == cookies
+
+
+def test_expired_cookies_are_ignored(local_store):
+    cookies = [{"name": "user_session", "value": "abc", "expiry": int(time.time()) - 10}]
+    SessionCacheService.save("test@example.com", "password", cookies)
+
+    assert SessionCacheService.load("test@example.com", "password") is None
+
+
+def test_session_is_keyed_on_the_password(local_store):
+    SessionCacheService.save("test@example.com", "password", [{"name": "user_session", "value": "abc"}])
+
+    assert SessionCacheService.load("test@example.com", "wrong-password") is None
+    assert SessionCacheService.load("Test@Example.com ", "password") is not None
+
+
+def test_invalidate_removes_session(local_store):
+    SessionCacheService.save("test@example.com", "password", [{"name": "user_session", "value": "abc"}])
+    SessionCacheService.invalidate("test@example.com", "password")
+
+    assert SessionCacheService.load("test@example.com", "password") is None
+    assert local_store.get(SessionCacheService.account_key("test@example.com", "password")) is None
+
+
+class CookieDriver:
+    def __init__(self, logged_in):
+        self.logged_in = logged_in
+        self.cookies = []
+        self.current_url = ""
+
+    def get(self, url):
+        if url.endswith("/my/mylist") and not self.logged_in:
+            self.current_url = "https://account.nicovideo.jp/login"
+        else:
+            self.current_url = url
+
+    def add_cookie(self, cookie):
+        self.cookies.append(cookie)
+
+    def delete_all_cookies(self):
+        self.cookies = []
+
+
+def test_login_skips_form_with_valid_session(local_store, monkeypatch):
+    from app import regist
+
+    SessionCacheService.save("test@example.com", "password", [{"name": "user_session", "value": "abc"}])
+    form_logins = []
+    monkeypatch.setattr("app.regist.login_with_form", lambda d, e, p: form_logins.append(e))
+
+    driver = CookieDriver(logged_in=True)
+    regist.login(driver, "test@example.com", "password")
+
+    assert form_logins == []
+    assert driver.cookies == [{"name": "user_session", "value": "abc"}]
+
+
+def test_login_falls_back_to_form_when_session_expired(local_store, monkeypatch):
+    from app import regist
+
+    SessionCacheService.save("test@example.com", "password", [{"name": "user_session", "value": "stale"}])
+    form_logins = []
+    monkeypatch.setattr("app.regist.login_with_form", lambda d, e, p: form_logins.append(e))
+    monkeypatch.setattr("app.regist.capture_session", lambda d, e, p: None)
+
+    driver = CookieDriver(logged_in=False)
+    regist.login(driver, "test@example.com", "password")
+
+    assert form_logins == ["test@example.com"]
+    assert SessionCacheService.load("test@example.com", "password") is None
+
+
+def test_login_with_wrong_password_does_not_reuse_session(local_store, monkeypatch):
+    from app import regist
+
+    SessionCacheService.save("test@example.com", "password", [{"name": "user_session", "value": "abc"}])
+    form_logins = []
+    monkeypatch.setattr("app.regist.login_with_form", lambda d, e, p: form_logins.append(p))
+    monkeypatch.setattr("app.regist.capture_session", lambda d, e, p: None)
+
+    driver = CookieDriver(logged_in=True)
+    regist.login(driver, "test@example.com", "wrong-password")
+
+    # The form decides whether the password is right; the cached cookies are never injected
+    assert form_logins == ["wrong-password"]
+    assert driver.cookies == []
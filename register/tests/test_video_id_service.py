@@ -0,0 +1,43 @@
+import json
+from unittest.mock import patch
+from app.handlers.chain_register_handler import ChainRegisterHandler
+from app.handlers.register_handler import RegisterHandler
+from app.services.video_id_service import VideoIdService
+
+
+def test_normalize_strips_dedupes_and_validates():
+    valid_ids, invalid_ids = VideoIdService.normalize(
+        ["", " sm9 ", "sm9", "so123", "https://nico.ms/nm456", "abc", "sm9x"]
+    )
+
+    assert valid_ids == ["sm9", "so123", "nm456"]
+    assert invalid_ids == {"abc": "invalid_format", "sm9x": "invalid_format"}
+
+
+def test_first_chain_request_drops_invalid_ids():
+    with patch.object(ChainRegisterHandler, '_invoke_delete_and_create_chain') as mock_delete_chain:
+        result = ChainRegisterHandler.handle(
+            "test@example.com", "encrypted", ["sm1", "sm1", "bad"], None, "Title"
+        )
+
+    args, kwargs = mock_delete_chain.call_args
+    assert args[2] == ["sm1"]
+    assert kwargs["failed_ids"] == ["bad"]
+    assert json.loads(result["body"])["total_videos"] == 1
+
+
+def test_first_chain_request_without_valid_ids():
+    with patch.object(ChainRegisterHandler, '_invoke_delete_and_create_chain') as mock_delete_chain:
+        result = ChainRegisterHandler.handle("test@example.com", "encrypted", ["", "bad"], None, "Title")
+
+    assert result["statusCode"] == 400
+    mock_delete_chain.assert_not_called()
+
+
+def test_register_handler_skips_invalid_ids():
+    with patch('app.regist.regist', return_value=[]) as mock_regist:
+        result = RegisterHandler.handle("email", "password", ["sm1", "junk", " sm1"])
+
+    mock_regist.assert_called_once()
+    assert mock_regist.call_args[0] == ("email", "password", ["sm1"])
+    assert json.loads(result["body"])["failed_id_list"] == ["junk"]
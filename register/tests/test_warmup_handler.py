@@ -0,0 +1,90 @@
+import json
+import pytest
+from unittest.mock import patch
+
+import handler
+from app.helpers import driver_pool
+from app.services.session_cache_service import SessionCacheService
+
+
+class FakeDriver:
+    def set_window_size(self, w, h):
+        pass
+
+    def execute_script(self, script):
+        return 1
+
+    def quit(self):
+        pass
+
+
+@pytest.fixture
+def created(monkeypatch):
+    created = []
+
+    def fake_create_chrome_driver():
+        driver = FakeDriver()
+        created.append(driver)
+        return driver
+
+    driver_pool.close_all()
+    monkeypatch.setattr("app.helpers.selenium_helper.create_chrome_driver", fake_create_chrome_driver)
+    yield created
+    driver_pool.close_all()
+
+
+def warmup(**fields):
+    event = {"body": json.dumps({"action": "warmup", **fields})}
+    response = handler.lambda_handler(event, None)
+    return response["statusCode"], json.loads(response["body"])
+
+
+def test_warmup_requires_credentials(created):
+    status, body = warmup()
+
+    assert status == 400
+    assert created == []
+
+
+def test_warmup_does_not_start_chrome_when_decryption_fails(created):
+    with patch('app.services.auth_service.AuthService.decrypt_password', side_effect=ValueError("bad")):
+        status, body = warmup(email="test@example.com", password="encrypted_password")
+
+    assert status == 400
+    assert created == []
+    assert driver_pool.idle_count() == 0
+
+
+def test_warmup_logs_in_and_keeps_the_session(created):
+    logins = []
+
+    with patch('app.services.auth_service.AuthService.decrypt_password', return_value="password"), \
+            patch('app.regist.login', side_effect=lambda driver, email, password: logins.append(email)):
+        status, body = warmup(email="test@example.com", password="encrypted_password")
+
+    assert status == 200
+    assert set(body["stages_ms"]) == {"decrypt", "driver", "login"}
+    assert logins == ["test@example.com"]
+    # The logged-in driver is preferred for the same account
+    assert driver_pool.acquire(SessionCacheService.account_key("test@example.com", "password")) is created[0]
+    assert len(created) == 1
+
+
+def test_warmup_reuses_warm_driver(created):
+    with patch('app.services.auth_service.AuthService.decrypt_password', return_value="password"), \
+            patch('app.regist.login'):
+        warmup(email="test@example.com", password="encrypted_password")
+        status, body = warmup(email="test@example.com", password="encrypted_password")
+
+    assert body["driver_reused"] is True
+    assert len(created) == 1
+
+
+def test_failed_login_discards_driver(created):
+    with patch('app.services.auth_service.AuthService.decrypt_password', return_value="password"), \
+            patch('app.regist.login', side_effect=Exception("login failed")):
+        status, body = warmup(email="test@example.com", password="encrypted_password")
+
+    assert status == 500
+    assert "login" in body["error"]
+    assert driver_pool.idle_count() == 0